@@ -2,10 +2,14 @@
 Módulo principal de inicialización para la aplicación Flask de prisma-led-back.
 
 Configura la aplicación, registra los blueprints de rutas, inicializa extensiones
-(CORS, JWT, Mail, Limiter) y define el manejador de errores para límites de peticiones.
+(CORS, JWT, Mail, Limiter), define el manejador de errores para límites de peticiones y
+ejecuta el calentamiento de la conexión a Google Sheets antes de recibir tráfico.
 """
 
-from flask import Flask, jsonify
+import time
+import click
+from flask import Flask, jsonify, g
+from flask.helpers import get_debug_flag
 from flask_cors import CORS
 from app.config import Config
 from flask_jwt_extended import JWTManager
@@ -19,17 +23,58 @@ from app.routes.tarifas import tarifas_bp
 from app.routes.pantallas import pantallas_bp
 import os
 from app.routes.ciudad import ciudad_bp
+from app.routes.bootstrap import bootstrap_bp
 from app.extensions import limiter
+from app.services.arranque import calentar_aplicacion, reportar_tiempos, restaurar_instantanea, recuperar_diario
+from app.services.refresco import iniciar_refresco
+from app.services.contexto import cerrar_contexto
+from app.services.correos import cargar_plantillas
+from app.comandos import registrar_comandos
 
-def create_app():
+def _es_servidor_cli():
+    """
+    Indica si la aplicación se está cargando para `flask run` en el proceso que atiende las
+    peticiones (con el recargador activo, el proceso padre solo vigila los cambios).
+
+    Returns:
+        bool: True si el comando en curso es `run` y este proceso es el que sirve.
+    """
+    contexto = click.get_current_context(silent=True)
+    if contexto is None or contexto.command.name != "run":
+        return False
+    recargar = contexto.params.get("reload")
+    if recargar is None:
+        recargar = get_debug_flag()
+    return not recargar or os.getenv("WERKZEUG_RUN_MAIN") == "true"
+
+def create_app(arrancar_servidor=True):
     """
     Crea e inicializa la aplicación Flask, registra blueprints y extensiones.
 
+    Si SHEETS_WARMUP está activo, autoriza la conexión, obtiene las worksheets y precarga las
+    hojas de referencia antes de retornar, e imprime el reporte de tiempos de arranque.
+    Antes carga la instantánea en disco de la caché de hojas, si existe, y completa o compensa
+    las transacciones de escritura que quedaron pendientes en el diario local.
+    Si SHEETS_REFRESCO está activo, inicia el hilo que mantiene la caché de hojas al día.
+    Las plantillas de correo se compilan una sola vez aquí.
+
+    Bajo los demás comandos de la línea de comandos de Flask (FLASK_RUN_FROM_CLI) solo se configura
+    la aplicación: las etapas de arranque del servidor se omiten. `flask run` sí las ejecuta.
+
+    Args:
+        arrancar_servidor (bool): False para omitir las etapas de arranque del servidor (por
+            ejemplo, en el proceso padre del recargador de `python run.py`, que no atiende peticiones).
+
     Returns:
         Flask: Instancia de la aplicación Flask configurada.
     """
+    inicio_arranque = time.perf_counter()
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Los archivos locales (instantánea y diario) se ubican en la carpeta instance, no en el directorio actual
+    for clave in ("SHEETS_SNAPSHOT_PATH", "TRANSACCIONES_DIARIO_PATH"):
+        if app.config[clave]:
+            app.config[clave] = os.path.join(app.instance_path, app.config[clave])
     mail.init_app(app)
     print("FRONTEND_URL:", os.getenv("FRONTEND_URL"))
     CORS(app, resources={r"/api/*": {"origins": os.getenv("FRONTEND_URL")}}, supports_credentials=True)
@@ -42,6 +87,7 @@ def create_app():
     app.register_blueprint(tarifas_bp, url_prefix="/api/tarifas")
     app.register_blueprint(pantallas_bp, url_prefix="/api/pantallas")
     app.register_blueprint(ciudad_bp,  url_prefix="/api/ciudades")
+    app.register_blueprint(bootstrap_bp, url_prefix="/api/bootstrap")
     limiter.init_app(app)
     
     @app.errorhandler(429)
@@ -59,4 +105,49 @@ def create_app():
             "error": "Has excedido el número de intentos permitidos. Por favor, intenta de nuevo más tarde."
         }), 429
 
+    @app.after_request
+    def marcar_datos_desactualizados(respuesta):
+        """
+        Indica en los encabezados si la respuesta se construyó con una copia vieja de las hojas
+        porque Google Sheets no estaba disponible (modo degradado).
+
+        Args:
+            respuesta (Response): Respuesta a enviar.
+
+        Returns:
+            Response: La misma respuesta, con los encabezados Warning y X-Sheets-Antiguedad si aplica.
+        """
+        antiguedad = g.get("antiguedad_datos")
+        if antiguedad is not None:
+            respuesta.headers["Warning"] = '110 - "Response is Stale"'
+            respuesta.headers["X-Sheets-Antiguedad"] = str(int(antiguedad))
+        return respuesta
+
+    # Confirma las escrituras que una petición haya dejado pendientes en su contexto de datos
+    app.teardown_request(cerrar_contexto)
+
+    # Comandos de mantenimiento (flask --app run <comando>), ver app/comandos.py
+    registrar_comandos(app)
+
+    cargar_plantillas()
+
+    # Los comandos de la línea de comandos de Flask (ver app/comandos.py) no arrancan el servidor:
+    # sin instantánea, recuperación del diario, calentamiento ni refresco (cada comando abre solo
+    # la conexión que necesita). `flask run` sí es un servidor y arranca como `python run.py`.
+    if os.getenv("FLASK_RUN_FROM_CLI") == "true":
+        arrancar_servidor = arrancar_servidor and _es_servidor_cli()
+    if not arrancar_servidor:
+        return app
+
+    tiempos = [("configuracion", (time.perf_counter() - inicio_arranque) * 1000, True)]
+    restaurar_instantanea(app, tiempos)
+    recuperar_diario(app, tiempos)
+    if app.config["SHEETS_WARMUP"]:
+        calentar_aplicacion(app, tiempos)
+    else:
+        reportar_tiempos(tiempos)
+
+    if app.config["SHEETS_REFRESCO"]:
+        iniciar_refresco(app)
+
     return app
@@ -0,0 +1,70 @@
+"""
+Comandos de línea de comandos (Flask CLI) de prisma-led-back.
+
+Se registran en create_app y se ejecutan desde prisma-led-back con:
+
+    flask --app run <comando> [opciones]
+
+Bajo la línea de comandos, create_app no ejecuta el arranque del servidor (instantánea, recuperación
+del diario de transacciones, calentamiento ni hilo de refresco): un cron no compite con el servidor
+en marcha por el diario ni por el archivo de la instantánea, y solo abre la conexión a Google Sheets
+cuando el comando lee o escribe. `flask run` es la excepción: arranca el servidor completo.
+
+Comandos:
+- recordatorios: envía por lotes los recordatorios de video de las prereservas pendientes
+  próximas a vencer (ver app/services/recordatorios.py).
+- mantenimiento: vence las prereservas pendientes fuera de plazo y archiva las reservas y
+  prereservas terminadas (ver app/services/mantenimiento.py). Pensado para correr a diario (cron).
+"""
+
+from datetime import datetime
+import click
+from app.services.recordatorios import enviar_recordatorios
+from app.services.mantenimiento import ejecutar_mantenimiento
+
+
+def _leer_fecha(_ctx, _param, valor):
+    if valor is None:
+        return None
+    try:
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        raise click.BadParameter("Use el formato YYYY-MM-DD")
+
+
+def registrar_comandos(app):
+    """
+    Registra los comandos CLI en la aplicación.
+
+    Args:
+        app (Flask): Aplicación Flask.
+    """
+
+    @app.cli.command("recordatorios")
+    @click.option("--simular", is_flag=True, help="Solo cuenta y renderiza, sin enviar ni marcar.")
+    @click.option("--limite", type=int, default=None, help="Máximo de recordatorios a enviar.")
+    @click.option("--hoy", callback=_leer_fecha, default=None, help="Fecha de referencia YYYY-MM-DD.")
+    def comando_recordatorios(simular, limite, hoy):
+        """
+        Envía los recordatorios de video de las prereservas pendientes próximas a vencer.
+        """
+        resumen = enviar_recordatorios(hoy=hoy, limite=limite, simular=simular)
+        click.echo(
+            f"[RECORDATORIOS] candidatas={resumen['candidatas']} enviados={resumen['enviados']} "
+            f"fallidos={resumen['fallidos']} marcadas={resumen['marcadas']} en {resumen['segundos']} s"
+        )
+
+    @app.cli.command("mantenimiento")
+    @click.option("--simular", is_flag=True, help="Solo cuenta lo que se archivaría, sin escribir.")
+    @click.option("--hoy", callback=_leer_fecha, default=None, help="Fecha de referencia YYYY-MM-DD.")
+    def comando_mantenimiento(simular, hoy):
+        """
+        Vence las prereservas pendientes fuera de plazo y archiva las reservas y prereservas terminadas.
+        """
+        resumen = ejecutar_mantenimiento(hoy=hoy, simular=simular)
+        click.echo(
+            f"[MANTENIMIENTO] {'por archivar' if simular else 'archivadas'}: reservas={resumen['reservas']} "
+            f"detalle_reserva={resumen['detalle_reserva']} prereservas={resumen['prereservas']} "
+            f"(vencidas={resumen['vencidas']}) detalle_prereserva={resumen['detalle_prereserva']} "
+            f"en {resumen['segundos']} s"
+        )
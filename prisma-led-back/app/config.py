@@ -19,7 +19,26 @@ class Config:
     Los atributos se cargan desde variables de entorno y se utilizan para:
     - Seguridad (SECRET_KEY, JWT_SECRET_KEY)
     - Acceso a Google Sheets (SPREADSHEET_ID, GOOGLE_CREDENTIALS_PATH)
-    - Configuración de correo electrónico (MAIL_SERVER, MAIL_PORT, etc.)
+    - Configuración de correo electrónico (MAIL_SERVER, MAIL_PORT, etc.). MAIL_MAX_EMAILS limita
+      los correos por sesión SMTP (Flask-Mail reconecta al alcanzarlo); vacío o 0 = sin límite
+    - Caché de hojas en memoria (SHEETS_CACHE_TTL_REFERENCIA, SHEETS_CACHE_TTL_USUARIOS,
+      SHEETS_CACHE_TTL_RESERVAS), en segundos
+    - Edad máxima de una hoja sincronizada solo con filas nuevas antes de recargarla completa
+      (SHEETS_DELTA_MAX_AGE), en segundos
+    - Calentamiento de la conexión a Google Sheets al arrancar (SHEETS_WARMUP)
+    - Refresco de la caché en segundo plano (SHEETS_REFRESCO y los intervalos SHEETS_REFRESCO_*),
+      y margen durante el cual se sirve una hoja vencida mientras se refresca (SHEETS_CACHE_STALE_MAX)
+    - Archivo SQLite con la instantánea de la caché de hojas (SHEETS_SNAPSHOT_PATH; vacío la desactiva).
+      Las rutas relativas de este archivo y de TRANSACCIONES_DIARIO_PATH se resuelven en la carpeta
+      instance de la aplicación
+    - Vigencia de los apartados temporales de pantallas (APARTADO_TTL_SEGUNDOS), en segundos
+    - Temporadas con precio especial por cupo de 20 segundos (COTIZACION_TEMPORADAS), como
+      "mes:precio,mes:precio" (por defecto "12:2000000", diciembre)
+    - Plazo en días para enviar el video de una prereserva pendiente (PLAZO_VIDEO_DIAS), días antes
+      del vencimiento en que se envía el recordatorio (RECORDATORIO_DIAS_ANTES) y pausa entre
+      correos del envío por lotes (RECORDATORIO_PAUSA_SEGUNDOS)
+    - Archivo SQLite del diario de transacciones de escritura (TRANSACCIONES_DIARIO_PATH; vacío lo
+      desactiva), ver transacciones.py
     """
     SECRET_KEY = os.getenv("SECRET_KEY")
     SPREADSHEET_ID = os.getenv("SPREADSHEET_ID")
@@ -32,4 +51,21 @@ class Config:
     MAIL_USERNAME = os.getenv("MAIL_USERNAME")
     MAIL_PASSWORD = os.getenv("MAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = os.getenv("MAIL_DEFAULT_SENDER")
-
+    MAIL_MAX_EMAILS = int(os.getenv("MAIL_MAX_EMAILS") or 0) or None
+    SHEETS_CACHE_TTL_REFERENCIA = int(os.getenv("SHEETS_CACHE_TTL_REFERENCIA", 300))
+    SHEETS_CACHE_TTL_USUARIOS = int(os.getenv("SHEETS_CACHE_TTL_USUARIOS", 60))
+    SHEETS_CACHE_TTL_RESERVAS = int(os.getenv("SHEETS_CACHE_TTL_RESERVAS", 15))
+    SHEETS_DELTA_MAX_AGE = int(os.getenv("SHEETS_DELTA_MAX_AGE", 600))
+    SHEETS_WARMUP = os.getenv("SHEETS_WARMUP", "True") == "True"
+    SHEETS_REFRESCO = os.getenv("SHEETS_REFRESCO", "True") == "True"
+    SHEETS_REFRESCO_REFERENCIA = int(os.getenv("SHEETS_REFRESCO_REFERENCIA", 240))
+    SHEETS_REFRESCO_USUARIOS = int(os.getenv("SHEETS_REFRESCO_USUARIOS", 45))
+    SHEETS_REFRESCO_RESERVAS = int(os.getenv("SHEETS_REFRESCO_RESERVAS", 10))
+    SHEETS_CACHE_STALE_MAX = int(os.getenv("SHEETS_CACHE_STALE_MAX", 300))
+    SHEETS_SNAPSHOT_PATH = os.getenv("SHEETS_SNAPSHOT_PATH", "sheets_snapshot.sqlite3")
+    APARTADO_TTL_SEGUNDOS = int(os.getenv("APARTADO_TTL_SEGUNDOS", 600))
+    COTIZACION_TEMPORADAS = os.getenv("COTIZACION_TEMPORADAS", "12:2000000")
+    PLAZO_VIDEO_DIAS = int(os.getenv("PLAZO_VIDEO_DIAS", 5))
+    RECORDATORIO_DIAS_ANTES = int(os.getenv("RECORDATORIO_DIAS_ANTES", 2))
+    RECORDATORIO_PAUSA_SEGUNDOS = float(os.getenv("RECORDATORIO_PAUSA_SEGUNDOS", 0.02))
+    TRANSACCIONES_DIARIO_PATH = os.getenv("TRANSACCIONES_DIARIO_PATH", "transacciones.sqlite3")
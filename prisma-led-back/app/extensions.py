@@ -24,4 +24,6 @@ registro_lock = Lock()
 recovery_lock = Lock()
 pre_reserva_lock = Lock()
 ciudad_lock = Lock()
-detalle_pre_reserva_lock = Lock()
\ No newline at end of file
+apartado_lock = Lock()
+# Serializa la resolución de filas y el batchUpdate de las transacciones (ver transacciones.py)
+transaccion_lock = Lock()
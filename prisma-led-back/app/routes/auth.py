@@ -24,13 +24,15 @@ from flask_mail import Message
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
 from werkzeug.security import check_password_hash, generate_password_hash
 from app.services.sheets_client import (
-    connect_sheet,
+    obtener_worksheet,
     get_usuarios,
-    get_clientes
+    leer_columnas,
+    invalidar_cache
 )
 from datetime import datetime
 from app.services.id_user_generator import generate_unique_user_id
 from app.services.uxid import generate_next_uxid
+from app.services.correos import renderizar_recuperacion
 from app.extensions import mail
 from app.extensions import registro_lock
 from app.extensions import recovery_lock
@@ -122,11 +124,11 @@ def register():
         if not nombre or not correo or not password:
             return jsonify({"msg": "Faltan campos obligatorios"}), 400
 
-        usuarios = get_usuarios()
-        if any(u["correo"] == correo for u in usuarios):
+        # Solo se leen las columnas necesarias para validar duplicados (una sola llamada)
+        columnas = leer_columnas({"usuarios": ["correo"], "clientes": ["nit"]})
+        if any(c == correo for c in columnas["usuarios"]["correo"]):
             return jsonify({"msg": "El correo ya está registrado"}), 409
-        clientes = get_clientes()
-        if any(str(u["nit"]) == str(nit) for u in clientes):
+        if any(str(n) == str(nit) for n in columnas["clientes"]["nit"]):
             return jsonify({"msg": "El nit ya está registrado"}), 409
 
         id_usuario = generate_unique_user_id()
@@ -146,12 +148,11 @@ def register():
             uxid
         ]
 
-        sheet = connect_sheet()
-        sheet_usuarios = sheet.worksheet("usuarios")
+        sheet_usuarios = obtener_worksheet("usuarios")
         sheet_usuarios.append_row(nueva_fila_usuario)
 
         if rol == "cliente":
-            sheet_clientes = sheet.worksheet("clientes")
+            sheet_clientes = obtener_worksheet("clientes")
             id_cliente = id_usuario
             uxid_cliente = generate_next_uxid("clientes")
 
@@ -169,6 +170,7 @@ def register():
             ]
             sheet_clientes.append_row(nueva_fila_cliente)
 
+        invalidar_cache("usuarios", "clientes", solo_agregados=True)
         return jsonify({"msg": "Registro exitoso"}), 201
 
 
@@ -197,8 +199,8 @@ def recovery():
         if not correo:
             return jsonify({"msg": "Correo requerido"}), 400
 
-        users = get_usuarios()
-        index = next((i for i, u in enumerate(users) if u["correo"] == correo), None)
+        correos = leer_columnas({"usuarios": ["correo"]})["usuarios"]["correo"]
+        index = next((i for i, c in enumerate(correos) if c == correo), None)
         if index is None:
             return jsonify({"msg": "Correo no registrado"}), 404
 
@@ -206,26 +208,13 @@ def recovery():
         hashed_password = generate_password_hash(temporal_password)
 
         row_to_update = index + 2
-        sheet = connect_sheet().worksheet("usuarios")
+        sheet = obtener_worksheet("usuarios")
         sheet.update_cell(row_to_update, 6, hashed_password)
+        invalidar_cache("usuarios")
 
         sender = current_app.config["MAIL_USERNAME"]
         msg = Message("Recuperación de Contraseña - PrismaLED", sender=sender, recipients=[correo])
-        msg.body = f"""Hola,
-
-    Hemos recibido una solicitud para recuperar el acceso a tu cuenta de PrismaLED.
-
-    Esta es tu nueva contraseña temporal:
-    🔐 {temporal_password}
-
-    Te recomendamos cambiarla una vez hayas ingresado, para mayor seguridad.
-
-    Gracias por ser parte de PrismaLED, el sistema exclusivo de pantallas publicitarias en el Bulevar del Río.
-
-    Atentamente,
-    Equipo PrismaLED
-    comercial@prismaled.com
-    """
+        msg.body = renderizar_recuperacion(temporal_password)
         try:
             mail.send(msg)
             return jsonify({
@@ -0,0 +1,57 @@
+"""
+Ruta de arranque (bootstrap) de la aplicación en prisma-led-back.
+
+Expone un único endpoint que entrega todos los datos de referencia que el frontend necesita
+al iniciar: tarifas, pantallas, categorías, ciudades y el perfil del cliente autenticado.
+
+Características clave:
+- Una sola verificación JWT y una sola respuesta en lugar de cinco peticiones paralelas.
+- Las hojas que no están vigentes en caché se leen en una única llamada batch a Google Sheets.
+- Soporta GET condicional (ETag / If-None-Match) para recargas sin transferencia de datos.
+- Cada lista se entrega tal como la entrega su endpoint individual (por ejemplo, las pantallas en
+  el orden de la hoja, como /api/pantallas), para que el frontend las use sin reordenarlas.
+"""
+
+from flask import Blueprint
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.services.sheets_client import instantanea_hojas
+from app.services.cache_http import calcular_etag, respuesta_condicional
+from app.routes.cliente import perfil_cliente
+
+bootstrap_bp = Blueprint('bootstrap_bp', __name__)
+
+HOJAS_BOOTSTRAP = ("tarifas", "pantallas", "categorias", "ciudades", "usuarios", "clientes")
+
+# Forma de la respuesta; forma parte del ETag para que un cambio de formato no se responda con un
+# 304 sobre el cuerpo anterior que el navegador tenga en caché (2: pantallas como lista plana)
+FORMATO_BOOTSTRAP = 2
+
+
+@bootstrap_bp.route('', methods=['GET'])
+@jwt_required()
+def bootstrap():
+    """
+    Endpoint que retorna todos los datos de referencia de la aplicación en una sola respuesta.
+
+    Response:
+        200: {
+            "tarifas": list,
+            "pantallas": [pantalla, ...] (en el orden de la hoja),
+            "categorias": list,
+            "ciudades": [str, ...],
+            "cliente": dict or null
+        }
+        304: Sin cuerpo, si el ETag enviado en If-None-Match sigue vigente
+    """
+    identidad = get_jwt_identity()
+    # El ETag sale de la misma lectura de la caché que el cuerpo (ver cache_http.py)
+    hojas = instantanea_hojas(*HOJAS_BOOTSTRAP)
+    etag = calcular_etag(identidad, FORMATO_BOOTSTRAP, *hojas.versiones)
+
+    return respuesta_condicional(etag, lambda: {
+        "tarifas": hojas.registros("tarifas"),
+        "pantallas": hojas.registros("pantallas"),
+        "categorias": hojas.registros("categorias"),
+        "ciudades": [c["nombre_ciudad"] for c in hojas.registros("ciudades")],
+        "cliente": perfil_cliente(identidad, hojas.registros("usuarios"), hojas.registros("clientes"))
+    })
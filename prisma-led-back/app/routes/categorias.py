@@ -6,7 +6,8 @@ Incluye el endpoint protegido para obtener todas las categorías desde Google Sh
 
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.services.sheets_client import connect_sheet, get_categorias
+from app.services.sheets_client import obtener_worksheet, instantanea_hojas, invalidar_cache
+from app.services.cache_http import respuesta_condicional
 import uuid
 
 categorias_bp = Blueprint('categorias_bp', __name__)
@@ -18,13 +19,13 @@ def obtener_categorias():
     """
     Endpoint para obtener todas las categorías.
 
-    Requiere autenticación JWT.
+    Requiere autenticación JWT. Soporta GET condicional (ETag / If-None-Match).
 
     Returns:
-        Response: JSON con la lista de categorías y código HTTP 200.
+        Response: JSON con la lista de categorías y código HTTP 200, o 304 si no hubo cambios.
     """
-    categorias = get_categorias()
-    return jsonify(categorias), 200
+    hojas = instantanea_hojas("categorias")
+    return respuesta_condicional(hojas.versiones[0], lambda: hojas.registros("categorias"))
 
 
 @categorias_bp.route('/categorias', methods=['POST'])
@@ -39,9 +40,9 @@ def agregar_categoria():
 
         nuevo_id = uuid.uuid4().hex[:8]
 
-        sheet = connect_sheet()
-        cat_ws = sheet.worksheet("categorias")
+        cat_ws = obtener_worksheet("categorias")
         cat_ws.append_row([nuevo_id, nombre])
+        invalidar_cache("categorias")
 
         return jsonify({"id_categoria": nuevo_id, "nombre": nombre}), 201
     except Exception as e:
@@ -5,7 +5,8 @@ Incluye endpoints para listar y registrar ciudades, con validaciones de nombre y
 """
 
 from flask import Blueprint, jsonify, request
-from app.services.sheets_client import get_ciudades, add_ciudad
+from app.services.sheets_client import add_ciudad, instantanea_hojas
+from app.services.cache_http import respuesta_condicional
 from flask_jwt_extended import jwt_required
 from app.extensions import limiter
 from app.extensions import ciudad_lock
@@ -18,11 +19,16 @@ def listar_ciudades():
     """
     Endpoint para listar todas las ciudades registradas.
 
+    Soporta GET condicional (ETag / If-None-Match).
+
     Returns:
-        Response: JSON con la lista de nombres de ciudades y código HTTP 200.
+        Response: JSON con la lista de nombres de ciudades y código HTTP 200, o 304 si no hubo cambios.
     """
-    ciudades = get_ciudades()
-    return jsonify([c["nombre_ciudad"] for c in ciudades]), 200
+    hojas = instantanea_hojas("ciudades")
+    return respuesta_condicional(
+        hojas.versiones[0],
+        lambda: [c["nombre_ciudad"] for c in hojas.registros("ciudades")]
+    )
 
 @ciudad_bp.route('', methods=['POST'])
 @jwt_required()
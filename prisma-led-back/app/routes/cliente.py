@@ -22,10 +22,13 @@ from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.sheets_client import (
-    connect_sheet,
+    obtener_worksheet,
     get_usuarios,
-    get_clientes
+    get_clientes,
+    instantanea_hojas,
+    invalidar_cache
 )
+from app.services.cache_http import calcular_etag, respuesta_condicional
 from app.extensions import limiter
 import re
 
@@ -65,12 +68,11 @@ def actualizar_cliente():
     id_usuario = get_jwt_identity()
     data = request.get_json()
 
-    sheet = connect_sheet()
-    usuarios_ws = sheet.worksheet("usuarios")
-    clientes_ws = sheet.worksheet("clientes")
+    usuarios_ws = obtener_worksheet("usuarios")
+    clientes_ws = obtener_worksheet("clientes")
 
-    usuarios = get_usuarios()
-    clientes = get_clientes()
+    usuarios = get_usuarios(fresco=True)
+    clientes = get_clientes(fresco=True)
 
     usuario_index = next((i for i, u in enumerate(usuarios) if u["id_usuario"] == id_usuario), None)
     cliente_index = next((i for i, c in enumerate(clientes) if c["id_cliente"] == id_usuario), None)
@@ -134,8 +136,39 @@ def actualizar_cliente():
             col_idx = list(clientes[0].keys()).index(key_sheet) + 1
             clientes_ws.update_cell(cliente_index + 2, col_idx, valor)
 
+    invalidar_cache("usuarios", "clientes")
     return jsonify({"msg": "Datos actualizados correctamente"}), 200
 
+def perfil_cliente(id_usuario, usuarios, clientes):
+    """
+    Construye el perfil público del cliente a partir de las hojas 'usuarios' y 'clientes'.
+
+    Args:
+        id_usuario (str): ID del usuario autenticado (coincide con id_cliente).
+        usuarios (list): Registros de la hoja 'usuarios'.
+        clientes (list): Registros de la hoja 'clientes'.
+
+    Returns:
+        dict or None: Datos del cliente, o None si el usuario o el cliente no existen.
+    """
+    usuario = next((u for u in usuarios if u["id_usuario"] == id_usuario), None)
+    cliente = next((c for c in clientes if c["id_cliente"] == id_usuario), None)
+
+    if not usuario or not cliente:
+        return None
+
+    return {
+        "razon_social": cliente.get("razon_social", ""),
+        "nit": cliente.get("nit", ""),
+        "correo": cliente.get("correo_electronico", ""),
+        "ciudad": cliente.get("ciudad", ""),
+        "direccion": cliente.get("direccion", ""),
+        "telefono": cliente.get("telefono_contacto", ""),
+        "nombre_contacto": cliente.get("nombre_contacto", ""),
+        "usuario": usuario.get("correo", ""),
+        "id_usuario": usuario.get("id_usuario", "")
+    }
+
 @cliente_bp.route('/cliente', methods=['GET'])
 @jwt_required()
 def obtener_cliente():
@@ -144,6 +177,8 @@ def obtener_cliente():
 
     - Retorna información relevante del cliente y usuario, como razón social, NIT,
       correo, ciudad, dirección, teléfono, nombre de contacto y usuario.
+    - Soporta GET condicional: el ETag depende del usuario y de la versión de las hojas
+      'usuarios' y 'clientes', por lo que un 304 no consulta Google Sheets si la caché está vigente.
 
     Response:
         200: {
@@ -156,27 +191,15 @@ def obtener_cliente():
             "nombre_contacto": str,
             "usuario": str
         }
+        304: Sin cuerpo, si el ETag enviado en If-None-Match sigue vigente
         404: { "msg": "Usuario no encontrado" }
     """
     id_usuario = get_jwt_identity()
+    hojas = instantanea_hojas("usuarios", "clientes")
+    etag = calcular_etag(id_usuario, *hojas.versiones)
 
-    usuarios = get_usuarios()
-    clientes = get_clientes()
-
-    usuario = next((u for u in usuarios if u["id_usuario"] == id_usuario), None)
-    cliente = next((c for c in clientes if c["id_cliente"] == id_usuario), None)
-
-    if not usuario or not cliente:
+    perfil = perfil_cliente(id_usuario, hojas.registros("usuarios"), hojas.registros("clientes"))
+    if not perfil:
         return jsonify({"msg": "Usuario no encontrado"}), 404
 
-    return jsonify({
-        "razon_social": cliente.get("razon_social", ""),
-        "nit": cliente.get("nit", ""),
-        "correo": cliente.get("correo_electronico", ""),
-        "ciudad": cliente.get("ciudad", ""),
-        "direccion": cliente.get("direccion", ""),
-        "telefono": cliente.get("telefono_contacto", ""),
-        "nombre_contacto": cliente.get("nombre_contacto", ""),
-        "usuario": usuario.get("correo", ""),
-        "id_usuario": usuario.get("id_usuario", "")
-    }), 200
+    return respuesta_condicional(etag, lambda: perfil)
@@ -4,9 +4,10 @@ Rutas relacionadas con la consulta de pantallas en prisma-led-back.
 Incluye el endpoint protegido para obtener todas las pantallas desde Google Sheets.
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from flask_jwt_extended import jwt_required
-from app.services.sheets_client import get_pantallas
+from app.services.sheets_client import instantanea_hojas
+from app.services.cache_http import respuesta_condicional
 
 pantallas_bp = Blueprint('pantallas_bp', __name__)
 
@@ -16,10 +17,10 @@ def obtener_pantallas():
     """
     Endpoint para obtener todas las pantallas.
 
-    Requiere autenticación JWT.
+    Requiere autenticación JWT. Soporta GET condicional (ETag / If-None-Match).
 
     Returns:
-        Response: JSON con la lista de pantallas y código HTTP 200.
+        Response: JSON con la lista de pantallas y código HTTP 200, o 304 si no hubo cambios.
     """
-    pantallas = get_pantallas()
-    return jsonify(pantallas), 200
+    hojas = instantanea_hojas("pantallas")
+    return respuesta_condicional(hojas.versiones[0], lambda: hojas.registros("pantallas"))
@@ -4,11 +4,17 @@ Rutas relacionadas con la gestión de prereservas en prisma-led-back.
 Este módulo expone endpoints para:
 - Crear, consultar, actualizar y eliminar prereservas y sus detalles.
 - Enviar correos de confirmación de prereserva.
+- Validar una selección sin escribir (todas las violaciones a la vez, con los datos en memoria).
+- Cotizar una selección o una prereserva guardada en el servidor (ver cotizador.py).
+- Apartar temporalmente pantallas mientras el cliente arma su prereserva (ver apartados.py).
+- Notificar a los suscriptores de /api/reservas/eventos cada cambio de ocupación (ver eventos.py).
 - Validar reglas de negocio y asegurar la integridad de los datos.
 
 Características clave:
 - Integración con Google Sheets para almacenamiento de prereservas y detalles.
-- Uso de locks para concurrencia segura en operaciones críticas.
+- Cada escritura de varias filas u hojas se confirma como una transacción atómica (un solo
+  batchUpdate con diario local, ver transacciones.py); los locks solo serializan las validaciones
+  y la asignación de UXID que deben ver el estado anterior a la escritura.
 - Validaciones estrictas de datos y reglas de negocio antes de modificar registros.
 - Envío de correos HTML personalizados con Flask-Mail.
 - Rate limiting y retry para proteger los endpoints y manejar límites de Google Sheets.
@@ -21,38 +27,82 @@ Futuro desarrollador:
 - El envío de correos puede ser extendido para notificaciones adicionales o integración con otros servicios.
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
-import pandas as pd
+from datetime import datetime, timezone
 import uuid
 from flask_mail import Message
 from app import mail
 import traceback
 from app.services.retry_utils import retry_on_rate_limit
-from app.services.validadores import validar_detalle_prereserva
+from app.services.validadores import (
+    validar_detalle_prereserva,
+    validar_pantallas_en_periodo,
+    violaciones_en_periodo,
+    HOJAS_OCUPACION
+)
+from app.services.contexto import contexto_peticion
+from app.services.apartados import registrar_apartado, liberar_apartado
+from app.services.eventos import huella_prereserva, notificar_prereserva
 from app.services.uxid import generate_next_uxid
+from app.services.modelos import (
+    normalizar_id,
+    semanas_entre,
+    fecha_a_ordinal,
+    tarifas_tipadas,
+    historial_prereservas,
+    prereservas_por_id,
+    detalles_prereserva_por_id
+)
+from app.services.historial import pide_paginacion, leer_filtros, paginar
+from app.services.cotizador import cotizar
+from app.services.correos import renderizar_confirmacion
+from app.services.transacciones import confirmar_transaccion, TransaccionInvalida
 from app.extensions import pre_reserva_lock
-from app.extensions import detalle_pre_reserva_lock
+from app.extensions import apartado_lock
+from app.extensions import limiter
 
 from app.services.sheets_client import (
-    connect_sheet,
     get_prereservas,
-    get_detalle_prereserva,
     get_tarifas,
     get_pantallas
 )
 
 prereservas_bp = Blueprint('prereservas_bp', __name__)
 
+# IDs de prereservas cuyo correo de confirmación se está enviando (protegido por pre_reserva_lock)
+_correos_en_envio = set()
+
 def generar_id_appsheet():
     """
     Genera un identificador único de 8 caracteres hexadecimales para AppSheet.
     """
     return uuid.uuid4().hex[:8]
 
-def obtener_tarifa(segundos, tarifas):
-    return tarifas.get(segundos, 0)
+def cotizar_prereserva(id_prereserva, id_cliente=None):
+    """
+    Cotiza una prereserva guardada con sus fechas y tarifas almacenadas (no con montos del cliente).
+
+    Args:
+        id_prereserva (str): ID de la prereserva.
+        id_cliente (str): Si se indica, la prereserva debe pertenecer a este cliente.
+
+    Returns:
+        dict or None: Resultado de cotizar, o None si la prereserva no existe, no es del cliente o no tiene detalle.
+
+    Raises:
+        ValueError: Si las fechas o las tarifas guardadas no son válidas.
+    """
+    encontrada = prereservas_por_id().get(str(id_prereserva))
+    detalles = detalles_prereserva_por_id().get(str(id_prereserva), [])
+    if not encontrada or not detalles or (id_cliente is not None and encontrada[0].id_cliente != id_cliente):
+        return None
+    registro = encontrada[1]
+    return cotizar(
+        registro["fecha_inicio"],
+        semanas_entre(registro["fecha_inicio"], registro["fecha_fin"]),
+        [{"id_pantalla": d.id_pantalla, "cod_tarifas": d.codigo_tarifa} for d in detalles]
+    )
 
 
 @prereservas_bp.route('/cliente', methods=['GET', 'OPTIONS'])
@@ -61,20 +111,28 @@ def obtener_reservas_del_cliente():
     """
     Obtiene todas las prereservas del cliente autenticado.
 
+    Query params (opcionales, activan la respuesta paginada; ver historial.py):
+        limite (int), cursor (str), desde (YYYY-MM-DD), hasta (YYYY-MM-DD), estado (str)
+
     Returns:
-        200: Lista de prereservas del cliente.
+        200: Lista de prereservas del cliente, o { "items": [...], "siguiente_cursor": str | null }
+             si se pide paginación.
+        400: Si los parámetros de paginación no son válidos.
     """
     if request.method == 'OPTIONS':
         return '', 200
 
     id_cliente = get_jwt_identity()
-    reservas = get_prereservas()
+    if pide_paginacion(request.args):
+        try:
+            filtros = leer_filtros(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        pagina, siguiente = paginar(historial_prereservas(id_cliente, filtros["desde"]), filtros)
+        return jsonify({"items": [registro for _, registro in pagina], "siguiente_cursor": siguiente}), 200
 
-    reservas_cliente = [
-        r for r in reservas
-        if r.get("id_cliente", "").strip() == id_cliente
-    ]
-    return jsonify(reservas_cliente), 200
+    # Incluye las prereservas archivadas por el mantenimiento (vencidas o terminadas)
+    return jsonify([registro for _, registro in historial_prereservas(id_cliente)]), 200
 
 @prereservas_bp.route('/detalle/<id_reserva>', methods=['GET'])
 @jwt_required()
@@ -91,47 +149,39 @@ def obtener_detalle_reserva(id_reserva):
     """
     identidad = get_jwt_identity()
 
-    reservas = get_prereservas()
-    detalles = get_detalle_prereserva()
-    pantallas = get_pantallas()
-    tarifas = get_tarifas()
-
-    pantallas_dict = {p["id_pantalla"]: p for p in pantallas}
-    tarifas_dict = {t["codigo_tarifa"]: t for t in tarifas}
-
-    reserva = next(
-        (r for r in reservas if r["id_prereserva"] == id_reserva and r["id_cliente"] == identidad),
-        None
-    )
-    if not reserva:
+    # Búsqueda directa por ID en los índices de la caché (no se recorren las hojas completas)
+    encontrada = prereservas_por_id().get(id_reserva)
+    if not encontrada or encontrada[1]["id_cliente"] != identidad:
         return jsonify({"error": "Pre-reserva no encontrada o no autorizada"}), 404
+    reserva = encontrada[1]
+    detalles = detalles_prereserva_por_id().get(id_reserva, [])
+
+    pantallas_dict = {normalizar_id(p["id_pantalla"]): p for p in get_pantallas()}
+    tarifas_dict = {t["codigo_tarifa"]: t for t in get_tarifas()}
 
     pantallas_resultado = []
     for d in detalles:
-        if d["id_prereserva"] == id_reserva:
-            id_pantalla = d["id_pantalla"]
-            pantalla = pantallas_dict.get(id_pantalla, {})
-            tarifa = tarifas_dict.get(d["codigo_tarifa"], {})
+        pantalla = pantallas_dict.get(d.id_pantalla, {})
+        tarifa = tarifas_dict.get(d.codigo_tarifa, {})
 
-            segundos = int(tarifa.get("duracion_seg", 0))
-            precio = int(tarifa.get("precio_semana", 0)) * 1
-            
-            pantallas_resultado.append({
-                "id": id_pantalla,
-                "cilindro": pantalla.get("cilindro"),
-                "identificador": pantalla.get("identificador"),
-                "segundos": segundos,
-                "precio": precio
-            })
+        segundos = int(tarifa.get("duracion_seg", 0))
+        precio = int(tarifa.get("precio_semana", 0)) * 1
+
+        pantallas_resultado.append({
+            "id": d.id_pantalla,
+            "cilindro": pantalla.get("cilindro"),
+            "identificador": pantalla.get("identificador"),
+            "segundos": segundos,
+            "precio": precio
+        })
 
     return jsonify({
         "id_reserva": reserva["id_prereserva"],
         "fecha_creacion": reserva["fecha_creacion"],
         "fecha_inicio": reserva["fecha_inicio"],
-        "duracion": (
-            (pd.to_datetime(reserva["fecha_fin"]) - pd.to_datetime(reserva["fecha_inicio"])).days // 7
-        ),
-        "categoria": detalles[0]["categoria"] if detalles else "",
+        "duracion": semanas_entre(reserva["fecha_inicio"], reserva["fecha_fin"]),
+        # Categoría de un detalle de esta prereserva (antes se tomaba el primer detalle de toda la hoja)
+        "categoria": detalles[0].categoria if detalles else "",
         "pantallas": pantallas_resultado,
         "uxid": reserva.get("uxid", None)
     }), 200
@@ -142,9 +192,12 @@ def enviar_correo_prereserva():
     """
     Envía el correo de confirmación de prereserva al cliente.
 
-    - Construye el cuerpo HTML con los detalles de la prereserva.
+    - Renderiza la plantilla compilada de confirmación (ver correos.py) fuera del lock.
+    - Los montos se cotizan en el servidor con la prereserva guardada (fechas y tarifas); si aún no
+      está guardada, con fecha_inicio, duracion y los segundos de cada pantalla del JSON.
+      Subtotal, IVA y total enviados por el cliente se ignoran.
     - Actualiza el estado 'correo_enviado' en la hoja de prereservas.
-    - Protege contra reenvío duplicado.
+    - Protege contra reenvío duplicado, también mientras otro envío de la misma prereserva está en curso.
 
     Returns:
         200: Mensaje de éxito.
@@ -152,153 +205,79 @@ def enviar_correo_prereserva():
         400: Si faltan datos.
         500: Si ocurre un error al enviar el correo.
     """
+    data = request.get_json()
+    id_prereserva = str(data.get('id_prereserva'))
+    correo = data.get('correo')
+    pantallas = data.get('pantallas')
+
+    # Bajo el lock solo se verifica y se marca el envío; el cotizado, el renderizado y el
+    # envío (SMTP) se hacen fuera para no bloquear las demás escrituras de prereservas
     with pre_reserva_lock:
         try:
-            data = request.get_json()
-            prereservas = get_prereservas()
-            id_prereserva = data.get('id_prereserva')
-            prereserva = next((p for p in prereservas if p["id_prereserva"] == str(id_prereserva)), None)
-            if prereserva and prereserva.get("correo_enviado", "").strip().lower() == "sí":
-                return jsonify({"error": "El correo ya fue enviado para esta pre-reserva"}), 409
-            
-            correo = data.get('correo')
-            razon_social = data.get('razon_social')
-            nit = data.get('nit')
-            fecha_inicio = data.get('fecha_inicio')
-            fecha_fin = data.get('fecha_fin')
-            categoria = data.get('categoria')
-            uxid = data.get('uxid')
-            pantallas = data.get('pantallas')
-            subtotal = data.get('subtotal')
-            iva = data.get('iva')
-            total = data.get('total')
-            duracion = data.get('duracion')
-            resumen = data.get('resumen')
-            tarifas = get_tarifas()
-            tarifas = {t['duracion_seg']: t['precio_semana'] for t in tarifas}
-            precio_dic = 2000000
-            semanasFueraDic = resumen.get('semanasFueraDic', 0)
-            semanasDic = resumen.get('semanasDic', 0)
-            semanas = duracion
-            
+            prereservas = get_prereservas(fresco=True)
+        except Exception as e:
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+        prereserva = next((p for p in prereservas if p["id_prereserva"] == id_prereserva), None)
+        if (prereserva and prereserva.get("correo_enviado", "").strip().lower() == "sí") or id_prereserva in _correos_en_envio:
+            return jsonify({"error": "El correo ya fue enviado para esta pre-reserva"}), 409
+        if not correo or not pantallas:
+            return jsonify({"error": "Datos incompletos"}), 400
+        _correos_en_envio.add(id_prereserva)
 
-            print(f"Enviando correo para la reserva PW-{uxid} a {correo}" )
-            if not correo or not pantallas:
-                return jsonify({"error": "Datos incompletos"}), 400
+    try:
+        uxid = data.get('uxid')
+        print(f"Enviando correo para la reserva PW-{uxid} a {correo}" )
 
-            # Construcción del HTML por pantalla
-            pantalla_html = []
-            ahorroTotal = 0
-            for p in pantallas:
-                base = int(p['base'])
-                precio = int(p['precio'])
-                segundos = p.get('segundos', 0)
-                cupos = segundos// 20  # Cada cupo es de 20 segundos
-                #tengo los segundos de cada pantalla y tengo el diccionario de tarifas, ahora vamos a obtener la tarifa
-                tarifa = obtener_tarifa(segundos, tarifas)
-                subtotal_pantalla = (semanasFueraDic * tarifa) + (semanasDic * precio_dic)
-                descuento = p.get('descuento', 0)
-                ahorro = (semanasFueraDic * tarifa) * descuento
-                pdescuento = ahorro/subtotal_pantalla
-                ahorroTotal += ahorro
-                
-
-                linea = f"""
-                <li style="margin-bottom: 12px;">
-                    <strong>Pantalla {p['cilindro']}{p['identificador']}</strong> - {semanas} semana{'s' if semanas > 1 else ''} - cupos {cupos}<br/>
-                    Valor por semana normal: ${tarifa:,.0f}<br/>
-                    Valor por semana de diciembre: ${precio_dic:,.0f}<br/>
-                    <strong>Subtotal sin descuento:</strong> ${subtotal_pantalla:,.0f}<br/>
-                """
-
-                if descuento > 0:
-                    linea += f"""
-                    <div style='color:#dc2626; font-size:13px;'>
-                        Descuento aplicado:${ahorro:,.0f} (-{pdescuento * 100:.0f}%)<br/>
-                    </div>
-                    <strong>Total con descuento:</strong> ${precio:,.0f}<br/>
-                    """
-                linea += "</li>"
-                pantalla_html.append(linea)
-
-            pantallas_html = "<ul>" + "".join(pantalla_html) + "</ul>"
-
-            # Cuerpo del mensaje HTML
-            cuerpo_html = f"""
-                <div style="font-family:Arial, sans-serif; color:#333; font-size:15px; line-height:1.6;">
-                    <p>Buenas tardes,</p>
-
-                    <p>Le agradecemos por confiar en nosotros para que su marca llegue al corazón de Cali, el <strong>Bulevar del Río</strong>.</p>
-
-                    <p>A continuación encontrará los detalles de su <strong style="color:#3B82F6;">reserva PW-{uxid}</strong>:</p>
-                    
-                    <hr style="border:none; border-top:1px solid #ddd; margin:20px 0;" />
-
-                    <p>
-                        <strong>Razón Social:</strong> {razon_social}<br/>
-                        <strong>NIT:</strong> {nit}<br/>
-                        <strong>Correo:</strong> <a href="mailto:{correo}" style="color:#3B82F6;">{correo}</a><br/>
-                    </p>
-                    <hr style="border:none; border-top:1px solid #ddd; margin:20px 0;" />
-                    <p>
-                        <strong>Fecha:</strong> {fecha_inicio} - {fecha_fin}<br/>
-                        <strong>Categoría:</strong> {categoria}
-                    </p>
-
-                    {pantallas_html}
-                    <hr style="border:none; border-top:1px solid #ddd; margin:20px 0;" />
-                    <p style="margin-top: 20px;">
-                        <strong>Subtotal base:</strong> ${subtotal + ahorroTotal:,.0f}
-                        <div style='color:#dc2626; font-size:13px;'>
-                        Descuento aplicado:$ {ahorroTotal:,.0f}<br/>
-                        </div>
-                        <strong>Subtotal con descuento:</strong> ${subtotal:,.0f}<br/>
-                        <strong>IVA (19%):</strong> ${iva:,.0f}<br/>
-                        <strong style="font-size: 16px;">Total:</strong> <span style="font-size: 16px; font-weight: bold;">${total:,.0f}</span>
-                    </p>
-
-                    <hr style="border:none; border-top:1px solid #ddd; margin:20px 0;" />
-
-                    <p style="font-size:14px;"><strong>Información adicional:</strong></p>
-                    <p style="font-size:14px;">
-                        Su reserva se encuentra en estado <strong style="color:#dc2626;">pendiente</strong>.
-                        Recuerde que tiene <strong>5 días</strong> para compartir el video de la campaña. Si este aún está en producción, puede compartir una imagen de referencia.
-                    </p>
-
-                    <p style="font-size:14px;">
-                        Posteriormente, el equipo técnico de <strong>Prisma Wall</strong> evaluará si el video cumple con las normativas de exposición al público de todas las edades y usted será notificado por este mismo medio.
-                    </p>
-                    <p style="font-size:14px;">
-                        Muchas gracias por elegirnos.<br/>
-                        Atentamente,<br/>
-                        Andres Lozano<br/>
-                        Gerente Comercial - Prisma Wall<br/>
-                        +573007053297
-                    </p>
-                </div>
-                """
-
-
-            # Envío del correo
-            msg = Message(
-                subject=f" Confirmación de reserva PW-{uxid} - Prisma Wall",
-                recipients=[correo],
-                html=cuerpo_html
-            )
-            mail.send(msg)
-            sheet = connect_sheet()
-            ws = sheet.worksheet("prereservas")
+        # Los montos se calculan en el servidor (ver cotizador.py); los del cliente se ignoran
+        try:
+            cotizacion = cotizar_prereserva(id_prereserva, get_jwt_identity())
+            if cotizacion is None:
+                cotizacion = cotizar(data.get('fecha_inicio'), int(data.get('duracion') or 0), [
+                    {
+                        "id_pantalla": p.get("id_pantalla", p.get("id")),
+                        "segundos": p.get("segundos"),
+                        "cilindro": p.get("cilindro"),
+                        "identificador": p.get("identificador")
+                    }
+                    for p in pantallas
+                ])
+        except (ValueError, TypeError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        mensaje = renderizar_confirmacion({
+            "correo": correo,
+            "razon_social": data.get('razon_social'),
+            "nit": data.get('nit'),
+            "fecha_inicio": data.get('fecha_inicio'),
+            "fecha_fin": data.get('fecha_fin'),
+            "categoria": data.get('categoria'),
+            "uxid": uxid
+        }, cotizacion)
+
+        # Envío del correo
+        msg = Message(
+            subject=mensaje["asunto"],
+            recipients=[correo],
+            html=mensaje["html"]
+        )
+        mail.send(msg)
 
-            # Buscar fila a actualizar
-            fila = next((i for i, p in enumerate(prereservas) if p["id_prereserva"] == str(id_prereserva)), None)
-            if fila is not None:
-                col_idx = list(prereservas[0].keys()).index("correo_enviado") + 1
-                ws.update_cell(fila + 2, col_idx, "sí")
-            return jsonify({"mensaje": "Correo enviado correctamente"}), 200
+        # La fila se ubica por su ID al confirmar: pudo moverse mientras se enviaba el correo
+        try:
+            confirmar_transaccion([
+                {"tipo": "actualizar", "hoja": "prereservas", "clave": id_prereserva, "valores": {"correo_enviado": "sí"}}
+            ])
+        except TransaccionInvalida:
+            print(f"La prereserva {id_prereserva} se eliminó mientras se enviaba su correo")
+        return jsonify({"mensaje": "Correo enviado correctamente"}), 200
 
-        except Exception as e:
-            traceback.print_exc()
-            return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
+    finally:
+        with pre_reserva_lock:
+            _correos_en_envio.discard(id_prereserva)
 
 @prereservas_bp.route('/<id_prereserva>', methods=['DELETE'])
 @jwt_required()
@@ -314,36 +293,26 @@ def eliminar_prereserva(id_prereserva):
         200: Mensaje de éxito.
         404: Si la prereserva no existe o no pertenece al usuario.
     """
-    with pre_reserva_lock:
-        identidad = get_jwt_identity()
-
-        sheet = connect_sheet()
-        ws_prereservas = sheet.worksheet("prereservas")
-        ws_detalle = sheet.worksheet("detalle_prereserva")
-
-        # Cargar datos
-        prereservas = ws_prereservas.get_all_records()
-        detalles = ws_detalle.get_all_records()
-
-        # Buscar fila de la prereserva
-        prereserva_idx = next(
-            (i for i, r in enumerate(prereservas)
-            if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
-            None
-        )
-        if prereserva_idx is None:
-            return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
-
-        # Borrar fila en prereservas
-        ws_prereservas.delete_rows(prereserva_idx + 2)
-
-        # Borrar filas en detalle_prereserva
-        filas_detalle = [i for i, d in enumerate(detalles) if d["id_prereserva"] == id_prereserva]
-        # Importante: borrar en orden inverso para que los índices no se muevan
-        for idx in sorted(filas_detalle, reverse=True):
-            ws_detalle.delete_rows(idx + 2)
+    identidad = get_jwt_identity()
 
-        return jsonify({"msg": "Prereserva eliminada"}), 200
+    # Buscar la prereserva del usuario
+    datos = contexto_peticion()
+    prereserva = next(
+        (r for r in datos.registros("prereservas")
+        if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
+        None
+    )
+    if prereserva is None:
+        return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+    anteriores = huella_prereserva(id_prereserva)
+
+    # La prereserva y su detalle se borran en una sola transacción (filas ubicadas por ID)
+    confirmar_transaccion([
+        {"tipo": "borrar", "hoja": "prereservas", "columna": "id_prereserva", "valores": [id_prereserva]},
+        {"tipo": "borrar", "hoja": "detalle_prereserva", "columna": "id_prereserva", "valores": [id_prereserva]}
+    ], datos=datos)
+    notificar_prereserva(id_prereserva, anteriores)
+    return jsonify({"msg": "Prereserva eliminada"}), 200
 
 @prereservas_bp.route('/<id_prereserva>', methods=['PUT'])
 @jwt_required()
@@ -360,41 +329,38 @@ def actualizar_prereserva(id_prereserva):
         404: Si la prereserva no existe o no pertenece al usuario.
         400: Si faltan datos.
     """
-    with pre_reserva_lock:
-        identidad = get_jwt_identity()
-        data = request.get_json()
-        fecha_inicio = data.get("fecha_inicio")
-        fecha_fin = data.get("fecha_fin")
-
-        if not fecha_inicio or not fecha_fin:
-            return jsonify({"error": "Datos incompletos"}), 400
-        
-        sheet = connect_sheet()
-        ws = sheet.worksheet("prereservas")
-        prereservas = ws.get_all_records()
-
-        # Buscar fila de la prereserva
-        idx = next(
-            (i for i, r in enumerate(prereservas)
-            if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
-            None
-        )
-        if idx is None:
-            return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
-
-        fila_nueva = [
-            prereservas[idx]["id_prereserva"],
-            prereservas[idx]["id_cliente"],
-            fecha_inicio,
-            fecha_fin,
-            "pendiente",
-            prereservas[idx]["fecha_creacion"]
-        ]
-
-        # Actualizar fila en Sheets (idx + 2 porque hay cabecera y enumeración inicia en 0)
-        ws.update(f"A{idx+2}:F{idx+2}", [fila_nueva])
-
-        return jsonify({"mensaje": "Prereserva actualizada"}), 200
+    identidad = get_jwt_identity()
+    data = request.get_json()
+    fecha_inicio = data.get("fecha_inicio")
+    fecha_fin = data.get("fecha_fin")
+
+    if not fecha_inicio or not fecha_fin:
+        return jsonify({"error": "Datos incompletos"}), 400
+
+    # Buscar la prereserva del usuario
+    datos = contexto_peticion()
+    prereserva = next(
+        (r for r in datos.registros("prereservas")
+        if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
+        None
+    )
+    if prereserva is None:
+        return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+    anteriores = huella_prereserva(id_prereserva)
+
+    try:
+        confirmar_transaccion([{
+            "tipo": "actualizar",
+            "hoja": "prereservas",
+            "clave": id_prereserva,
+            "valores": {"fecha_inicio": fecha_inicio, "fecha_fin": fecha_fin, "estado": "pendiente"}
+        }], datos=datos)
+    except TransaccionInvalida:
+        # Se eliminó entre la lectura y la escritura
+        return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+    notificar_prereserva(id_prereserva, anteriores)
+
+    return jsonify({"mensaje": "Prereserva actualizada"}), 200
 
 @prereservas_bp.route('/detalle_prereserva/<id_prereserva>', methods=['PUT'])
 @jwt_required()
@@ -412,7 +378,7 @@ def actualizar_detalle_prereserva(id_prereserva):
         400: Si faltan datos o fechas inválidas.
         409: Si la validación de detalle falla.
     """
-    with detalle_pre_reserva_lock:
+    with pre_reserva_lock:
         identidad = get_jwt_identity()
         data = request.get_json()
         categoria = data.get("categoria")
@@ -425,31 +391,24 @@ def actualizar_detalle_prereserva(id_prereserva):
         if not categoria or not pantallas:
             return jsonify({"error": "Datos incompletos"}), 400
 
-        es_valido, error_msg = validar_detalle_prereserva(id_prereserva, pantallas, categoria, get_jwt_identity())
+        # Las hojas de ocupación se leen una sola vez y se comparten con el validador
+        datos = contexto_peticion()
+        datos.cargar(*HOJAS_OCUPACION)
+
+        es_valido, error_msg = validar_detalle_prereserva(id_prereserva, pantallas, categoria, identidad, datos)
         if not es_valido:
             return jsonify({"error": error_msg}), 409
-        
-        sheet = connect_sheet()
-        ws_prereservas = sheet.worksheet("prereservas")
-        ws_detalle = sheet.worksheet("detalle_prereserva")
-
-        prereservas = ws_prereservas.get_all_records()
-        detalles = ws_detalle.get_all_records()
 
         # Validar que la prereserva exista y pertenezca al usuario
         prereserva = next(
-            (r for r in prereservas if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
+            (r for r in datos.registros("prereservas") if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
             None
         )
         if not prereserva:
             return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+        anteriores = huella_prereserva(id_prereserva)
 
-        # Borrar filas existentes en detalle_prereserva
-        filas_detalle = [i for i, d in enumerate(detalles) if d["id_prereserva"] == id_prereserva]
-        for idx in sorted(filas_detalle, reverse=True):
-            ws_detalle.delete_rows(idx + 2)
-
-        # Insertar nuevas filas
+        # Nuevas filas de detalle
         nuevas_filas = []
         for p in pantallas:
             fila = [
@@ -461,10 +420,176 @@ def actualizar_detalle_prereserva(id_prereserva):
             ]
             nuevas_filas.append(fila)
 
-        ws_detalle.append_rows(nuevas_filas)
+        # Las filas anteriores se reemplazan en una sola transacción
+        confirmar_transaccion([
+            {"tipo": "borrar", "hoja": "detalle_prereserva", "columna": "id_prereserva", "valores": [id_prereserva]},
+            {"tipo": "agregar", "hoja": "detalle_prereserva", "filas": nuevas_filas}
+        ], datos=datos)
+        notificar_prereserva(id_prereserva, anteriores)
 
         return jsonify({"mensaje": "Detalle prereserva actualizado", "registros": len(nuevas_filas)}), 200
 
+@prereservas_bp.route('/validar', methods=['POST'])
+@jwt_required()
+@limiter.limit("120 per minute")
+def validar_seleccion():
+    """
+    Valida una selección de pantallas sin escribir nada (dry-run), con las mismas reglas que
+    crear-completo/actualizar-completo, y retorna todas las violaciones en lugar de solo la primera.
+
+    Usa la caché en memoria de las hojas (y los apartados vigentes de otros clientes), así que puede
+    llamarse en cada clic de la interfaz sin consultar Google Sheets.
+
+    Request:
+        JSON: {
+            "fecha_inicio": "YYYY-MM-DD",
+            "fecha_fin": "YYYY-MM-DD",
+            "categoria": str,
+            "pantallas": [ { "id_pantalla": ..., "cod_tarifas": str }, ... ],
+            "id_prereserva": str (opcional, prereserva propia que se está editando)
+        }
+
+    Returns:
+        200: { "valido": bool, "violaciones": [ { "tipo", "mensaje", ... }, ... ] }
+        400: Si faltan datos requeridos o las fechas no son válidas.
+    """
+    data = request.get_json() or {}
+    fecha_inicio = data.get("fecha_inicio")
+    fecha_fin = data.get("fecha_fin")
+    categoria = data.get("categoria")
+    pantallas = data.get("pantallas", [])
+
+    if not (fecha_inicio and fecha_fin and categoria and pantallas):
+        return jsonify({"error": "Faltan datos requeridos"}), 400
+    if any("id_pantalla" not in p or "cod_tarifas" not in p for p in pantallas):
+        return jsonify({"error": "Cada pantalla debe tener id_pantalla y cod_tarifas"}), 400
+
+    inicio, fin = fecha_a_ordinal(fecha_inicio), fecha_a_ordinal(fecha_fin)
+    if inicio is None or fin is None or inicio > fin:
+        return jsonify({"error": "Fechas inválidas"}), 400
+
+    violaciones = violaciones_en_periodo(
+        inicio, fin, pantallas, categoria, get_jwt_identity(), data.get("id_prereserva")
+    )
+    return jsonify({"valido": not violaciones, "violaciones": violaciones}), 200
+
+
+@prereservas_bp.route('/cotizar', methods=['POST'])
+@jwt_required()
+@limiter.limit("120 per minute")
+def cotizar_seleccion():
+    """
+    Cotiza una selección de pantallas, o una prereserva guardada del cliente, con las reglas de
+    precio del servidor (tarifas, semanas de temporada, descuento por duración e IVA).
+
+    Request:
+        JSON: {
+            "fecha_inicio": "YYYY-MM-DD",
+            "duracion_semanas": int,
+            "pantallas": [ { "id_pantalla": ..., "cod_tarifas": str } o { "id_pantalla": ..., "segundos": int }, ... ]
+        }
+        o bien JSON: { "id_prereserva": str }
+
+    Returns:
+        200: Cotización (ver cotizar en cotizador.py).
+        400: Si faltan datos o una tarifa no existe.
+        404: Si la prereserva no existe o no pertenece al cliente.
+    """
+    data = request.get_json() or {}
+    try:
+        if data.get("id_prereserva"):
+            cotizacion = cotizar_prereserva(data["id_prereserva"], get_jwt_identity())
+            if cotizacion is None:
+                return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+            return jsonify(cotizacion), 200
+
+        pantallas = data.get("pantallas", [])
+        if not (data.get("fecha_inicio") and data.get("duracion_semanas") and pantallas):
+            return jsonify({"error": "Faltan datos requeridos"}), 400
+        return jsonify(cotizar(data["fecha_inicio"], int(data["duracion_semanas"]), pantallas)), 200
+    except (ValueError, TypeError) as e:
+        return jsonify({"error": str(e)}), 400
+
+@prereservas_bp.route('/apartados', methods=['POST'])
+@jwt_required()
+def crear_apartado():
+    """
+    Aparta temporalmente los segundos de las pantallas seleccionadas para el cliente autenticado.
+
+    Mientras el apartado está vigente, la disponibilidad y la validación de los demás clientes
+    lo cuentan como ocupado. Un nuevo apartado del mismo cliente reemplaza el anterior.
+
+    Request:
+        JSON: {
+            "fecha_inicio": "YYYY-MM-DD",
+            "fecha_fin": "YYYY-MM-DD",
+            "categoria": str,
+            "pantallas": [ { "id_pantalla": ..., "cod_tarifas": str }, ... ],
+            "id_prereserva": str (opcional, prereserva propia que se está editando)
+        }
+
+    Returns:
+        201: { "id_apartado": str, "vence_en": ISO-8601, "segundos_vigencia": int }
+        400: Si faltan datos requeridos, alguna pantalla no trae id_pantalla y cod_tarifas, o las
+             fechas no son válidas.
+        409: Si las pantallas ya no están disponibles.
+    """
+    data = request.get_json() or {}
+    identidad = get_jwt_identity()
+
+    fecha_inicio = data.get("fecha_inicio")
+    fecha_fin = data.get("fecha_fin")
+    categoria = data.get("categoria")
+    pantallas = data.get("pantallas", [])
+
+    if not (fecha_inicio and fecha_fin and categoria and pantallas):
+        return jsonify({"error": "Faltan datos requeridos"}), 400
+    if not isinstance(pantallas, list) or any(
+        not isinstance(p, dict) or "id_pantalla" not in p or "cod_tarifas" not in p for p in pantallas
+    ):
+        return jsonify({"error": "Cada pantalla debe tener id_pantalla y cod_tarifas"}), 400
+
+    inicio, fin = fecha_a_ordinal(fecha_inicio), fecha_a_ordinal(fecha_fin)
+    if inicio is None or fin is None or inicio > fin:
+        return jsonify({"error": "Fechas inválidas"}), 400
+
+    ttl = current_app.config["APARTADO_TTL_SEGUNDOS"]
+    duraciones = {codigo: t.duracion_seg for codigo, t in tarifas_tipadas().items()}
+
+    # Las hojas de ocupación se leen frescas (una sola llamada): la caché puede no tener aún los
+    # segundos que otro worker acaba de confirmar
+    datos = contexto_peticion()
+    datos.cargar(*HOJAS_OCUPACION)
+
+    # La validación y el registro van juntos para que dos clientes no aparten los mismos segundos
+    with apartado_lock:
+        es_valido, error_msg = validar_pantallas_en_periodo(
+            inicio, fin, pantallas, categoria, identidad, data.get("id_prereserva"), datos
+        )
+        if not es_valido:
+            return jsonify({"error": error_msg}), 409
+        apartado = registrar_apartado(identidad, fecha_inicio, fecha_fin, categoria, pantallas, duraciones, ttl)
+
+    return jsonify({
+        "id_apartado": apartado.id_apartado,
+        "vence_en": datetime.fromtimestamp(apartado.vence_en, timezone.utc).isoformat(),
+        "segundos_vigencia": ttl
+    }), 201
+
+@prereservas_bp.route('/apartados/<id_apartado>', methods=['DELETE'])
+@jwt_required()
+def eliminar_apartado(id_apartado):
+    """
+    Libera un apartado del cliente autenticado (por ejemplo, al vaciar la selección).
+
+    Returns:
+        200: Mensaje de éxito.
+        404: Si el apartado no existe, ya venció o no pertenece al usuario.
+    """
+    if not liberar_apartado(id_apartado, get_jwt_identity()):
+        return jsonify({"error": "Apartado no encontrado o vencido"}), 404
+    return jsonify({"mensaje": "Apartado liberado"}), 200
+
 @prereservas_bp.route('/crear-completo', methods=['POST'])
 @jwt_required()
 def crear_prereserva_completa():
@@ -474,7 +599,10 @@ def crear_prereserva_completa():
     Returns:
         201: Mensaje de éxito y el ID de la prereserva creada.
         400: Si faltan datos requeridos.
-        500: Si ocurre un error y se realiza rollback.
+        500: Si ocurre un error (no queda ninguna fila escrita).
+
+    Si el JSON trae "id_apartado", el apartado del cliente se consume al crear la prereserva.
+    La respuesta incluye "cotizacion" con los montos calculados en el servidor (ver cotizador.py).
     """
     with pre_reserva_lock:
         try:
@@ -493,11 +621,7 @@ def crear_prereserva_completa():
             uxid = generate_next_uxid("prereservas")
             fecha_creacion = datetime.now().strftime("%Y-%m-%d")
 
-            sheet = connect_sheet()
-            ws_prereservas = sheet.worksheet("prereservas")
-            ws_detalle = sheet.worksheet("detalle_prereserva")
-
-            # 2. Escribir detalle primero
+            # Detalle y prereserva se agregan en una sola transacción
             nuevas_filas = []
             nextid= generate_next_uxid("detalle_prereserva") 
             for p in pantallas:
@@ -511,39 +635,39 @@ def crear_prereserva_completa():
                 ]
                 nextid += 1
                 nuevas_filas.append(fila)
-            ws_detalle.append_rows(nuevas_filas)
 
-            # 3. Escribir prereserva
-            ws_prereservas.append_row([
-                id_prereserva,
-                id_cliente,
-                fecha_inicio,
-                fecha_fin,
-                "pendiente",
-                fecha_creacion,
-                "no",  # correo_enviado
-                uxid
+            confirmar_transaccion([
+                {"tipo": "agregar", "hoja": "detalle_prereserva", "filas": nuevas_filas},
+                {"tipo": "agregar", "hoja": "prereservas", "filas": [[
+                    id_prereserva,
+                    id_cliente,
+                    fecha_inicio,
+                    fecha_fin,
+                    "pendiente",
+                    fecha_creacion,
+                    "no",  # correo_enviado
+                    uxid
+                ]]}
             ])
+            # La prereserva ya ocupa los segundos: se consume el apartado
+            if data.get("id_apartado"):
+                liberar_apartado(data["id_apartado"], id_cliente)
+            notificar_prereserva(id_prereserva)
+            try:
+                cotizacion = cotizar(fecha_inicio, semanas_entre(fecha_inicio, fecha_fin), pantallas)
+            except ValueError:
+                cotizacion = None
 
             return jsonify({
                 "msg": "Prereserva creada con éxito",
                 "id_prereserva": id_prereserva,
-                "uxid": uxid
+                "uxid": uxid,
+                "cotizacion": cotizacion
             }), 201
 
         except Exception as e:
+            # La transacción se aplica completa o no se aplica: no hay filas sueltas que deshacer
             traceback.print_exc()
-            # Rollback si algo falla
-            try:
-                sheet = connect_sheet()
-                ws_prereservas = sheet.worksheet("prereservas")
-                prereservas = ws_prereservas.get_all_records()
-                fila = next((i for i, r in enumerate(prereservas) if r["id_prereserva"] == id_prereserva), None)
-                if fila is not None:
-                    ws_prereservas.delete_rows(fila + 2)
-            except:
-                pass
-
             return jsonify({"error": f"Error al crear prereserva completa: {str(e)}"}), 500
 
 @prereservas_bp.route('/actualizar-completo/<id_prereserva>', methods=['PUT'])
@@ -562,7 +686,7 @@ def actualizar_prereserva_completa(id_prereserva):
         409: Si la validación de detalle falla.
         500: Si ocurre un error inesperado.
     """
-    with pre_reserva_lock, detalle_pre_reserva_lock:
+    with pre_reserva_lock:
         try:
             identidad = get_jwt_identity()
             data = request.get_json()
@@ -576,12 +700,12 @@ def actualizar_prereserva_completa(id_prereserva):
             if not (fecha_inicio and fecha_fin and categoria and pantallas):
                 return jsonify({"error": "Faltan datos requeridos"}), 400
 
-            sheet = connect_sheet()
-            ws_prereservas = sheet.worksheet("prereservas")
-            ws_detalle = sheet.worksheet("detalle_prereserva")
+            # Las hojas de ocupación se leen una sola vez y se comparten con el validador
+            datos = contexto_peticion()
+            datos.cargar(*HOJAS_OCUPACION)
 
             # Verifica que la prereserva exista y sea del usuario autenticado
-            prereservas = ws_prereservas.get_all_records()
+            prereservas = datos.registros("prereservas")
             idx = next(
                 (i for i, r in enumerate(prereservas)
                  if r["id_prereserva"] == id_prereserva and r["id_cliente"] == identidad),
@@ -589,36 +713,18 @@ def actualizar_prereserva_completa(id_prereserva):
             )
             if idx is None:
                 return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
+            anteriores = huella_prereserva(id_prereserva)
 
             # Validar las pantallas con el validador si es necesario
-            from app.services.validadores import validar_detalle_prereserva
-            es_valido, error_msg = validar_detalle_prereserva(id_prereserva, pantallas, categoria, identidad)
+            es_valido, error_msg = validar_detalle_prereserva(id_prereserva, pantallas, categoria, identidad, datos)
             if not es_valido:
                 return jsonify({"error": error_msg}), 409
 
-            # 1. Actualizar prereserva
+            # La prereserva y su detalle se reemplazan en una sola transacción
             fila_actual = prereservas[idx]
-            fila_nueva = [
-                id_prereserva,
-                identidad,
-                fecha_inicio,
-                fecha_fin,
-                "pendiente",
-                fila_actual.get("fecha_creacion", datetime.now().strftime("%Y-%m-%d")),
-                "no",
-                uxid
-            ]
-            ws_prereservas.update(f"A{idx+2}:H{idx+2}", [fila_nueva])
-
-            # 2. Eliminar filas anteriores de detalle
-            detalles = ws_detalle.get_all_records()
-            filas_detalle = [i for i, d in enumerate(detalles) if d["id_prereserva"] == id_prereserva]
-            for i in sorted(filas_detalle, reverse=True):
-                ws_detalle.delete_rows(i + 2)
-
-            # 3. Insertar nuevas filas
+            detalles = datos.registros("detalle_prereserva")
+            nextid = generate_next_uxid("detalle_prereserva", registros=detalles)
             nuevas_filas = []
-            nextid= generate_next_uxid("detalle_prereserva")
             for p in pantallas:
                 nuevas_filas.append([
                     uuid.uuid4().hex[:8],
@@ -629,7 +735,22 @@ def actualizar_prereserva_completa(id_prereserva):
                     nextid
                 ])
                 nextid += 1
-            ws_detalle.append_rows(nuevas_filas)
+            confirmar_transaccion([
+                {"tipo": "actualizar", "hoja": "prereservas", "clave": id_prereserva, "valores": {
+                    "id_cliente": identidad,
+                    "fecha_inicio": fecha_inicio,
+                    "fecha_fin": fecha_fin,
+                    "estado": "pendiente",
+                    "fecha_creacion": fila_actual.get("fecha_creacion", datetime.now().strftime("%Y-%m-%d")),
+                    "correo_enviado": "no",
+                    "uxid": uxid
+                }},
+                {"tipo": "borrar", "hoja": "detalle_prereserva", "columna": "id_prereserva", "valores": [id_prereserva]},
+                {"tipo": "agregar", "hoja": "detalle_prereserva", "filas": nuevas_filas}
+            ], datos=datos)
+            if data.get("id_apartado"):
+                liberar_apartado(data["id_apartado"], identidad)
+            notificar_prereserva(id_prereserva, anteriores)
 
             return jsonify({
                 "msg": "Prereserva actualizada con éxito",
@@ -637,6 +758,9 @@ def actualizar_prereserva_completa(id_prereserva):
                 "uxid": uxid
             }), 200
 
+        except TransaccionInvalida:
+            # Se eliminó mientras se validaba
+            return jsonify({"error": "Prereserva no encontrada o no autorizada"}), 404
         except Exception as e:
             traceback.print_exc()
             return jsonify({"error": f"Error al actualizar prereserva completa: {str(e)}"}), 500
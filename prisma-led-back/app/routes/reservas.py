@@ -2,121 +2,100 @@
 Rutas relacionadas con reservas y disponibilidad en prisma-led-back.
 
 Este módulo expone endpoints para:
-- Consultar la disponibilidad de pantallas para reservas y prereservas.
+- Consultar la disponibilidad de pantallas para reservas y prereservas, uno o varios escenarios a la vez.
+- Consultar el calendario de las próximas semanas de todas las pantallas en una sola respuesta.
+- Buscar las primeras fechas en las que cabe una campaña (pantallas, segundos y duración).
+- Proponer una asignación de pantallas y tarifas para una campaña de N cupos.
+- Recibir por Server-Sent Events los cambios de ocupación que causan las prereservas.
 - Obtener tarifas y detalles de pantallas.
-- Consultar reservas del cliente autenticado, incluyendo detalles completos.
+- Consultar reservas del cliente autenticado, incluyendo detalles completos, completas o por páginas
+  con filtros (ver app/services/historial.py).
 
 Características clave:
-- Lógica avanzada para calcular ocupación de pantallas por segundos y detectar conflictos de fechas y categorías.
+- Lógica avanzada para calcular ocupación de pantallas por segundos y detectar conflictos de fechas y
+  categorías (ver app/services/ocupacion.py).
 - Integración con Google Sheets para obtener y actualizar datos de pantallas, tarifas, reservas y prereservas.
 - Rate limiting para proteger los endpoints contra abuso.
 - Uso de JWT para autenticación y protección de rutas.
-- Funciones auxiliares para calcular ocupación, conflictos y lógica de negocio de disponibilidad.
 
 Futuro desarrollador:
 - Puedes agregar endpoints para crear, modificar o eliminar reservas desde aquí.
 - Si cambias la estructura de las hojas de Google Sheets, ajusta los mapeos y validaciones en las funciones auxiliares.
 - El manejo de estados de pantalla (disponible, parcial, reservado, ocupado, restringido) puede ser extendido para nuevas reglas de negocio.
-- El cálculo de ocupación y conflictos está desacoplado y puede ser reutilizado en otros módulos.
+- El cálculo de ocupación y conflictos vive en app/services/ocupacion.py y puede ser reutilizado en otros módulos.
 """
 
-from flask import Blueprint, jsonify, request
+import queue
+from flask import Blueprint, Response, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime, timedelta
-import pandas as pd
+from datetime import date, datetime, timedelta
 from app.extensions import limiter
 from app.services.sheets_client import (
     get_tarifas,
-    get_pantallas,
-    get_reservas,
-    get_prereservas,
-    get_detalle_reserva,
-    get_detalle_prereserva
+    get_pantallas
 )
+from app.services.modelos import (
+    normalizar_id,
+    semanas_entre,
+    tarifas_tipadas,
+    historial_reservas,
+    detalles_reserva_por_id,
+    detalles_reserva_archivados
+)
+from app.services.historial import pide_paginacion, leer_filtros, paginar
+from app.services.ocupacion import (
+    indice_ocupacion,
+    calcular_disponibilidad,
+    calendario_ocupacion,
+    buscar_primeras_fechas
+)
+from app.services.optimizador import optimizar_asignacion
+from app.services.cache_http import calcular_etag, respuesta_condicional
+from app.services.eventos import suscribir, cancelar_suscripcion, formatear_evento
 
 reservas_bp = Blueprint('reservas_bp', __name__)
 
+# Máximo de escenarios por consulta en /disponibilidad/lote
+MAX_ESCENARIOS_LOTE = 60
 
-def hay_cruce_de_fechas(f1_inicio, f1_fin, f2_inicio, f2_fin):
-    """
-    Determina si dos intervalos de fechas se cruzan.
+# Máximo de cupos por campaña en /optimizar
+MAX_CUPOS_OPTIMIZACION = 300
 
-    Args:
-        f1_inicio (str): Fecha de inicio del primer intervalo (YYYY-MM-DD).
-        f1_fin (str): Fecha de fin del primer intervalo (YYYY-MM-DD).
-        f2_inicio (str): Fecha de inicio del segundo intervalo (YYYY-MM-DD).
-        f2_fin (str): Fecha de fin del segundo intervalo (YYYY-MM-DD).
+# Segundos entre comentarios de keep-alive en /eventos (evita que proxies cierren la conexión)
+KEEPALIVE_EVENTOS = 15
 
-    Returns:
-        bool: True si los intervalos se cruzan, False en caso contrario.
-    """
-    i1 = datetime.strptime(f1_inicio, "%Y-%m-%d")
-    f1 = datetime.strptime(f1_fin, "%Y-%m-%d")
-    return i1 <= f2_fin and f2_inicio <= f1
 
-def construir_mapa_tarifas(tarifas_sheet):
+def leer_escenario(data):
     """
-    Construye un diccionario de códigos de tarifa a duración en segundos.
+    Lee un escenario de disponibilidad (fecha de inicio, duración en semanas y categoría).
 
     Args:
-        tarifas_sheet (list): Lista de dicts con datos de tarifas.
+        data (dict): { "fecha_inicio": "YYYY-MM-DD", "duracion_semanas": int, "categoria": str,
+                       "excluir_prereserva_id": str (opcional) }
 
     Returns:
-        dict: {codigo_tarifa: duracion_seg}
-    """
-    codigos = {}
-    for row in tarifas_sheet:
-        codigos[row["codigo_tarifa"]] = int(row["duracion_seg"])
-    return codigos
+        tuple: (inicio, fin, categoria, excluir_prereserva_id), con inicio y fin como ordinales de día.
 
-def segundos_ocupados_en_intervalo(detalles_dict, reservas, fecha_inicio, fecha_fin, codigos_tarifa):
+    Raises:
+        ValueError: Si la duración no está permitida.
     """
-    Calcula los segundos ocupados por pantalla en un intervalo de fechas.
-
-    Args:
-        detalles_dict (dict): Detalles de reservas/prereservas por ID.
-        reservas (list): Lista de reservas/prereservas.
-        fecha_inicio (datetime): Fecha de inicio del intervalo.
-        fecha_fin (datetime): Fecha de fin del intervalo.
-        codigos_tarifa (dict): Mapa de códigos de tarifa a segundos.
+    fecha_inicio = datetime.strptime(data["fecha_inicio"], "%Y-%m-%d")
+    semanas = int(data["duracion_semanas"])
+    if semanas <= 0 or semanas > 52:
+        raise ValueError("Duración no permitida")
+    fecha_fin = fecha_inicio + timedelta(weeks=semanas)
+    excluida = normalizar_id(data.get("excluir_prereserva_id")) or None
+    return fecha_inicio.toordinal(), fecha_fin.toordinal(), data["categoria"], excluida
 
-    Returns:
-        dict: {id_pantalla: segundos_ocupados}
-    """
-    ocupacion = {}
-    for r in reservas:
-        if not hay_cruce_de_fechas(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
-            continue
-        key = r.get("id_reserva") or r.get("id_prereserva")
-        pantallas = detalles_dict.get(key, [])
-        for p in pantallas:
-            id_pantalla = p["id_pantalla"]
-            codigo = p.get("codigo_tarifa")
-            segundos = codigos_tarifa.get(codigo, 0)
-            ocupacion[id_pantalla] = ocupacion.get(id_pantalla, 0) + segundos
-    return ocupacion
-
-def obtener_conflictos(detalles_dict, reservas, id_pantalla, fecha_inicio, fecha_fin):
+def clave_escenario(data):
     """
-    Obtiene los conflictos de ocupación para una pantalla en un intervalo de fechas.
+    Retorna la clave con la que se identifica un escenario en la respuesta por lote.
 
-    Args:
-        detalles_dict (dict): Detalles de reservas/prereservas por ID.
-        reservas (list): Lista de reservas/prereservas.
-        id_pantalla (str): ID de la pantalla a consultar.
-        fecha_inicio (datetime): Fecha de inicio del intervalo.
-        fecha_fin (datetime): Fecha de fin del intervalo.
-
-    Returns:
-        list: Lista de tuplas (fecha_inicio, fecha_fin) de los conflictos encontrados.
+    Usa el campo "id" del escenario si viene; si no, "fecha_inicio|duracion_semanas|categoria".
     """
-    conflictos = []
-    for r in reservas:
-        key = r.get("id_reserva") or r.get("id_prereserva")
-        pantallas_en_r = [p["id_pantalla"] for p in detalles_dict.get(key, [])]
-        if id_pantalla in pantallas_en_r and hay_cruce_de_fechas(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
-            conflictos.append((r["fecha_inicio"], r["fecha_fin"]))
-    return conflictos
+    if data.get("id") is not None:
+        return str(data["id"])
+    return f"{data.get('fecha_inicio')}|{data.get('duracion_semanas')}|{data.get('categoria')}"
 
 @reservas_bp.route('/disponibilidad', methods=['POST'])
 @jwt_required()
@@ -132,107 +111,268 @@ def disponibilidad():
         Response: JSON con el estado de cada pantalla y código HTTP 200.
     """
     identidad = get_jwt_identity()
-    data = request.get_json()
-    excluir_prereserva_id = data.get("excluir_prereserva_id")  # Permite excluir la prereserva propia en edición
+    try:
+        inicio, fin, categoria_cliente, excluir_prereserva_id = leer_escenario(request.get_json())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    resultado = calcular_disponibilidad(
+        indice_ocupacion(identidad), identidad, categoria_cliente, inicio, fin, excluir_prereserva_id
+    )
+    resultado_str_keys = {str(k): v for k, v in resultado.items()}
+    return jsonify(resultado_str_keys), 200
+
+
+@reservas_bp.route('/disponibilidad/lote', methods=['POST'])
+@jwt_required()
+@limiter.limit("5 per minute")
+def disponibilidad_lote():
+    """
+    Endpoint para consultar la disponibilidad de varios escenarios en una sola llamada.
+
+    Todos los escenarios se evalúan contra la misma foto de los datos (una sola lectura de hojas).
+
+    Request:
+        JSON: { "escenarios": [ { "id": str (opcional), "fecha_inicio": "YYYY-MM-DD",
+                                  "duracion_semanas": int, "categoria": str,
+                                  "excluir_prereserva_id": str (opcional) }, ... ] }
+
+    Response:
+        200: { "resultados": { clave_escenario: { id_pantalla: {...} } o { "error": str } } }
+        400: { "error": str } si no hay escenarios o se excede el máximo por lote
+    """
+    identidad = get_jwt_identity()
+    escenarios = (request.get_json() or {}).get("escenarios") or []
+    if not isinstance(escenarios, list) or not escenarios:
+        return jsonify({"error": "Debe enviar al menos un escenario"}), 400
+    if len(escenarios) > MAX_ESCENARIOS_LOTE:
+        return jsonify({"error": f"Máximo {MAX_ESCENARIOS_LOTE} escenarios por consulta"}), 400
+
+    indice = indice_ocupacion(identidad)
+    resultados = {}
+    for escenario in escenarios:
+        clave = clave_escenario(escenario)
+        try:
+            inicio, fin, categoria_cliente, excluir_prereserva_id = leer_escenario(escenario)
+        except ValueError as e:
+            resultados[clave] = {"error": str(e)}
+            continue
+        except (KeyError, TypeError):
+            resultados[clave] = {"error": "Escenario incompleto"}
+            continue
+        resultado = calcular_disponibilidad(indice, identidad, categoria_cliente, inicio, fin, excluir_prereserva_id)
+        resultados[clave] = {str(k): v for k, v in resultado.items()}
 
-    fecha_inicio = datetime.strptime(data["fecha_inicio"], "%Y-%m-%d")
-    semanas = int(data["duracion_semanas"])
+    return jsonify({"resultados": resultados}), 200
+
+
+@reservas_bp.route('/calendario', methods=['GET'])
+@jwt_required()
+@limiter.limit("20 per minute")
+def calendario():
+    """
+    Endpoint que retorna, para cada pantalla, los segundos libres y el estado de cada una de las
+    próximas semanas (por defecto 52), con las mismas reglas de /disponibilidad.
+
+    Query params:
+        categoria (str): Categoría de la pauta del cliente (obligatorio).
+        desde (str): Fecha de inicio de la primera semana, YYYY-MM-DD (por defecto, hoy).
+        semanas (int): Número de semanas, entre 1 y 52 (por defecto 52).
+        excluir_prereserva_id (str): Prereserva propia a ignorar (opcional).
+
+    Response:
+        200: { "semanas": [fecha, ...], "pantallas": { id_pantalla: { "cilindro", "identificador",
+               "segundos_disponibles": [int, ...], "estados": [str, ...] } } }
+        304: Sin cuerpo, si el ETag enviado en If-None-Match sigue vigente
+        400: { "error": str } si faltan parámetros o no son válidos
+    """
+    identidad = get_jwt_identity()
+    categoria_cliente = request.args.get("categoria")
+    excluir_prereserva_id = request.args.get("excluir_prereserva_id")
+    if not categoria_cliente:
+        return jsonify({"error": "La categoría es obligatoria"}), 400
+    try:
+        desde = request.args.get("desde")
+        desde = datetime.strptime(desde, "%Y-%m-%d").toordinal() if desde else datetime.now().toordinal()
+        semanas = int(request.args.get("semanas", 52))
+    except ValueError:
+        return jsonify({"error": "Parámetros inválidos"}), 400
     if semanas <= 0 or semanas > 52:
         return jsonify({"error": "Duración no permitida"}), 400
-    fecha_fin = fecha_inicio + timedelta(weeks=semanas)
-    categoria_cliente = data["categoria"]
-
-    pantallas = get_pantallas()
-    reservas = get_reservas()
-    prereservas = get_prereservas()
-    detalle_reserva_raw = get_detalle_reserva()
-    detalle_prereserva_raw = get_detalle_prereserva()
-    # Filtrar las prereservas excluidas (solo si el cliente está editando la suya)
-    if excluir_prereserva_id:
-        prereservas = [p for p in prereservas if p["id_prereserva"] != excluir_prereserva_id]
-        detalle_prereserva_raw = [d for d in detalle_prereserva_raw if d["id_prereserva"] != excluir_prereserva_id]
-
-    tarifas_sheet = get_tarifas()
-
-    codigos_tarifa = construir_mapa_tarifas(tarifas_sheet)
-    pantallas_dict = {p["id_pantalla"]: p["cilindro"] for p in pantallas}
-    pantallas_dict_info = {p["id_pantalla"]: p for p in pantallas}
-
-    detalle_reserva_dict = {}
-    for row in detalle_reserva_raw:
-        detalle_reserva_dict.setdefault(row["id_reserva"], []).append(row)
-
-    detalle_prereserva_dict = {}
-    for row in detalle_prereserva_raw:
-        detalle_prereserva_dict.setdefault(row["id_prereserva"], []).append(row)
-    ocupados_reserva = segundos_ocupados_en_intervalo(detalle_reserva_dict, reservas, fecha_inicio, fecha_fin, codigos_tarifa)
-    ocupados_prereserva = segundos_ocupados_en_intervalo(detalle_prereserva_dict, prereservas, fecha_inicio, fecha_fin, codigos_tarifa)
-
-    ocupacion_total = {}
-    for id_pantalla in pantallas_dict:
-        total = ocupados_reserva.get(id_pantalla, 0) + ocupados_prereserva.get(id_pantalla, 0)
-        ocupacion_total[id_pantalla] = total
-
-    resultado = {}
-
-    for id_pantalla, cilindro in pantallas_dict.items():
-        segundos_disponibles = max(0, 60 - ocupacion_total.get(id_pantalla, 0))
-        conflictos_reserva = obtener_conflictos(detalle_reserva_dict, reservas, id_pantalla, fecha_inicio, fecha_fin)
-        conflictos_prereserva = obtener_conflictos(detalle_prereserva_dict, prereservas, id_pantalla, fecha_inicio, fecha_fin)
-        if conflictos_prereserva:
-            estado = "parcial" if segundos_disponibles > 0 else "reservado"
-            mensaje = "Pauta activa periodo: " + ", ".join([f"{f[0]} a {f[1]}" for f in conflictos_prereserva])
-        elif segundos_disponibles < 60:
-            estado = "parcial"
-            mensaje = f"Disponible parcialmente ({segundos_disponibles} segundos libres)"
-        else:
-            estado = "disponible"
-            mensaje = "Pantalla completamente disponible"
-        if estado != "reservado":
-            if conflictos_reserva:
-                estado = "parcial" if segundos_disponibles > 0 else "ocupado"
-                mensaje = "Pauta activa periodo: " + ", ".join([f"{f[0]} a {f[1]}" for f in conflictos_reserva])
-            elif segundos_disponibles < 60:
-                estado = "parcial"
-                mensaje = f"Disponible parcialmente ({segundos_disponibles} segundos libres)"
-            else:
-                estado = "disponible"
-                mensaje = "Pantalla completamente disponible"
-        if estado in ("disponible" , "parcial"):
-            for r in reservas:
-                pantallas_en_r = [p["id_pantalla"] for p in detalle_reserva_dict.get(r["id_reserva"], [])]
-                cilindros_cruzados = [p for p, c in pantallas_dict.items() if c == cilindro]
-                detalles = detalle_reserva_dict.get(r["id_reserva"], [])
-                categoria = detalles[0].get("categoria") if detalles else None
-                if r["id_cliente"] != identidad and categoria == categoria_cliente:
-                    if any(p in pantallas_en_r for p in cilindros_cruzados):
-                        if hay_cruce_de_fechas(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
-                            estado = "restringido"
-                            mensaje = f"Conflicto de categoría con otra pauta en cilindro {cilindro}"
-                            break
-
-            for r in prereservas:
-                pantallas_en_r = [p["id_pantalla"] for p in detalle_prereserva_dict.get(r["id_prereserva"], [])]
-                cilindros_cruzados = [p for p, c in pantallas_dict.items() if c == cilindro]
-                detalles = detalle_prereserva_dict.get(r["id_prereserva"], [])
-                categoria = detalles[0].get("categoria") if detalles else None
-                if r["id_cliente"] != identidad and categoria == categoria_cliente:
-                    if any(p in pantallas_en_r for p in cilindros_cruzados):
-                        if hay_cruce_de_fechas(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
-                            estado = "restringido"
-                            mensaje = f"Conflicto de categoría con otra pauta en cilindro {cilindro}"
-                            break
-
-        resultado[id_pantalla] = {
-            "estado": estado,
-            "mensaje": mensaje,
-            "cilindro": cilindro,
-            "identificador": pantallas_dict_info.get(id_pantalla, {}).get("identificador", ""),
-            "segundos_disponibles": segundos_disponibles
+
+    version, datos = calendario_ocupacion(identidad, categoria_cliente, desde, semanas, excluir_prereserva_id)
+    etag = calcular_etag(identidad, categoria_cliente, desde, semanas, excluir_prereserva_id, *version)
+    return respuesta_condicional(etag, lambda: {
+        "semanas": datos["semanas"],
+        "pantallas": {str(k): v for k, v in datos["pantallas"].items()}
+    })
+
+
+@reservas_bp.route('/eventos', methods=['GET'])
+@jwt_required(locations=["headers", "query_string"])
+@limiter.limit("10 per minute")
+def eventos():
+    """
+    Endpoint Server-Sent Events con los cambios de ocupación. Cada vez que se crea, actualiza o
+    elimina una prereserva se envía un evento `ocupacion` con las pantallas y semanas afectadas.
+
+    El token puede ir en el encabezado Authorization o en el parámetro `jwt` (EventSource no
+    permite encabezados propios).
+
+    Response:
+        200: text/event-stream. Cada evento `ocupacion` trae en data:
+             { "semanas": [fecha, ...],
+               "pantallas": [ { "id_pantalla", "cilindro", "segundos_disponibles": [int, ...] } ],
+               "bloqueos": [ { "cilindro", "semana", "categoria" } ] }
+             Los bloqueos son los de otros clientes; los segundos no incluyen apartados temporales.
+    """
+    identidad = get_jwt_identity()
+    cola = suscribir()
+
+    def flujo():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    evento = cola.get(timeout=KEEPALIVE_EVENTOS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if evento is None:  # suscriptor descartado por no leer a tiempo
+                    return
+                yield formatear_evento(evento, identidad)
+        finally:
+            cancelar_suscripcion(cola)
+
+    return Response(flujo(), mimetype="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+
+
+@reservas_bp.route('/primeras-fechas', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def primeras_fechas():
+    """
+    Endpoint que busca las primeras semanas de inicio en las que cabe una campaña.
+
+    Aplica las mismas reglas que la validación de prereservas: límite de 60 segundos por pantalla
+    sumando todas las pautas del periodo y conflicto de categoría por cilindro.
+
+    Request:
+        JSON: {
+            "pantallas": [id_pantalla, ...]          (pantallas exactas) o
+            "por_cilindro": { cilindro: cantidad },  (cantidad de pantallas por cilindro)
+            "segundos": int,                         (segundos por pantalla; debe existir una tarifa)
+            "duracion_semanas": int,
+            "categoria": str,
+            "desde": "YYYY-MM-DD" (opcional, por defecto hoy),
+            "horizonte_semanas": int (opcional, máximo 52),
+            "max_resultados": int (opcional, por defecto 5),
+            "excluir_prereserva_id": str (opcional)
         }
-        
-    resultado_str_keys = {str(k): v for k, v in resultado.items()}
-    return jsonify(resultado_str_keys), 200
+
+    Response:
+        200: { "codigo_tarifa": str, "resultados": [ { "fecha_inicio", "fecha_fin",
+               "pantallas": [ { "id_pantalla", "cilindro", "identificador" } ] } ] }
+        400: { "error": str } si faltan datos o no son válidos
+    """
+    identidad = get_jwt_identity()
+    data = request.get_json() or {}
+    pantallas = data.get("pantallas")
+    por_cilindro = data.get("por_cilindro")
+    categoria_cliente = data.get("categoria")
+    try:
+        segundos = int(data.get("segundos", 0))
+        semanas = int(data.get("duracion_semanas", 0))
+        horizonte = int(data.get("horizonte_semanas", 52))
+        max_resultados = int(data.get("max_resultados", 5))
+        desde = data.get("desde")
+        desde = datetime.strptime(desde, "%Y-%m-%d").toordinal() if desde else datetime.now().toordinal()
+        if por_cilindro is not None:
+            por_cilindro = {str(c): int(n) for c, n in por_cilindro.items()}
+    except (AttributeError, TypeError, ValueError):
+        return jsonify({"error": "Parámetros inválidos"}), 400
+
+    if not categoria_cliente or bool(pantallas) == bool(por_cilindro):
+        return jsonify({"error": "Debe enviar la categoría y 'pantallas' o 'por_cilindro'"}), 400
+    if semanas <= 0 or semanas > 52 or horizonte <= 0 or horizonte > 52 or max_resultados <= 0:
+        return jsonify({"error": "Duración no permitida"}), 400
+    if por_cilindro and any(n <= 0 for n in por_cilindro.values()):
+        return jsonify({"error": "Las cantidades por cilindro deben ser positivas"}), 400
+
+    codigo_tarifa = next((c for c, t in tarifas_tipadas().items() if t.duracion_seg == segundos), None)
+    if codigo_tarifa is None:
+        return jsonify({"error": f"No existe una tarifa de {segundos} segundos"}), 400
+
+    indice = indice_ocupacion(identidad)
+    if pantallas:
+        pantallas = list(dict.fromkeys(normalizar_id(p) for p in pantallas))
+        desconocidas = [p for p in pantallas if p not in indice.cilindro_por_pantalla]
+        if desconocidas:
+            return jsonify({"error": f"Pantallas no encontradas: {desconocidas}"}), 400
+
+    encontrados = buscar_primeras_fechas(
+        indice, identidad, categoria_cliente, segundos, semanas, desde, horizonte,
+        pantallas=pantallas or None, por_cilindro=por_cilindro or None,
+        max_resultados=max_resultados, excluir_prereserva_id=normalizar_id(data.get("excluir_prereserva_id")) or None
+    )
+    info = {p.id_pantalla: p for p in indice.pantallas}
+    return jsonify({
+        "codigo_tarifa": codigo_tarifa,
+        "resultados": [
+            {
+                "fecha_inicio": date.fromordinal(inicio).isoformat(),
+                "fecha_fin": date.fromordinal(inicio + 7 * semanas).isoformat(),
+                "pantallas": [
+                    {"id_pantalla": i, "cilindro": info[i].cilindro, "identificador": info[i].identificador}
+                    for i in asignacion
+                ]
+            }
+            for inicio, asignacion in encontrados
+        ]
+    }), 200
+
+
+@reservas_bp.route('/optimizar', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per minute")
+def optimizar():
+    """
+    Endpoint que propone pantallas y tarifas para una campaña de N cupos de 20 segundos.
+
+    La propuesta cumple las reglas de la validación de prereservas y busca dejar el menor número de
+    segundos sueltos en las pantallas usadas (ver app/services/optimizador.py). La lista "pantallas"
+    de la respuesta tiene el mismo formato que espera /prereservas/crear-completo.
+
+    Request:
+        JSON: { "cupos": int, "fecha_inicio": "YYYY-MM-DD", "duracion_semanas": int, "categoria": str,
+                "cilindros_preferidos": [cilindro, ...] (opcional),
+                "excluir_prereserva_id": str (opcional) }
+
+    Response:
+        200: { "completo": bool, "cupos_asignados": int, "metodo": str, "segundos_sobrantes": int,
+               "pantallas": [ { "id_pantalla", "cilindro", "identificador", "cod_tarifas", "segundos" } ] }
+        400: { "error": str } si faltan datos o no son válidos
+    """
+    identidad = get_jwt_identity()
+    data = request.get_json() or {}
+    try:
+        inicio, fin, categoria_cliente, excluir_prereserva_id = leer_escenario(data)
+        cupos = int(data.get("cupos", 0))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except (KeyError, TypeError):
+        return jsonify({"error": "Datos incompletos"}), 400
+    if cupos <= 0 or cupos > MAX_CUPOS_OPTIMIZACION:
+        return jsonify({"error": f"Los cupos deben estar entre 1 y {MAX_CUPOS_OPTIMIZACION}"}), 400
+
+    propuesta = optimizar_asignacion(
+        indice_ocupacion(identidad), tarifas_tipadas(), identidad, categoria_cliente, cupos, inicio, fin,
+        data.get("cilindros_preferidos"), excluir_prereserva_id
+    )
+    return jsonify(propuesta), 200
 
 
 @reservas_bp.route('/tarifas', methods=['GET'])
@@ -249,26 +389,82 @@ def obtener_tarifas():
     return jsonify(tarifas), 200
 
 
+def _reserva_completa(r, detalles_r, pantallas, tarifas, compacto=False):
+    """
+    Arma una reserva con sus pantallas, segundos y precios (o solo el resumen si compacto).
+
+    Args:
+        r (dict): Fila de la hoja reservas.
+        detalles_r (list): Detalles tipados (Detalle) de la reserva.
+        pantallas (dict): {id_pantalla: fila de pantallas}
+        tarifas (dict): {codigo_tarifa: fila de tarifas}
+        compacto (bool): Si es True omite el detalle por pantalla.
+
+    Returns:
+        dict: Reserva completa.
+    """
+    pantallas_resultado = []
+    for d in detalles_r:
+        tarifa = tarifas.get(d.codigo_tarifa, {})
+        pantalla = pantallas.get(d.id_pantalla, {})
+        if not tarifa or not pantalla:
+            continue
+
+        segundos = int(tarifa.get("duracion_seg", 0))
+        precio = int(tarifa.get("precio_semana", 0))
+
+        pantallas_resultado.append({
+            "id": d.id_pantalla,
+            "cilindro": pantalla.get("cilindro"),
+            "identificador": pantalla.get("identificador"),
+            "segundos": segundos,
+            "precio": precio,
+        })
+
+    reserva = {
+        "id_reserva": r["id_reserva"],
+        "fecha_inicio": r["fecha_inicio"],
+        "fecha_fin": r["fecha_fin"],
+        "categoria": detalles_r[0].categoria if detalles_r else "",
+        "duracion": semanas_entre(r["fecha_inicio"], r["fecha_fin"]),
+        "pantallas": pantallas_resultado,
+        "subtotal": sum(p["precio"] for p in pantallas_resultado),
+        "uxid": r.get("uxid", None)
+    }
+    if compacto:
+        reserva["cantidad_pantallas"] = len(pantallas_resultado)
+        del reserva["pantallas"]
+    return reserva
+
+
 @reservas_bp.route('/cliente', methods=['GET', 'OPTIONS'])
 @jwt_required()
 def obtener_reservas_del_cliente():
     """
     Endpoint para obtener las reservas del cliente autenticado.
 
+    Query params (opcionales, activan la respuesta paginada; ver historial.py):
+        limite (int), cursor (str), desde (YYYY-MM-DD), hasta (YYYY-MM-DD), estado (str)
+
     Returns:
-        Response: JSON con la lista de reservas del cliente y código HTTP 200.
+        Response: JSON con la lista de reservas del cliente y código HTTP 200, o
+        { "items": [...], "siguiente_cursor": str | null } si se pide paginación.
+        400 si los parámetros de paginación no son válidos.
     """
     if request.method == 'OPTIONS':
         return '', 200
 
     id_cliente = get_jwt_identity()
-    reservas = get_reservas()
+    if pide_paginacion(request.args):
+        try:
+            filtros = leer_filtros(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        pagina, siguiente = paginar(historial_reservas(id_cliente, filtros["desde"]), filtros)
+        return jsonify({"items": [registro for _, registro in pagina], "siguiente_cursor": siguiente}), 200
 
-    reservas_cliente = [
-        r for r in reservas
-        if r.get("id_cliente", "").strip() == id_cliente
-    ]
-    return jsonify(reservas_cliente), 200
+    # Desde la caché (refresco en segundo plano y modo degradado), incluidas las archivadas
+    return jsonify([registro for _, registro in historial_reservas(id_cliente)]), 200
 
 
 @reservas_bp.route('/cliente/completo', methods=['GET'])
@@ -278,51 +474,40 @@ def obtener_reservas_cliente_completo():
     Endpoint para obtener las reservas completas del cliente autenticado,
     incluyendo detalles de pantallas y tarifas.
 
+    Query params (opcionales, activan la respuesta paginada; ver historial.py):
+        limite (int), cursor (str), desde (YYYY-MM-DD), hasta (YYYY-MM-DD), estado (str),
+        compacto (1/true: sin el detalle por pantalla, con cantidad_pantallas)
+
     Returns:
-        Response: JSON con la lista de reservas completas y código HTTP 200.
+        Response: JSON con la lista de reservas completas y código HTTP 200, o
+        { "items": [...], "siguiente_cursor": str | null } si se pide paginación.
+        400 si los parámetros de paginación no son válidos.
     """
     identidad = get_jwt_identity()
-    reservas = get_reservas()
-    detalles = get_detalle_reserva()
-    pantallas = {p["id_pantalla"]: p for p in get_pantallas()}
+    filtros = None
+    if pide_paginacion(request.args):
+        try:
+            filtros = leer_filtros(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+    pantallas = {normalizar_id(p["id_pantalla"]): p for p in get_pantallas()}
     tarifas = {t["codigo_tarifa"]: t for t in get_tarifas()}
 
-    # Filtrar reservas del cliente
-    reservas_cliente = [r for r in reservas if r.get("id_cliente", "").strip() == identidad]
-    detalle_por_reserva = {}
-    for d in detalles:
-        detalle_por_reserva.setdefault(d["id_reserva"], []).append(d)
-
-    resultado = []
-    for r in reservas_cliente:
-        pantallas_resultado = []
-        detalles_r = detalle_por_reserva.get(r["id_reserva"], [])
-        for d in detalles_r:
-            tarifa = tarifas.get(d["codigo_tarifa"], {})
-            pantalla = pantallas.get(d["id_pantalla"], {})
-            if not tarifa or not pantalla:
-                continue
-
-            segundos = int(tarifa.get("duracion_seg", 0))
-            precio = int(tarifa.get("precio_semana", 0))
-
-            pantallas_resultado.append({
-                "id": d["id_pantalla"],
-                "cilindro": pantalla.get("cilindro"),
-                "identificador": pantalla.get("identificador"),
-                "segundos": segundos,
-                "precio": precio,
-            })
-
-        resultado.append({
-            "id_reserva": r["id_reserva"],
-            "fecha_inicio": r["fecha_inicio"],
-            "fecha_fin": r["fecha_fin"],
-            "categoria": detalles_r[0]["categoria"] if detalles_r else "",
-            "duracion": (pd.to_datetime(r["fecha_fin"]) - pd.to_datetime(r["fecha_inicio"])).days // 7,
-            "pantallas": pantallas_resultado,
-            "subtotal": sum(p["precio"] for p in pantallas_resultado),
-            "uxid": r.get("uxid", None)
-        })
-
-    return jsonify(resultado), 200
\ No newline at end of file
+    if filtros is not None:
+        pagina, siguiente = paginar(historial_reservas(identidad, filtros["desde"]), filtros)
+        compacto = filtros["compacto"]
+    else:
+        pagina, siguiente, compacto = historial_reservas(identidad), None, False
+
+    # Los detalles de las reservas archivadas están en la hoja de archivo
+    detalle_por_reserva = detalles_reserva_por_id()
+    if any(t.id_reserva not in detalle_por_reserva for t, _ in pagina):
+        detalle_por_reserva = {**detalles_reserva_archivados(), **detalle_por_reserva}
+    items = [
+        _reserva_completa(r, detalle_por_reserva.get(t.id_reserva, []), pantallas, tarifas, compacto)
+        for t, r in pagina
+    ]
+    if filtros is None:
+        return jsonify(items), 200
+    return jsonify({"items": items, "siguiente_cursor": siguiente}), 200
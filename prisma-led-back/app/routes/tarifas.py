@@ -4,9 +4,10 @@ Rutas relacionadas con la consulta de tarifas en prisma-led-back.
 Incluye el endpoint protegido para obtener todas las tarifas desde Google Sheets.
 """
 
-from flask import Blueprint, jsonify
+from flask import Blueprint
 from flask_jwt_extended import jwt_required
-from app.services.sheets_client import get_tarifas  # importa la nueva función decorada
+from app.services.sheets_client import instantanea_hojas  # importa la nueva función decorada
+from app.services.cache_http import respuesta_condicional
 
 tarifas_bp = Blueprint('tarifas_bp', __name__)
 
@@ -16,10 +17,10 @@ def obtener_tarifas():
     """
     Endpoint para obtener todas las tarifas.
 
-    Requiere autenticación JWT.
+    Requiere autenticación JWT. Soporta GET condicional (ETag / If-None-Match).
 
     Returns:
-        Response: JSON con la lista de tarifas y código HTTP 200.
+        Response: JSON con la lista de tarifas y código HTTP 200, o 304 si no hubo cambios.
     """
-    tarifas = get_tarifas()
-    return jsonify(tarifas), 200
+    hojas = instantanea_hojas("tarifas")
+    return respuesta_condicional(hojas.versiones[0], lambda: hojas.registros("tarifas"))
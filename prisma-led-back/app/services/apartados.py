@@ -0,0 +1,114 @@
+"""
+Módulo de apartados temporales de inventario (holds) para prisma-led-back.
+
+Cuando un cliente selecciona pantallas, puede apartar sus segundos por un tiempo limitado
+(APARTADO_TTL_SEGUNDOS). Mientras el apartado está vigente:
+- La disponibilidad, el calendario, la búsqueda de fechas y el optimizador de los demás clientes
+  lo cuentan como ocupación (ver `indice_ocupacion(identidad)` en ocupacion.py).
+- La validación de prereservas de los demás clientes lo cuenta como una pauta más.
+
+Al crear la prereserva (commit) el apartado se consume. Cada cliente tiene como máximo un apartado
+vigente: apartar de nuevo reemplaza el anterior.
+
+Los apartados viven en memoria del proceso; si la aplicación corre con varios workers, cada uno
+ve solo los apartados creados en él.
+"""
+
+import time
+import uuid
+from threading import Lock
+from typing import NamedTuple
+from app.services.modelos import Detalle, fecha_a_ordinal, normalizar_id
+
+_apartados = {}  # {id_apartado: Apartado}
+_apartados_lock = Lock()
+
+
+class Apartado(NamedTuple):
+    id_apartado: str
+    id_cliente: str
+    fecha_inicio: str
+    fecha_fin: str
+    inicio: int
+    fin: int
+    categoria: str
+    detalles: tuple  # (Detalle, ...), con el mismo formato que detalle_prereserva
+    segundos: tuple  # ((id_pantalla, segundos), ...)
+    vence_en: float
+
+
+def _purgar_vencidos(ahora):
+    """
+    Elimina los apartados vencidos. Debe llamarse con _apartados_lock tomado.
+    """
+    for id_apartado in [i for i, a in _apartados.items() if a.vence_en <= ahora]:
+        del _apartados[id_apartado]
+
+
+def apartados_activos():
+    """
+    Retorna los apartados vigentes.
+
+    Returns:
+        list: Lista de Apartado.
+    """
+    with _apartados_lock:
+        _purgar_vencidos(time.time())
+        return list(_apartados.values())
+
+
+def registrar_apartado(id_cliente, fecha_inicio, fecha_fin, categoria, pantallas, duraciones, ttl):
+    """
+    Crea un apartado para el cliente, reemplazando el que tuviera vigente.
+
+    Args:
+        id_cliente (str): ID del cliente.
+        fecha_inicio (str): Fecha de inicio YYYY-MM-DD.
+        fecha_fin (str): Fecha de fin YYYY-MM-DD.
+        categoria (str): Categoría de la pauta.
+        pantallas (list): [{ "id_pantalla": ..., "cod_tarifas": str }, ...]
+        duraciones (dict): {codigo_tarifa: duracion_seg}
+        ttl (int): Segundos de vigencia del apartado.
+
+    Returns:
+        Apartado: Apartado creado.
+
+    Raises:
+        ValueError: Si las fechas no son válidas.
+    """
+    inicio, fin = fecha_a_ordinal(fecha_inicio), fecha_a_ordinal(fecha_fin)
+    if inicio is None or fin is None or inicio > fin:
+        raise ValueError("Fechas inválidas")
+
+    id_apartado = uuid.uuid4().hex[:8]
+    apartado = Apartado(
+        id_apartado, id_cliente, fecha_inicio, fecha_fin, inicio, fin, categoria,
+        tuple(Detalle("", id_apartado, normalizar_id(p["id_pantalla"]), categoria, p["cod_tarifas"]) for p in pantallas),
+        tuple((normalizar_id(p["id_pantalla"]), duraciones.get(p["cod_tarifas"], 0)) for p in pantallas),
+        time.time() + ttl
+    )
+    with _apartados_lock:
+        _purgar_vencidos(time.time())
+        for anterior in [i for i, a in _apartados.items() if a.id_cliente == id_cliente]:
+            del _apartados[anterior]
+        _apartados[id_apartado] = apartado
+    return apartado
+
+
+def liberar_apartado(id_apartado, id_cliente):
+    """
+    Libera (o consume, al crear la prereserva) un apartado del cliente.
+
+    Args:
+        id_apartado (str): ID del apartado.
+        id_cliente (str): ID del cliente dueño del apartado.
+
+    Returns:
+        bool: True si el apartado existía y pertenecía al cliente.
+    """
+    with _apartados_lock:
+        apartado = _apartados.get(id_apartado)
+        if not apartado or apartado.id_cliente != id_cliente:
+            return False
+        del _apartados[id_apartado]
+        return True
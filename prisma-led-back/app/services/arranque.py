@@ -0,0 +1,106 @@
+"""
+Módulo de arranque (warmup) para prisma-led-back.
+
+Ejecuta, antes de que el worker empiece a recibir tráfico, las operaciones lentas que de otro
+modo pagaría el primer usuario después de un despliegue:
+- Carga de la instantánea en disco de la caché de hojas (ver instantanea.py).
+- Recuperación de las transacciones de escritura que quedaron pendientes en el diario local
+  (ver transacciones.py).
+- Carga de credenciales, autorización y apertura de la hoja de cálculo.
+- Obtención de las worksheets (una sola consulta de metadatos).
+- Precarga en caché de las hojas de referencia en una sola lectura batch, y guardado de la
+  instantánea con los datos revalidados.
+
+Al terminar imprime un reporte con el tiempo de cada etapa. Si alguna etapa falla, el error se
+reporta y la aplicación sigue arrancando: esos datos se cargarán en la primera petición.
+
+Futuro desarrollador:
+- Puedes agregar etapas con `_medir` (por ejemplo, precargar hojas de reservas).
+- El calentamiento se desactiva con SHEETS_WARMUP=False (útil para pruebas sin credenciales).
+"""
+
+import time
+import traceback
+from app.services.sheets_client import connect_sheet, refrescar_registro, cargar_hojas
+from app.services.instantanea import cargar_instantanea, guardar_instantanea
+from app.services.transacciones import recuperar_transacciones
+
+# Hojas de referencia que se precargan al arrancar
+HOJAS_REFERENCIA = ("tarifas", "pantallas", "categorias", "ciudades")
+
+
+def _medir(tiempos, etapa, funcion):
+    """
+    Ejecuta una etapa del arranque y registra su duración en milisegundos.
+
+    Returns:
+        bool: True si la etapa terminó sin errores.
+    """
+    inicio = time.perf_counter()
+    try:
+        funcion()
+        ok = True
+    except Exception:
+        traceback.print_exc()
+        ok = False
+    tiempos.append((etapa, (time.perf_counter() - inicio) * 1000, ok))
+    return ok
+
+
+def restaurar_instantanea(app, tiempos):
+    """
+    Carga en la caché la instantánea en disco de las hojas, si existe, y registra su duración.
+
+    Args:
+        app (Flask): Aplicación ya configurada.
+        tiempos (list): Lista de etapas medidas a la que se agrega esta etapa.
+    """
+    _medir(tiempos, "instantanea", lambda: cargar_instantanea(app.config["SHEETS_SNAPSHOT_PATH"]))
+
+
+def recuperar_diario(app, tiempos):
+    """
+    Completa o compensa las transacciones pendientes del diario local y registra su duración.
+
+    Args:
+        app (Flask): Aplicación ya configurada.
+        tiempos (list): Lista de etapas medidas a la que se agrega esta etapa.
+    """
+    def recuperar():
+        with app.app_context():
+            recuperar_transacciones()
+    _medir(tiempos, "transacciones", recuperar)
+
+
+def calentar_aplicacion(app, tiempos=None):
+    """
+    Ejecuta la etapa de calentamiento de la aplicación e imprime el reporte de tiempos.
+
+    Args:
+        app (Flask): Aplicación ya configurada.
+        tiempos (list): Etapas ya medidas antes del calentamiento (opcional).
+
+    Returns:
+        list: Lista de tuplas (etapa, milisegundos, ok).
+    """
+    tiempos = list(tiempos or [])
+    with app.app_context():
+        if _medir(tiempos, "conexion", connect_sheet):
+            _medir(tiempos, "worksheets", refrescar_registro)
+            _medir(tiempos, "hojas_referencia", lambda: cargar_hojas(*HOJAS_REFERENCIA))
+        _medir(tiempos, "guardar_instantanea", lambda: guardar_instantanea(app.config["SHEETS_SNAPSHOT_PATH"]))
+    reportar_tiempos(tiempos)
+    return tiempos
+
+
+def reportar_tiempos(tiempos):
+    """
+    Imprime el reporte de tiempos de arranque.
+
+    Args:
+        tiempos (list): Lista de tuplas (etapa, milisegundos, ok).
+    """
+    total = sum(ms for _, ms, _ in tiempos)
+    for etapa, ms, ok in tiempos:
+        print(f"[ARRANQUE] {etapa}: {ms:.0f} ms{'' if ok else ' (falló)'}")
+    print(f"[ARRANQUE] total: {total:.0f} ms")
@@ -0,0 +1,53 @@
+"""
+Módulo de utilidades de caché HTTP (GET condicional) para prisma-led-back.
+
+Permite responder con ETag y Cache-Control a los endpoints de datos de referencia, y contestar
+304 Not Modified cuando el cliente envía un If-None-Match que coincide con la versión actual.
+
+Características clave:
+- El ETag se deriva de la versión (hash) de las hojas en caché, por lo que un 304 no requiere
+  consultar Google Sheets ni serializar los datos mientras la caché esté vigente.
+- El cuerpo de la respuesta solo se serializa si la versión del cliente no coincide.
+- El ETag y el cuerpo deben salir de la misma lectura de las hojas (ver `instantanea_hojas` en
+  sheets_client.py): si la versión se consultara aparte, un refresco entre ambas lecturas
+  enviaría datos nuevos con el ETag anterior (o al revés).
+"""
+
+import hashlib
+from flask import request, jsonify, make_response
+
+
+def calcular_etag(*partes):
+    """
+    Combina varias versiones o identificadores en un único ETag.
+
+    Args:
+        *partes (str): Versiones de hojas u otros valores que determinan la respuesta.
+
+    Returns:
+        str: ETag (sin comillas).
+    """
+    return hashlib.sha1("|".join(str(p) for p in partes).encode("utf-8")).hexdigest()
+
+
+def respuesta_condicional(etag, construir_datos, status=200):
+    """
+    Construye una respuesta JSON con ETag, o un 304 si el cliente ya tiene esa versión.
+
+    Args:
+        etag (str): ETag de la versión de los datos.
+        construir_datos (callable): Función sin argumentos que retorna los datos a serializar.
+            Solo se invoca si es necesario enviar el cuerpo, y debe construirlos desde los mismos
+            registros de los que se obtuvo la versión del ETag (no volver a leer la caché).
+        status (int): Código HTTP para la respuesta completa.
+
+    Returns:
+        Response: Respuesta 304 sin cuerpo o respuesta JSON con los datos.
+    """
+    if request.if_none_match.contains(etag):
+        respuesta = make_response("", 304)
+    else:
+        respuesta = make_response(jsonify(construir_datos()), status)
+    respuesta.set_etag(etag)
+    respuesta.headers["Cache-Control"] = "private, no-cache"
+    return respuesta
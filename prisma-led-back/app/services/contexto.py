@@ -0,0 +1,120 @@
+"""
+Módulo de contexto de datos por petición (unidad de trabajo) para prisma-led-back.
+
+Una petición que valida y luego escribe (por ejemplo, actualizar una prereserva completa) necesita
+las mismas hojas en el handler y en el validador. El contexto,
+guardado en `flask.g`, lee cada hoja a lo sumo una vez por petición (fresca, en una sola llamada
+batch) y la comparte con todos ellos.
+
+Características clave:
+- `cargar` lee de Google Sheets solo las hojas que aún no se leyeron en la petición.
+- `derivado` construye las vistas tipadas (ver modelos.py) sobre la misma copia, de modo que el
+  validador no vuelve a la caché global, que otro hilo pudo invalidar entre medias.
+- `confirmar_transaccion(operaciones, datos)` (ver transacciones.py) registra sus escrituras en el
+  contexto antes de enviarlas; al confirmar se invalida la caché de cada hoja escrita una sola vez.
+  Las filas a modificar no se ubican sobre estas copias sino con una lectura fresca de la columna
+  clave, porque otro proceso pudo desplazarlas desde que la petición las leyó. Si la petición termina con un error después
+  de registrar una escritura, la invalidación se hace al cerrar la petición.
+
+Futuro desarrollador:
+- Después de registrar una escritura en una hoja, su copia en el contexto (y sus vistas) se descarta:
+  la siguiente lectura en la misma petición vuelve a Google Sheets.
+"""
+
+from flask import g
+from app.services.sheets_client import cargar_hojas, invalidar_cache
+
+
+class ContextoDatos:
+    """
+    Hojas leídas y escrituras pendientes de una petición.
+    """
+
+    def __init__(self):
+        self._hojas = {}  # {nombre_hoja: registros}
+        self._escrituras = {}  # {nombre_hoja: True si solo se agregaron filas al final}
+        self._derivados = {}  # {(nombre_hoja, funcion): resultado}
+
+    def cargar(self, *nombres_hoja):
+        """
+        Lee de Google Sheets, en una sola llamada, las hojas que aún no se leyeron en esta petición.
+
+        Args:
+            *nombres_hoja (str): Nombres de las hojas.
+
+        Returns:
+            dict: {nombre_hoja: list} con los registros de cada hoja.
+        """
+        faltantes = [n for n in dict.fromkeys(nombres_hoja) if n not in self._hojas]
+        if faltantes:
+            self._hojas.update(cargar_hojas(*faltantes, fresco=True))
+        return {n: self._hojas[n] for n in nombres_hoja}
+
+    def registros(self, nombre_hoja):
+        """
+        Retorna los registros de una hoja (leyéndola si aún no se leyó en esta petición).
+        """
+        return self.cargar(nombre_hoja)[nombre_hoja]
+
+    def derivado(self, nombre_hoja, funcion):
+        """
+        Retorna un dato derivado de la copia de una hoja en esta petición, calculado una sola vez
+        (la contraparte por petición de `derivado_hoja`).
+
+        Args:
+            nombre_hoja (str): Nombre de la hoja.
+            funcion (callable): Función que recibe los registros y retorna el dato derivado.
+
+        Returns:
+            object: Resultado de funcion(registros).
+        """
+        clave = (nombre_hoja, funcion)
+        if clave not in self._derivados:
+            self._derivados[clave] = funcion(self.registros(nombre_hoja))
+        return self._derivados[clave]
+
+    def registrar_escritura(self, nombre_hoja, solo_agregados=False):
+        """
+        Registra que se escribió en una hoja y descarta su copia en el contexto.
+
+        Args:
+            nombre_hoja (str): Nombre de la hoja escrita.
+            solo_agregados (bool): True si solo se agregaron filas al final.
+        """
+        self._escrituras[nombre_hoja] = self._escrituras.get(nombre_hoja, True) and solo_agregados
+        self._hojas.pop(nombre_hoja, None)
+        for clave in [c for c in self._derivados if c[0] == nombre_hoja]:
+            del self._derivados[clave]
+
+    def confirmar(self):
+        """
+        Invalida la caché de las hojas escritas (una vez por hoja) y limpia las escrituras pendientes.
+        """
+        escrituras, self._escrituras = self._escrituras, {}
+        agregados = [n for n, solo in escrituras.items() if solo]
+        modificadas = [n for n, solo in escrituras.items() if not solo]
+        if agregados:
+            invalidar_cache(*agregados, solo_agregados=True)
+        if modificadas:
+            invalidar_cache(*modificadas)
+
+
+def contexto_peticion():
+    """
+    Retorna el contexto de datos de la petición actual, creándolo si no existe.
+
+    Returns:
+        ContextoDatos: Contexto guardado en flask.g.
+    """
+    if "contexto_datos" not in g:
+        g.contexto_datos = ContextoDatos()
+    return g.contexto_datos
+
+
+def cerrar_contexto(_error=None):
+    """
+    Confirma las escrituras que hayan quedado pendientes al terminar la petición (teardown_request).
+    """
+    contexto = g.pop("contexto_datos", None)
+    if contexto is not None:
+        contexto.confirmar()
@@ -0,0 +1,161 @@
+"""
+Módulo de plantillas de correo para prisma-led-back.
+
+Los correos (confirmación de prereserva, recordatorio de video y recuperación de contraseña) se
+escriben como plantillas Jinja en app/templates/correos. Se compilan una sola vez al arrancar
+(`cargar_plantillas` en create_app) y luego solo se renderizan.
+
+Características clave:
+- Renderizado sin estado compartido: puede hacerse fuera de los locks de las rutas.
+- `renderizar_confirmaciones` renderiza lotes de confirmaciones (bandeja de salida, herramientas
+  de administración) reutilizando la plantilla compilada.
+- Los valores del cliente (razón social, NIT, correo) se escapan en el HTML.
+
+Futuro desarrollador:
+- Para agregar un correo nuevo, crea la plantilla en app/templates/correos y una función
+  renderizar_* aquí; se compila junto con las demás al arrancar.
+- Microbenchmark del renderizado: `python -m app.tests.bench_correos` desde prisma-led-back.
+"""
+
+import os
+from threading import Lock
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+CARPETA_PLANTILLAS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "correos")
+
+_entorno = Environment(
+    loader=FileSystemLoader(CARPETA_PLANTILLAS),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False
+)
+_entorno.filters["pesos"] = lambda valor: f"{valor:,.0f}"
+
+_plantillas = {}  # {nombre: Template compilada}
+_plantillas_lock = Lock()
+
+
+def cargar_plantillas():
+    """
+    Compila todas las plantillas de correo (se llama una vez al crear la aplicación).
+
+    Returns:
+        int: Número de plantillas compiladas.
+    """
+    with _plantillas_lock:
+        for nombre in _entorno.list_templates():
+            if nombre not in _plantillas:
+                _plantillas[nombre] = _entorno.get_template(nombre)
+        return len(_plantillas)
+
+
+def _plantilla(nombre):
+    plantilla = _plantillas.get(nombre)
+    if plantilla is None:
+        cargar_plantillas()
+        plantilla = _plantillas[nombre]
+    return plantilla
+
+
+def asunto_confirmacion(uxid):
+    """
+    Asunto del correo de confirmación de prereserva.
+    """
+    return f" Confirmación de reserva PW-{uxid} - Prisma Wall"
+
+
+def contexto_confirmacion(datos, cotizacion):
+    """
+    Arma el contexto de la plantilla de confirmación.
+
+    Args:
+        datos (dict): { "correo", "razon_social", "nit", "fecha_inicio", "fecha_fin", "categoria", "uxid" }
+        cotizacion (dict): Resultado de cotizar (ver cotizador.py).
+
+    Returns:
+        dict: Contexto para confirmacion_prereserva.html.
+    """
+    pantallas = []
+    for p in cotizacion["pantallas"]:
+        porcentaje = p["ahorro"] / p["base"] if p["base"] else 0
+        pantallas.append(dict(p, porcentaje_descuento=f"{porcentaje * 100:.0f}"))
+    return dict(
+        datos,
+        semanas=cotizacion["semanas"],
+        semanas_temporada=cotizacion["semanas_temporada"],
+        pantallas=pantallas,
+        base_total=cotizacion["base_total"],
+        ahorro=cotizacion["ahorro"],
+        subtotal=cotizacion["subtotal"],
+        iva=cotizacion["iva"],
+        total=cotizacion["total"]
+    )
+
+
+def renderizar_confirmacion(datos, cotizacion):
+    """
+    Renderiza el correo de confirmación de una prereserva.
+
+    Args:
+        datos (dict): Datos del cliente y la prereserva (ver contexto_confirmacion).
+        cotizacion (dict): Resultado de cotizar.
+
+    Returns:
+        dict: { "asunto": str, "html": str }
+    """
+    return {
+        "asunto": asunto_confirmacion(datos.get("uxid")),
+        "html": _plantilla("confirmacion_prereserva.html").render(contexto_confirmacion(datos, cotizacion))
+    }
+
+
+def renderizar_confirmaciones(lote):
+    """
+    Renderiza un lote de correos de confirmación con la misma plantilla compilada.
+
+    Args:
+        lote (iterable): [(datos, cotizacion), ...]
+
+    Returns:
+        list: [{ "asunto": str, "html": str }, ...] en el mismo orden.
+    """
+    plantilla = _plantilla("confirmacion_prereserva.html")
+    return [
+        {
+            "asunto": asunto_confirmacion(datos.get("uxid")),
+            "html": plantilla.render(contexto_confirmacion(datos, cotizacion))
+        }
+        for datos, cotizacion in lote
+    ]
+
+
+def renderizar_recordatorios(lote):
+    """
+    Renderiza un lote de recordatorios de envío del video de prereservas pendientes.
+
+    Args:
+        lote (iterable): [{ "razon_social", "uxid", "fecha_inicio", "fecha_fin", "fecha_limite", "dias_restantes" }, ...]
+
+    Returns:
+        list: [{ "asunto": str, "html": str }, ...] en el mismo orden.
+    """
+    plantilla = _plantilla("recordatorio_video.html")
+    return [
+        {
+            "asunto": f"Recordatorio: video de la reserva PW-{datos.get('uxid')} - Prisma Wall",
+            "html": plantilla.render(datos)
+        }
+        for datos in lote
+    ]
+
+
+def renderizar_recuperacion(temporal_password):
+    """
+    Renderiza el cuerpo (texto plano) del correo de recuperación de contraseña.
+
+    Args:
+        temporal_password (str): Contraseña temporal generada.
+
+    Returns:
+        str: Cuerpo del mensaje.
+    """
+    return _plantilla("recuperacion_password.txt").render(temporal_password=temporal_password)
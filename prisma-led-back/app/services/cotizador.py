@@ -0,0 +1,188 @@
+"""
+Módulo cotizador de prereservas para prisma-led-back.
+
+Calcula en el servidor el precio de una selección de pantallas con las mismas reglas que el
+frontend (hook useResumenReserva.js), para que la interfaz, el correo de confirmación y la
+creación de la prereserva usen un único resultado en lugar de montos enviados por el cliente:
+- Precio normal por semana según la tarifa de la duración (segundos) de cada pantalla.
+- Semanas de temporada (por defecto diciembre): una semana es de temporada si empieza y termina
+  (inicio + 6 días) en un mes de temporada. Se cobran por cupo de 20 segundos
+  (cupos = max(1, round(segundos / 20))) y nunca llevan descuento.
+- Descuento por duración total (10% si supera 26 semanas, 3.5% si supera 13), solo sobre las
+  semanas normales.
+- IVA del 19% sobre el subtotal con descuento, redondeado al peso.
+
+Características clave:
+- El calendario de precios por semana (precio de temporada por cupo, o 0 si la semana es normal)
+  se calcula una sola vez por fecha de inicio y duración, y se reutiliza entre cotizaciones.
+- Cada pantalla se cotiza en O(1) a partir de ese calendario: semanas normales x tarifa más
+  suma de precios de temporada x cupos.
+
+Futuro desarrollador:
+- Las temporadas se configuran con COTIZACION_TEMPORADAS ("mes:precio_por_cupo,...", por defecto "12:2000000").
+- Si cambian las reglas de precio, ajústalas aquí y en useResumenReserva.js.
+"""
+
+from datetime import date
+from functools import lru_cache
+from flask import current_app
+from app.services.modelos import fecha_a_ordinal, pantallas_tipadas, tarifas_tipadas
+
+SEGUNDOS_POR_CUPO = 20
+IVA = 0.19
+
+# (semanas mínimas exclusivas, descuento), de mayor a menor
+DESCUENTOS_POR_DURACION = ((26, 0.10), (13, 0.035))
+
+
+def _redondear(valor):
+    """
+    Redondea al entero más cercano (mitades hacia arriba), igual que Math.round en el frontend.
+    """
+    return int(valor + 0.5) if valor >= 0 else -int(-valor + 0.5)
+
+
+def cupos_por_segundos(segundos):
+    """
+    Cupos de 20 segundos que ocupa una pauta (20s = 1, 40s = 2, 60s = 3).
+    """
+    if not segundos:
+        return 0
+    return max(1, _redondear(segundos / SEGUNDOS_POR_CUPO))
+
+
+def descuento_por_duracion(semanas):
+    """
+    Descuento que aplica a las semanas normales según la duración total de la campaña.
+    """
+    for minimo, descuento in DESCUENTOS_POR_DURACION:
+        if semanas > minimo:
+            return descuento
+    return 0
+
+
+@lru_cache(maxsize=16)
+def _leer_temporadas(texto):
+    temporadas = {}
+    for parte in filter(None, (p.strip() for p in texto.split(","))):
+        mes, precio = parte.split(":")
+        temporadas[int(mes)] = int(precio)
+    return tuple(sorted(temporadas.items()))
+
+
+def temporadas_configuradas():
+    """
+    Temporadas con precio especial por cupo.
+
+    Returns:
+        tuple: ((mes, precio_por_cupo), ...)
+    """
+    return _leer_temporadas(current_app.config.get("COTIZACION_TEMPORADAS", "12:2000000"))
+
+
+@lru_cache(maxsize=1024)
+def calendario_precios(inicio, semanas, temporadas):
+    """
+    Precio de temporada por cupo de cada semana de una campaña (0 si la semana es normal).
+
+    Args:
+        inicio (int): Ordinal del día de inicio de la campaña.
+        semanas (int): Duración en semanas.
+        temporadas (tuple): ((mes, precio_por_cupo), ...)
+
+    Returns:
+        tuple: Un valor por semana.
+    """
+    precios = dict(temporadas)
+    calendario = []
+    for k in range(semanas):
+        primer_dia = date.fromordinal(inicio + 7 * k)
+        ultimo_dia = date.fromordinal(inicio + 7 * k + 6)
+        if primer_dia.month == ultimo_dia.month and primer_dia.month in precios:
+            calendario.append(precios[primer_dia.month])
+        else:
+            calendario.append(0)
+    return tuple(calendario)
+
+
+def cotizar(fecha_inicio, semanas, pantallas):
+    """
+    Cotiza una selección de pantallas.
+
+    Args:
+        fecha_inicio (str): Fecha de inicio YYYY-MM-DD.
+        semanas (int): Duración en semanas.
+        pantallas (list): [{ "id_pantalla" (o "id"), "cod_tarifas" o "segundos" }, ...]
+
+    Returns:
+        dict: {
+            "semanas", "semanas_temporada", "semanas_normales", "descuento",
+            "pantallas": [ { "id_pantalla", "cilindro", "identificador", "segundos", "cupos",
+                             "precio_semana", "precio_semana_temporada", "base", "ahorro", "precio" } ],
+            "base_total", "subtotal", "ahorro", "iva", "total"
+        }
+
+    Raises:
+        ValueError: Si la fecha o la duración no son válidas, o una pantalla no tiene tarifa.
+    """
+    inicio = fecha_a_ordinal(fecha_inicio)
+    if inicio is None or not isinstance(semanas, int) or semanas <= 0:
+        raise ValueError("Fecha de inicio o duración inválidas")
+
+    tarifas = tarifas_tipadas()
+    # Igual que en el frontend: una tarifa por duración (la última de la hoja si hay varias)
+    precio_por_segundos = {t.duracion_seg: t.precio_semana for t in tarifas.values()}
+    info_pantallas = {str(p.id_pantalla): p for p in pantallas_tipadas()}
+
+    calendario = calendario_precios(inicio, semanas, temporadas_configuradas())
+    semanas_temporada = sum(1 for precio in calendario if precio)
+    semanas_normales = semanas - semanas_temporada
+    suma_temporada = sum(calendario)
+    descuento = descuento_por_duracion(semanas)
+
+    resultado = []
+    for p in pantallas:
+        id_pantalla = p.get("id_pantalla", p.get("id"))
+        if p.get("cod_tarifas"):
+            tarifa = tarifas.get(p["cod_tarifas"])
+            if not tarifa:
+                raise ValueError(f"Tarifa {p['cod_tarifas']} no existe")
+            segundos, precio_semana = tarifa.duracion_seg, tarifa.precio_semana
+        else:
+            segundos = int(p.get("segundos") or 0)
+            precio_semana = precio_por_segundos.get(segundos)
+            if precio_semana is None:
+                raise ValueError(f"No existe una tarifa de {segundos} segundos")
+
+        cupos = cupos_por_segundos(segundos)
+        normal = precio_semana * semanas_normales
+        temporada = cupos * suma_temporada
+        ahorro = normal * descuento
+        info = info_pantallas.get(str(id_pantalla))
+        resultado.append({
+            "id_pantalla": id_pantalla,
+            "cilindro": info.cilindro if info else p.get("cilindro"),
+            "identificador": info.identificador if info else p.get("identificador"),
+            "segundos": segundos,
+            "cupos": cupos,
+            "precio_semana": precio_semana,
+            "precio_semana_temporada": cupos * max(calendario, default=0),
+            "base": normal + temporada,
+            "ahorro": ahorro,
+            "precio": normal * (1 - descuento) + temporada
+        })
+
+    subtotal = sum(p["precio"] for p in resultado)
+    iva = _redondear(subtotal * IVA)
+    return {
+        "semanas": semanas,
+        "semanas_temporada": semanas_temporada,
+        "semanas_normales": semanas_normales,
+        "descuento": descuento,
+        "pantallas": resultado,
+        "base_total": sum(p["base"] for p in resultado),
+        "subtotal": subtotal,
+        "ahorro": sum(p["ahorro"] for p in resultado),
+        "iva": iva,
+        "total": subtotal + iva
+    }
@@ -0,0 +1,147 @@
+"""
+Módulo de eventos de ocupación (Server-Sent Events) para prisma-led-back.
+
+Las páginas de Disponibilidad y Reserva se suscriben a `/api/reservas/eventos` y reciben un evento
+cada vez que se crea, actualiza o elimina una prereserva. El evento lleva solo lo que cambió:
+pantallas afectadas, semanas, segundos disponibles y bloqueos de categoría por cilindro
+(ver `resumen_semanal` en ocupacion.py). Así el cliente mantiene su vista al día sin volver a consultar.
+
+Características clave:
+- Pub/sub en memoria del proceso: cada suscriptor tiene una cola acotada; si un cliente no lee
+  (cola llena), se descarta y deberá reconectarse.
+- El resumen se calcula una sola vez por escritura y solo si hay suscriptores.
+- Los bloqueos de categoría se filtran por suscriptor: un cliente no se bloquea a sí mismo.
+
+Futuro desarrollador:
+- Los eventos no se reenvían al reconectar (no hay Last-Event-ID); el cliente debe volver a
+  consultar la disponibilidad al reconectarse.
+- Con varios workers, cada uno solo notifica las escrituras que atendió; para compartir eventos
+  entre procesos habría que publicar en un broker (por ejemplo Redis pub/sub).
+"""
+
+import itertools
+import json
+import queue
+import traceback
+from threading import Lock
+from app.services.modelos import normalizar_id, prereservas_tipadas, detalles_prereserva_por_id
+from app.services.ocupacion import indice_ocupacion, resumen_semanal
+
+# Eventos pendientes por suscriptor antes de descartarlo
+MAX_EVENTOS_PENDIENTES = 50
+
+_suscriptores = set()
+_suscriptores_lock = Lock()
+_secuencia = itertools.count(1)
+
+
+def suscribir():
+    """
+    Registra un suscriptor nuevo.
+
+    Returns:
+        queue.Queue: Cola donde se reciben los eventos; None significa que el suscriptor fue descartado.
+    """
+    cola = queue.Queue(maxsize=MAX_EVENTOS_PENDIENTES)
+    with _suscriptores_lock:
+        _suscriptores.add(cola)
+    return cola
+
+
+def cancelar_suscripcion(cola):
+    """
+    Elimina un suscriptor (al cerrarse la conexión).
+    """
+    with _suscriptores_lock:
+        _suscriptores.discard(cola)
+
+
+def hay_suscriptores():
+    """
+    Indica si hay al menos un suscriptor conectado.
+    """
+    return bool(_suscriptores)
+
+
+def publicar(tipo, datos):
+    """
+    Envía un evento a todos los suscriptores. Los que tienen la cola llena se descartan.
+
+    Args:
+        tipo (str): Nombre del evento SSE.
+        datos (dict): Contenido del evento.
+    """
+    evento = {"id": next(_secuencia), "tipo": tipo, "datos": datos}
+    with _suscriptores_lock:
+        suscriptores = list(_suscriptores)
+    for cola in suscriptores:
+        try:
+            cola.put_nowait(evento)
+        except queue.Full:
+            cancelar_suscripcion(cola)
+            # Aviso de cierre: se saca un evento para que quepa
+            try:
+                cola.get_nowait()
+                cola.put_nowait(None)
+            except (queue.Empty, queue.Full):
+                pass
+
+
+def huella_prereserva(id_prereserva):
+    """
+    Periodo y pantallas de una prereserva según la caché, para incluir su estado anterior en el evento.
+    Si no hay suscriptores no lee nada.
+
+    Args:
+        id_prereserva (str): ID de la prereserva.
+
+    Returns:
+        list: [(inicio, fin, [id_pantalla, ...])] o lista vacía.
+    """
+    if not hay_suscriptores():
+        return []
+    id_prereserva = normalizar_id(id_prereserva)
+    pr = next((p for p in prereservas_tipadas() if p.id_prereserva == id_prereserva), None)
+    if not pr:
+        return []
+    return [(pr.inicio, pr.fin, [d.id_pantalla for d in detalles_prereserva_por_id().get(id_prereserva, [])])]
+
+
+def notificar_prereserva(id_prereserva, anteriores=()):
+    """
+    Publica el cambio de ocupación de una prereserva recién escrita (llamar después de invalidar la caché).
+    Un error al calcular el evento se reporta pero no afecta la escritura.
+
+    Args:
+        id_prereserva (str): ID de la prereserva creada, actualizada o eliminada.
+        anteriores (list): Huella de la prereserva antes del cambio (ver huella_prereserva).
+    """
+    if not hay_suscriptores():
+        return
+    try:
+        afectados = list(anteriores) + huella_prereserva(id_prereserva)
+        if afectados:
+            publicar("ocupacion", resumen_semanal(indice_ocupacion(), afectados))
+    except Exception:
+        print(f"[EVENTOS] No se pudo publicar el cambio de la prereserva {id_prereserva}")
+        traceback.print_exc()
+
+
+def formatear_evento(evento, identidad):
+    """
+    Da formato SSE a un evento para un suscriptor, quitando los bloqueos que causa el propio cliente.
+
+    Args:
+        evento (dict): Evento publicado.
+        identidad (str): ID del cliente suscrito.
+
+    Returns:
+        str: Texto del evento en formato text/event-stream.
+    """
+    datos = dict(evento["datos"])
+    if "bloqueos" in datos:
+        datos["bloqueos"] = [
+            {"cilindro": b["cilindro"], "semana": b["semana"], "categoria": b["categoria"]}
+            for b in datos["bloqueos"] if any(c != identidad for c in b["clientes"])
+        ]
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
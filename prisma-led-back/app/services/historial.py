@@ -0,0 +1,125 @@
+"""
+Módulo de paginación del historial de reservas y prereservas de un cliente para prisma-led-back.
+
+Los endpoints de historial (`/api/reservas/cliente`, `/api/reservas/cliente/completo` y
+`/api/prereservas/cliente`) responden con la lista completa cuando se llaman sin parámetros.
+Con cualquiera de los parámetros de PARAMETROS_HISTORIAL responden por páginas:
+
+    { "items": [...], "siguiente_cursor": str | null }
+
+Características clave:
+- Usa el índice por cliente de modelos.py (ordenado por fecha de inicio), así que el costo de una
+  página no depende de cuántas reservas existan en total.
+- Paginación por cursor (fecha de inicio + ID del último elemento): estable aunque se agreguen
+  reservas entre una página y otra.
+- Filtros por rango de fechas (pautas que se cruzan con [desde, hasta]) y por estado.
+- Incluye las filas archivadas por el mantenimiento (ver `historial_reservas` en modelos.py); con
+  `desde` posterior a todo lo archivado, las hojas de archivo no se recorren.
+
+Futuro desarrollador:
+- El cursor es opaco para el frontend; si cambias su formato, los cursores viejos simplemente se rechazan con 400.
+"""
+
+import base64
+import json
+from bisect import bisect_right
+from app.services.modelos import fecha_a_ordinal, se_cruzan, clave_orden_historial
+
+# Parámetros que activan la respuesta paginada
+PARAMETROS_HISTORIAL = ("limite", "cursor", "desde", "hasta", "estado", "compacto")
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+
+def pide_paginacion(args):
+    """
+    Indica si la petición usa alguno de los parámetros de historial paginado.
+
+    Args:
+        args (MultiDict): Query params de la petición.
+    """
+    return any(nombre in args for nombre in PARAMETROS_HISTORIAL)
+
+
+def _codificar_cursor(clave):
+    return base64.urlsafe_b64encode(json.dumps(clave).encode("utf-8")).decode("ascii")
+
+
+def _decodificar_cursor(cursor):
+    try:
+        sin_fecha, inicio, id_registro = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return (bool(sin_fecha), int(inicio), str(id_registro))
+    except (ValueError, TypeError):
+        raise ValueError("Cursor inválido")
+
+
+def leer_filtros(args):
+    """
+    Lee y valida los parámetros del historial paginado.
+
+    Args:
+        args (MultiDict): Query params con limite, cursor, desde, hasta (YYYY-MM-DD), estado y compacto.
+
+    Returns:
+        dict: { "limite", "despues_de", "desde", "hasta", "estado", "compacto" }
+
+    Raises:
+        ValueError: Si algún parámetro no es válido.
+    """
+    try:
+        limite = int(args.get("limite", LIMITE_POR_DEFECTO))
+    except ValueError:
+        raise ValueError("El límite debe ser un número")
+    if limite <= 0 or limite > LIMITE_MAXIMO:
+        raise ValueError(f"El límite debe estar entre 1 y {LIMITE_MAXIMO}")
+
+    desde = fecha_a_ordinal(args["desde"]) if args.get("desde") else None
+    hasta = fecha_a_ordinal(args["hasta"]) if args.get("hasta") else None
+    if (args.get("desde") and desde is None) or (args.get("hasta") and hasta is None):
+        raise ValueError("Fechas inválidas")
+
+    return {
+        "limite": limite,
+        "despues_de": _decodificar_cursor(args["cursor"]) if args.get("cursor") else None,
+        "desde": desde,
+        "hasta": hasta,
+        "estado": args.get("estado", "").strip().lower() or None,
+        "compacto": args.get("compacto", "").lower() in ("1", "true", "si"),
+    }
+
+
+def paginar(pares, filtros):
+    """
+    Retorna una página del historial de un cliente.
+
+    Args:
+        pares (list): [(registro_tipado, registro), ...] ordenados con clave_orden_historial
+            (ver historial_reservas / historial_prereservas).
+        filtros (dict): Resultado de leer_filtros.
+
+    Returns:
+        tuple: (list de pares de la página, str o None con el cursor de la página siguiente)
+    """
+    desde, hasta, estado = filtros["desde"], filtros["hasta"], filtros["estado"]
+    posicion = 0
+    if filtros["despues_de"] is not None:
+        posicion = bisect_right(pares, filtros["despues_de"], key=lambda par: clave_orden_historial(par[0]))
+
+    pagina = []
+    for tipado, registro in pares[posicion:]:
+        # Ordenado por fecha de inicio: después de `hasta` ya no hay pautas que se crucen
+        if hasta is not None and (tipado.inicio is None or tipado.inicio > hasta):
+            break
+        if estado and tipado.estado.lower() != estado:
+            continue
+        if (desde is not None or hasta is not None) and not se_cruzan(
+            tipado.inicio, tipado.fin,
+            desde if desde is not None else tipado.inicio,
+            hasta if hasta is not None else tipado.fin
+        ):
+            continue
+        if len(pagina) == filtros["limite"]:
+            return pagina, _codificar_cursor(list(clave_orden_historial(pagina[-1][0])))
+        pagina.append((tipado, registro))
+    return pagina, None
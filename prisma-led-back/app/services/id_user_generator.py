@@ -1,11 +1,12 @@
 """
 Módulo para generación de identificadores únicos de usuario y cliente en prisma-led-back.
 
-Utiliza UUID y verifica contra la hoja de cálculo para evitar duplicados.
+Utiliza UUID y verifica contra la hoja de cálculo para evitar duplicados, leyendo solo la
+columna de IDs de cada hoja.
 """
 
 import uuid
-from app.services.sheets_client import connect_sheet
+from app.services.sheets_client import leer_columnas
 
 def generate_unique_user_id():
     """
@@ -16,8 +17,7 @@ def generate_unique_user_id():
     Returns:
         str: ID único de usuario (8 caracteres hexadecimales).
     """
-    sheet = connect_sheet().worksheet("usuarios")
-    existing_ids = [u["id_usuario"] for u in sheet.get_all_records()]
+    existing_ids = set(leer_columnas({"usuarios": ["id_usuario"]})["usuarios"]["id_usuario"])
 
     while True:
         new_id = uuid.uuid4().hex[:8]
@@ -33,8 +33,7 @@ def generate_unique_client_id():
     Returns:
         str: ID único de cliente (8 caracteres hexadecimales).
     """
-    sheet = connect_sheet().worksheet("clientes")
-    existing_ids = [c["id_cliente"] for c in sheet.get_all_records()]
+    existing_ids = set(leer_columnas({"clientes": ["id_cliente"]})["clientes"]["id_cliente"])
 
     while True:
         new_id = uuid.uuid4().hex[:8]
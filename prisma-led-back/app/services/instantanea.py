@@ -0,0 +1,145 @@
+"""
+Módulo de instantánea en disco de la caché de hojas para prisma-led-back.
+
+Guarda la última copia consistente de cada hoja cacheada en un archivo SQLite local, para que:
+- Un worker que reinicia cargue las hojas en milisegundos y luego las revalide contra Google Sheets.
+- Si Google Sheets no responde (caída o 429 prolongados), las lecturas sigan respondiendo con la
+  última copia (modo degradado de solo lectura). Esas respuestas llevan los encabezados
+  `Warning: 110` y `X-Sheets-Antiguedad` con la antigüedad de los datos en segundos.
+
+Cada hoja se guarda como una fila (encabezados y registros serializados en JSON) y solo se
+reescribe si su versión cambió desde la última vez que se guardó.
+
+Las columnas sensibles (COLUMNAS_EXCLUIDAS, por ejemplo usuarios.password_hash) no se guardan.
+Al cargar, esas hojas quedan vencidas y sin sincronización incremental: la primera lectura las
+recarga completas desde Google Sheets, y la copia recortada solo se sirve en modo degradado (en el
+que el inicio de sesión responde 401).
+
+Futuro desarrollador:
+- La ruta del archivo se configura con SHEETS_SNAPSHOT_PATH (relativa a la carpeta instance de la
+  aplicación); una ruta vacía desactiva la instantánea.
+- La instantánea se guarda desde el hilo de refresco (ver refresco.py) y al terminar el arranque.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from app.services.sheets_client import exportar_cache, importar_cache
+
+# Columnas que no se escriben en disco: {nombre_hoja: (columna, ...)}
+COLUMNAS_EXCLUIDAS = {"usuarios": ("password_hash",)}
+
+# Versión guardada de cada hoja, para no reescribir hojas que no cambiaron
+_versiones_guardadas = {}
+_instantanea_lock = threading.Lock()
+
+
+def _conectar(ruta):
+    """
+    Abre el archivo SQLite de la instantánea y crea la tabla si no existe.
+    """
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    conexion = sqlite3.connect(ruta, timeout=5)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS hojas ("
+        "nombre TEXT PRIMARY KEY, encabezados TEXT, registros TEXT, version TEXT, "
+        "cargado_en REAL, completo_en REAL, suma_claves TEXT)"
+    )
+    return conexion
+
+
+def _sin_excluidas(nombre, registros):
+    """
+    Quita de los registros de una hoja las columnas que no se guardan en disco.
+    """
+    excluidas = COLUMNAS_EXCLUIDAS.get(nombre)
+    if not excluidas:
+        return registros
+    return [{k: v for k, v in r.items() if k not in excluidas} for r in registros]
+
+
+def cargar_instantanea(ruta):
+    """
+    Carga en la caché de hojas el contenido de la instantánea en disco.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite (vacía para no cargar nada).
+
+    Returns:
+        int: Número de hojas cargadas.
+    """
+    if not ruta or not os.path.exists(ruta):
+        return 0
+    with _instantanea_lock:
+        conexion = _conectar(ruta)
+        try:
+            filas = conexion.execute(
+                "SELECT nombre, encabezados, registros, version, cargado_en, completo_en, suma_claves FROM hojas"
+            ).fetchall()
+        finally:
+            conexion.close()
+
+        entradas = {}
+        for nombre, encabezados, registros, version, cargado_en, completo_en, suma_claves in filas:
+            entradas[nombre] = {
+                "encabezados": json.loads(encabezados),
+                "registros": json.loads(registros),
+                "version": version,
+                "cargado_en": cargado_en,
+                "completo_en": completo_en,
+                "suma_claves": suma_claves
+            }
+            _versiones_guardadas[nombre] = version
+            if nombre in COLUMNAS_EXCLUIDAS:
+                # Copia recortada: se recarga completa en la primera lectura
+                entradas[nombre].update(vencida=True, completo_en=0)
+    importar_cache(entradas)
+    return len(entradas)
+
+
+def guardar_instantanea(ruta):
+    """
+    Guarda en disco las hojas cacheadas cuya versión cambió desde el último guardado.
+
+    Args:
+        ruta (str): Ruta del archivo SQLite (vacía para no guardar nada).
+
+    Returns:
+        int: Número de hojas escritas.
+    """
+    if not ruta:
+        return 0
+    with _instantanea_lock:
+        cambiadas = {
+            nombre: entrada for nombre, entrada in exportar_cache().items()
+            if _versiones_guardadas.get(nombre) != entrada["version"]
+        }
+        if not cambiadas:
+            return 0
+        conexion = _conectar(ruta)
+        try:
+            with conexion:
+                conexion.executemany(
+                    "INSERT OR REPLACE INTO hojas VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            nombre,
+                            json.dumps(e["encabezados"], ensure_ascii=False),
+                            json.dumps(_sin_excluidas(nombre, e["registros"]), ensure_ascii=False, default=str),
+                            e["version"],
+                            e["cargado_en"],
+                            e.get("completo_en", e["cargado_en"]),
+                            e.get("suma_claves", "")
+                        )
+                        for nombre, e in cambiadas.items()
+                    ]
+                )
+        finally:
+            conexion.close()
+        for nombre, entrada in cambiadas.items():
+            _versiones_guardadas[nombre] = entrada["version"]
+    return len(cambiadas)
@@ -0,0 +1,138 @@
+"""
+Módulo de mantenimiento de las hojas de reservas y prereservas para prisma-led-back.
+
+La disponibilidad y las validaciones recorren todas las filas de reservas, prereservas y sus
+detalles. Este módulo mantiene esas hojas con solo el inventario vigente:
+- Vence las prereservas 'pendiente' cuyo plazo para enviar el video ya pasó (ver
+  `fecha_limite_video` en recordatorios.py): se archivan con estado 'vencida'.
+- Archiva las reservas y prereservas que ya terminaron (fecha_fin anterior a hoy).
+
+Las filas archivadas, junto con sus filas de detalle, se mueven a las hojas *_archivo
+(HOJAS_ARCHIVO), que se crean solas si no existen.
+
+Se ejecuta desde la línea de comandos, por ejemplo una vez al día desde cron (ver app/comandos.py):
+
+    flask --app run mantenimiento [--simular] [--hoy YYYY-MM-DD]
+
+Características clave:
+- Todo el movimiento (agregar a las hojas de archivo y borrar de las hojas vigentes) se confirma
+  como una sola transacción (ver transacciones.py): un batchUpdate que Google Sheets aplica
+  completo o no aplica, anotado antes en el diario local.
+- Las filas a borrar se ubican por su clave al confirmar, no por el número de fila de la lectura.
+
+Futuro desarrollador:
+- Los endpoints de historial del cliente leen también las hojas *_archivo (ver
+  `historial_reservas` en modelos.py), así que archivar no borra nada de lo que el cliente ve.
+- HOJAS_ARCHIVO se define en modelos.py, junto al historial que la lee.
+"""
+
+import time
+from datetime import date
+from app.extensions import pre_reserva_lock
+from app.services.modelos import fecha_a_ordinal, HOJAS_ARCHIVO
+from app.services.recordatorios import fecha_limite_video
+from app.services.transacciones import confirmar_transaccion
+from app.services.sheets_client import (
+    cargar_hojas,
+    encabezados_hoja,
+    asegurar_hoja
+)
+
+ESTADO_VENCIDA = "vencida"
+
+
+def planificar_mantenimiento(hojas, hoy):
+    """
+    Decide qué filas se archivan.
+
+    Args:
+        hojas (dict): {nombre_hoja: registros} de reservas, prereservas y sus detalles.
+        hoy (date): Fecha de referencia.
+
+    Returns:
+        dict: { nombre_hoja: [índice de registro, ...] } y "vencidas": set de IDs de prereservas vencidas.
+    """
+    ordinal_hoy = hoy.toordinal()
+
+    def terminada(registro):
+        fin = fecha_a_ordinal(str(registro.get("fecha_fin", "")).strip())
+        return fin is not None and fin < ordinal_hoy
+
+    reservas = {str(r["id_reserva"]) for r in hojas["reservas"] if terminada(r)}
+    vencidas = set()
+    prereservas = set()
+    for p in hojas["prereservas"]:
+        id_prereserva = str(p["id_prereserva"])
+        if str(p.get("estado", "")).strip().lower() == "pendiente":
+            limite = fecha_limite_video(p)
+            if limite is not None and limite < hoy:
+                vencidas.add(id_prereserva)
+                prereservas.add(id_prereserva)
+                continue
+        if terminada(p):
+            prereservas.add(id_prereserva)
+
+    return {
+        "reservas": [i for i, r in enumerate(hojas["reservas"]) if str(r["id_reserva"]) in reservas],
+        "detalle_reserva": [i for i, d in enumerate(hojas["detalle_reserva"]) if str(d["id_reserva"]) in reservas],
+        "prereservas": [i for i, p in enumerate(hojas["prereservas"]) if str(p["id_prereserva"]) in prereservas],
+        "detalle_prereserva": [
+            i for i, d in enumerate(hojas["detalle_prereserva"]) if str(d["id_prereserva"]) in prereservas
+        ],
+        "vencidas": vencidas,
+    }
+
+
+def _operaciones_movimiento(hojas, plan):
+    """
+    Construye las operaciones de la transacción que agrega las filas a las hojas de archivo y las
+    borra (por su clave, la primera columna) de las hojas vigentes.
+    """
+    operaciones = []
+    for origen, destino in HOJAS_ARCHIVO.items():
+        indices = plan[origen]
+        if not indices:
+            continue
+        encabezados_destino = asegurar_hoja(destino, encabezados_hoja(origen))
+        clave = encabezados_hoja(origen)[0]
+        filas = []
+        for i in indices:
+            registro = hojas[origen][i]
+            if origen == "prereservas" and str(registro["id_prereserva"]) in plan["vencidas"]:
+                registro = dict(registro, estado=ESTADO_VENCIDA)
+            filas.append([registro.get(columna, "") for columna in encabezados_destino])
+        operaciones.append({"tipo": "agregar", "hoja": destino, "filas": filas})
+        operaciones.append({
+            "tipo": "borrar",
+            "hoja": origen,
+            "columna": clave,
+            "valores": [hojas[origen][i].get(clave, "") for i in indices]
+        })
+    return operaciones
+
+
+def ejecutar_mantenimiento(hoy=None, simular=False):
+    """
+    Vence las prereservas pendientes fuera de plazo y archiva las reservas y prereservas terminadas.
+
+    Args:
+        hoy (date): Fecha de referencia (por defecto, hoy).
+        simular (bool): Si es True solo calcula qué se archivaría, sin escribir.
+
+    Returns:
+        dict: { "reservas", "detalle_reserva", "prereservas", "detalle_prereserva", "vencidas", "segundos" }
+            con el número de filas archivadas (o por archivar, al simular).
+    """
+    inicio = time.perf_counter()
+    hoy = hoy or date.today()
+    with pre_reserva_lock:
+        hojas = cargar_hojas(*HOJAS_ARCHIVO, fresco=True)
+        plan = planificar_mantenimiento(hojas, hoy)
+        resumen = {nombre: len(plan[nombre]) for nombre in HOJAS_ARCHIVO}
+        resumen["vencidas"] = len(plan["vencidas"])
+
+        if not simular and any(plan[nombre] for nombre in HOJAS_ARCHIVO):
+            confirmar_transaccion(_operaciones_movimiento(hojas, plan))
+
+    resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+    return resumen
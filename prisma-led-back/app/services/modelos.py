@@ -0,0 +1,443 @@
+"""
+Modelos tipados de las hojas de prisma-led-back.
+
+Convierte los registros de Google Sheets (listas de diccionarios con los encabezados repetidos
+en cada fila) en tuplas compactas con solo los campos que usa la lógica de negocio, ya convertidos:
+- Fechas como ordinales de día (int), listas para comparar sin volver a parsear (la fecha en texto
+  se obtiene con `ordinal_a_fecha` o desde la fila original).
+- Campos numéricos (cilindro, duración, precio) ya convertidos a entero.
+- IDs normalizados a texto (`normalizar_id`), para que el ID leído de la hoja (número o texto según
+  la celda) coincida con el recibido en las peticiones.
+
+La conversión se hace una sola vez por cada lectura de la hoja (ver `derivado_hoja`), de modo
+que los cálculos de ocupación y las validaciones no repiten `strptime` ni `int()` en sus ciclos.
+
+Las reservas y prereservas se convierten junto con sus índices por cliente (ordenados por fecha
+de inicio, para paginar el historial sin recorrer la hoja completa; ver historial.py) y por ID, en
+un solo derivado por versión de la hoja (HojaTipada): cada fila tiene una sola tupla tipada,
+compartida por la lista y los índices. El historial incluye las filas que el mantenimiento movió a
+las hojas de archivo (HOJAS_ARCHIVO).
+
+Futuro desarrollador:
+- Si agregas columnas a una hoja y las necesitas en la lógica de negocio, agrégalas al modelo
+  correspondiente y a su función de conversión.
+"""
+
+from datetime import date, datetime
+from typing import NamedTuple, Optional
+from app.services.sheets_client import cargar_hojas, derivado_hoja, hoja_existe
+
+# Hoja vigente -> hoja de archivo a la que el mantenimiento mueve las filas terminadas (ver mantenimiento.py)
+HOJAS_ARCHIVO = {
+    "reservas": "reservas_archivo",
+    "detalle_reserva": "detalle_reserva_archivo",
+    "prereservas": "prereservas_archivo",
+    "detalle_prereserva": "detalle_prereserva_archivo",
+}
+
+
+class Pantalla(NamedTuple):
+    id_pantalla: str
+    cilindro: int
+    identificador: str
+
+
+class Tarifa(NamedTuple):
+    codigo_tarifa: str
+    duracion_seg: int
+    precio_semana: int
+
+
+class Reserva(NamedTuple):
+    id_reserva: str
+    id_cliente: str
+    inicio: Optional[int]
+    fin: Optional[int]
+    estado: str
+
+
+class Prereserva(NamedTuple):
+    id_prereserva: str
+    id_cliente: str
+    inicio: Optional[int]
+    fin: Optional[int]
+    estado: str
+
+
+class Detalle(NamedTuple):
+    id_detalle: str
+    id_padre: str  # id_reserva o id_prereserva al que pertenece el detalle
+    id_pantalla: str
+    categoria: str
+    codigo_tarifa: str
+
+
+class HojaTipada(NamedTuple):
+    tipados: list  # [Reserva o Prereserva, ...] en el orden de la hoja
+    por_cliente: dict  # {id_cliente: [(tipado, registro), ...]} ordenados con clave_orden_historial
+    por_id: dict  # {id: (tipado, registro)}, con los mismos pares de por_cliente
+
+
+def fecha_a_ordinal(fecha):
+    """
+    Convierte una fecha 'YYYY-MM-DD' a su ordinal de día.
+
+    Args:
+        fecha (str): Fecha en formato YYYY-MM-DD.
+
+    Returns:
+        int or None: Ordinal del día, o None si la fecha no es válida.
+    """
+    try:
+        return datetime.strptime(str(fecha).strip(), "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+def ordinal_a_fecha(ordinal):
+    """
+    Convierte un ordinal de día a fecha 'YYYY-MM-DD'.
+
+    Args:
+        ordinal (int): Ordinal del día.
+
+    Returns:
+        str or None: Fecha en formato YYYY-MM-DD, o None si el ordinal es None.
+    """
+    return date.fromordinal(ordinal).isoformat() if ordinal is not None else None
+
+
+def normalizar_id(valor):
+    """
+    Normaliza un ID (de pantalla, reserva, cliente...) a texto sin espacios.
+
+    Args:
+        valor: ID tal como viene de la hoja o de la petición (número o texto).
+
+    Returns:
+        str: ID como texto ("" si está vacío).
+    """
+    return str(valor).strip() if valor is not None else ""
+
+
+def semanas_entre(fecha_inicio, fecha_fin):
+    """
+    Calcula el número de semanas completas entre dos fechas 'YYYY-MM-DD'.
+
+    Args:
+        fecha_inicio (str): Fecha de inicio.
+        fecha_fin (str): Fecha de fin.
+
+    Returns:
+        int: Semanas completas entre ambas fechas (0 si alguna fecha no es válida).
+    """
+    inicio, fin = fecha_a_ordinal(fecha_inicio), fecha_a_ordinal(fecha_fin)
+    if inicio is None or fin is None:
+        return 0
+    return (fin - inicio) // 7
+
+
+def se_cruzan(inicio1, fin1, inicio2, fin2):
+    """
+    Determina si dos intervalos de días (ordinales, extremos incluidos) se cruzan.
+
+    Un intervalo con fechas inválidas (None) no se cruza con ninguno.
+
+    Returns:
+        bool: True si los intervalos se cruzan.
+    """
+    if inicio1 is None or fin1 is None:
+        return False
+    return inicio1 <= fin2 and inicio2 <= fin1
+
+
+def _entero(valor, defecto=0):
+    """Convierte a entero si es posible; si no (o si está vacío), retorna el defecto."""
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return defecto
+
+
+def _texto(valor):
+    return str(valor).strip() if valor is not None else ""
+
+
+def _a_pantallas(registros):
+    return [
+        Pantalla(normalizar_id(p["id_pantalla"]), _entero(p.get("cilindro")), p.get("identificador", ""))
+        for p in registros
+    ]
+
+
+def _a_tarifas(registros):
+    return {
+        t["codigo_tarifa"]: Tarifa(t["codigo_tarifa"], int(t["duracion_seg"]), _entero(t.get("precio_semana")))
+        for t in registros
+    }
+
+
+def _a_reservas(registros):
+    return [
+        Reserva(
+            normalizar_id(r["id_reserva"]), normalizar_id(r.get("id_cliente")),
+            fecha_a_ordinal(r["fecha_inicio"]), fecha_a_ordinal(r["fecha_fin"]),
+            _texto(r.get("estado"))
+        )
+        for r in registros
+    ]
+
+
+def _a_prereservas(registros):
+    return [
+        Prereserva(
+            normalizar_id(p["id_prereserva"]), normalizar_id(p.get("id_cliente")),
+            fecha_a_ordinal(p["fecha_inicio"]), fecha_a_ordinal(p["fecha_fin"]),
+            _texto(p.get("estado"))
+        )
+        for p in registros
+    ]
+
+
+def _agrupar_detalles(registros, clave):
+    agrupados = {}
+    for d in registros:
+        detalle = Detalle(
+            normalizar_id(d.get("id_detalle")), normalizar_id(d[clave]), normalizar_id(d["id_pantalla"]),
+            d.get("categoria", ""), d.get("codigo_tarifa", "")
+        )
+        agrupados.setdefault(detalle.id_padre, []).append(detalle)
+    return agrupados
+
+
+def _a_detalles_reserva(registros):
+    return _agrupar_detalles(registros, "id_reserva")
+
+
+def _a_detalles_prereserva(registros):
+    return _agrupar_detalles(registros, "id_prereserva")
+
+
+def clave_orden_historial(tipado):
+    """
+    Clave de orden del historial: fecha de inicio (las inválidas al final) y luego el ID.
+    """
+    return (tipado.inicio is None, tipado.inicio or 0, str(tipado[0]))
+
+
+def _indexar(tipados, registros):
+    por_cliente, por_id = {}, {}
+    for tipado, registro in zip(tipados, registros):
+        par = (tipado, registro)
+        por_cliente.setdefault(tipado.id_cliente, []).append(par)
+        por_id[tipado[0]] = par
+    for pares in por_cliente.values():
+        pares.sort(key=lambda par: clave_orden_historial(par[0]))
+    return HojaTipada(tipados, por_cliente, por_id)
+
+
+def _hoja_reservas(registros):
+    return _indexar(_a_reservas(registros), registros)
+
+
+def _hoja_prereservas(registros):
+    return _indexar(_a_prereservas(registros), registros)
+
+
+def _fin_maximo(registros):
+    fines = [fecha_a_ordinal(str(r.get("fecha_fin", "")).strip()) for r in registros]
+    return max((f for f in fines if f is not None), default=None)
+
+
+def _derivado_archivo(nombre_hoja, funcion):
+    """
+    Construye un derivado sobre la hoja de archivo de una hoja vigente (sobre una lista vacía si
+    la hoja de archivo aún no existe).
+    """
+    archivo = HOJAS_ARCHIVO[nombre_hoja]
+    if not hoja_existe(archivo):
+        return funcion([])
+    # Ambas hojas se revalidan juntas, para no ver una fila recién archivada en las dos o en ninguna
+    cargar_hojas(nombre_hoja, archivo)
+    return derivado_hoja(archivo, funcion)
+
+
+def _historial(nombre_hoja, vigentes, construir, id_cliente, desde):
+    """
+    Une los pares vigentes de un cliente con los archivados, en el orden del historial.
+
+    Los archivados no se consultan si `desde` es posterior al fin de todas las filas archivadas.
+    Una fila presente en ambas hojas (mientras se archiva) se toma de la vigente.
+    """
+    if desde is not None:
+        fin_maximo = _derivado_archivo(nombre_hoja, _fin_maximo)
+        if fin_maximo is None or fin_maximo < desde:
+            return vigentes
+    archivados = _derivado_archivo(nombre_hoja, construir).por_cliente.get(id_cliente, [])
+    if not archivados:
+        return vigentes
+    ids = {tipado[0] for tipado, _ in vigentes}
+    pares = vigentes + [par for par in archivados if par[0][0] not in ids]
+    return sorted(pares, key=lambda par: clave_orden_historial(par[0]))
+
+
+def _derivado(nombre_hoja, funcion, datos):
+    if datos is not None:
+        return datos.derivado(nombre_hoja, funcion)
+    return derivado_hoja(nombre_hoja, funcion)
+
+
+def pantallas_tipadas(datos=None):
+    """
+    Obtiene las pantallas como registros tipados.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        list: Lista de Pantalla.
+    """
+    return _derivado("pantallas", _a_pantallas, datos)
+
+
+def tarifas_tipadas(datos=None):
+    """
+    Obtiene las tarifas tipadas indexadas por código de tarifa.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        dict: {codigo_tarifa: Tarifa}
+    """
+    return _derivado("tarifas", _a_tarifas, datos)
+
+
+def reservas_tipadas(datos=None):
+    """
+    Obtiene las reservas con sus fechas ya convertidas a ordinales.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        list: Lista de Reserva.
+    """
+    return _derivado("reservas", _hoja_reservas, datos).tipados
+
+
+def prereservas_tipadas(datos=None):
+    """
+    Obtiene las prereservas con sus fechas ya convertidas a ordinales.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        list: Lista de Prereserva.
+    """
+    return _derivado("prereservas", _hoja_prereservas, datos).tipados
+
+
+def detalles_reserva_por_id(datos=None):
+    """
+    Obtiene los detalles de reserva agrupados por reserva.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        dict: {id_reserva: [Detalle, ...]}
+    """
+    return _derivado("detalle_reserva", _a_detalles_reserva, datos)
+
+
+def detalles_prereserva_por_id(datos=None):
+    """
+    Obtiene los detalles de prereserva agrupados por prereserva.
+
+    Args:
+        datos (ContextoDatos o InstantaneaHojas): Si se indica, se construye sobre su copia de la
+            hoja (ver contexto.py y `instantanea_hojas`) en lugar de la caché global.
+
+    Returns:
+        dict: {id_prereserva: [Detalle, ...]}
+    """
+    return _derivado("detalle_prereserva", _a_detalles_prereserva, datos)
+
+
+def prereservas_por_id():
+    """
+    Obtiene las prereservas indexadas por ID, para resolver una sola prereserva sin recorrer la hoja.
+
+    Returns:
+        dict: {id_prereserva: (Prereserva, registro)}, donde registro es la fila original de la hoja.
+    """
+    return derivado_hoja("prereservas", _hoja_prereservas).por_id
+
+
+def reservas_por_cliente():
+    """
+    Obtiene las reservas de cada cliente ordenadas por fecha de inicio.
+
+    Returns:
+        dict: {id_cliente: [(Reserva, registro), ...]}, donde registro es la fila original de la hoja.
+    """
+    return derivado_hoja("reservas", _hoja_reservas).por_cliente
+
+
+def prereservas_por_cliente():
+    """
+    Obtiene las prereservas de cada cliente ordenadas por fecha de inicio.
+
+    Returns:
+        dict: {id_cliente: [(Prereserva, registro), ...]}, donde registro es la fila original de la hoja.
+    """
+    return derivado_hoja("prereservas", _hoja_prereservas).por_cliente
+
+
+def historial_reservas(id_cliente, desde=None):
+    """
+    Obtiene las reservas de un cliente, vigentes y archivadas, ordenadas por fecha de inicio.
+
+    Args:
+        id_cliente (str): ID del cliente.
+        desde (int): Ordinal de la fecha desde la que se filtrará el historial, si se conoce. Si
+            todas las reservas archivadas terminan antes, la hoja de archivo no se recorre.
+
+    Returns:
+        list: [(Reserva, registro), ...]
+    """
+    vigentes = reservas_por_cliente().get(id_cliente, [])
+    return _historial("reservas", vigentes, _hoja_reservas, id_cliente, desde)
+
+
+def historial_prereservas(id_cliente, desde=None):
+    """
+    Obtiene las prereservas de un cliente, vigentes y archivadas, ordenadas por fecha de inicio.
+
+    Args:
+        id_cliente (str): ID del cliente.
+        desde (int): Ordinal de la fecha desde la que se filtrará el historial, si se conoce. Si
+            todas las prereservas archivadas terminan antes, la hoja de archivo no se recorre.
+
+    Returns:
+        list: [(Prereserva, registro), ...]
+    """
+    vigentes = prereservas_por_cliente().get(id_cliente, [])
+    return _historial("prereservas", vigentes, _hoja_prereservas, id_cliente, desde)
+
+
+def detalles_reserva_archivados():
+    """
+    Obtiene los detalles de las reservas archivadas, agrupados por reserva.
+
+    Returns:
+        dict: {id_reserva: [Detalle, ...]} (vacío si aún no hay hoja de archivo).
+    """
+    return _derivado_archivo("detalle_reserva", _a_detalles_reserva)
@@ -0,0 +1,630 @@
+"""
+Módulo de cálculo de ocupación y disponibilidad de pantallas para prisma-led-back.
+
+Concentra la lógica que antes vivía en la ruta `/disponibilidad`:
+- Segundos ocupados por pantalla en un intervalo (reservas + prereservas).
+- Conflictos de fechas por pantalla.
+- Cilindros restringidos por conflicto de categoría con pautas de otros clientes.
+- Estado de cada pantalla (disponible, parcial, reservado, ocupado, restringido).
+
+Las reservas y prereservas se indexan una sola vez por versión de las hojas (ver `indice_ocupacion`):
+cada pauta guarda sus fechas como ordinales, su categoría, sus segundos por pantalla y sus
+cilindros. Así, varios escenarios de disponibilidad se evalúan contra la misma foto de los datos
+sin volver a recorrer los detalles.
+
+El calendario de ocupación (ver `calcular_calendario`) resuelve las próximas semanas de todas las
+pantallas en una sola pasada sobre las pautas y se cachea por cliente, categoría y versión de los datos.
+
+El resumen semanal (ver `resumen_semanal`) describe solo las pantallas y semanas que tocó un cambio;
+es el contenido de los eventos de ocupación (ver eventos.py).
+
+Futuro desarrollador:
+- Si cambian las reglas de ocupación (por ejemplo, el límite de 60 segundos), ajústalas aquí y en
+  validadores.py para que la disponibilidad y la validación de prereservas sigan coincidiendo.
+"""
+
+from collections import OrderedDict
+from datetime import date
+from itertools import accumulate
+from threading import Lock
+from typing import NamedTuple, Optional
+from app.services.sheets_client import instantanea_hojas
+from app.services.apartados import apartados_activos
+from app.services.modelos import (
+    se_cruzan,
+    ordinal_a_fecha,
+    pantallas_tipadas,
+    tarifas_tipadas,
+    reservas_tipadas,
+    prereservas_tipadas,
+    detalles_reserva_por_id,
+    detalles_prereserva_por_id
+)
+
+# Límite de segundos de pauta por pantalla
+SEGUNDOS_POR_PANTALLA = 60
+
+# Hojas de las que depende el cálculo de disponibilidad
+HOJAS_OCUPACION = ("pantallas", "tarifas", "reservas", "detalle_reserva", "prereservas", "detalle_prereserva")
+
+
+class Pauta(NamedTuple):
+    clave: str  # id_reserva o id_prereserva
+    id_cliente: str
+    inicio: Optional[int]
+    fin: Optional[int]
+    categoria: Optional[str]  # categoría del primer detalle
+    segundos: tuple  # ((id_pantalla, segundos), ...) por cada detalle
+    pantallas: tuple  # id_pantalla sin repetir, en orden de aparición
+    cilindros: frozenset
+    categorias_cilindro: frozenset  # {(categoria, cilindro), ...} de cada detalle
+
+
+class IndiceOcupacion(NamedTuple):
+    version: tuple  # versiones de HOJAS_OCUPACION con las que se construyó
+    pantallas: list
+    cilindro_por_pantalla: dict  # {id_pantalla: cilindro}
+    reservas: list  # [Pauta, ...]
+    prereservas: list  # [Pauta, ...], incluye los apartados vigentes de otros clientes
+
+
+_indice = {"version": None, "valor": None}
+_indice_lock = Lock()
+
+# Calendarios ya calculados: {(cliente, categoria, desde, semanas, excluida, version): calendario}
+MAX_CALENDARIOS_CACHE = 128
+_calendarios = OrderedDict()
+_calendarios_lock = Lock()
+
+
+def hay_cruce_de_fechas(f1_inicio, f1_fin, f2_inicio, f2_fin):
+    """
+    Determina si dos intervalos de fechas se cruzan.
+
+    Args:
+        f1_inicio (int): Ordinal del día de inicio del primer intervalo.
+        f1_fin (int): Ordinal del día de fin del primer intervalo.
+        f2_inicio (int): Ordinal del día de inicio del segundo intervalo.
+        f2_fin (int): Ordinal del día de fin del segundo intervalo.
+
+    Returns:
+        bool: True si los intervalos se cruzan, False en caso contrario.
+    """
+    return se_cruzan(f1_inicio, f1_fin, f2_inicio, f2_fin)
+
+
+def construir_mapa_tarifas(tarifas):
+    """
+    Construye un diccionario de códigos de tarifa a duración en segundos.
+
+    Args:
+        tarifas (dict): Tarifas tipadas {codigo_tarifa: Tarifa}.
+
+    Returns:
+        dict: {codigo_tarifa: duracion_seg}
+    """
+    return {codigo: t.duracion_seg for codigo, t in tarifas.items()}
+
+
+def _a_pautas(registros, detalles_por_id, clave, codigos_tarifa, cilindro_por_pantalla):
+    """
+    Convierte reservas o prereservas tipadas en pautas con sus detalles ya resueltos.
+    """
+    pautas = []
+    for r in registros:
+        id_pauta = getattr(r, clave)
+        detalles = detalles_por_id.get(id_pauta, [])
+        pautas.append(Pauta(
+            id_pauta, r.id_cliente, r.inicio, r.fin,
+            detalles[0].categoria if detalles else None,
+            tuple((d.id_pantalla, codigos_tarifa.get(d.codigo_tarifa, 0)) for d in detalles),
+            tuple(dict.fromkeys(d.id_pantalla for d in detalles)),
+            frozenset(cilindro_por_pantalla.get(d.id_pantalla) for d in detalles),
+            frozenset((d.categoria, cilindro_por_pantalla.get(d.id_pantalla)) for d in detalles)
+        ))
+    return pautas
+
+
+def _apartados_a_pautas(apartados, cilindro_por_pantalla):
+    """
+    Convierte apartados temporales en pautas, con la misma forma que las prereservas.
+    """
+    return [
+        Pauta(
+            a.id_apartado, a.id_cliente, a.inicio, a.fin, a.categoria,
+            a.segundos,
+            tuple(dict.fromkeys(d.id_pantalla for d in a.detalles)),
+            frozenset(cilindro_por_pantalla.get(d.id_pantalla) for d in a.detalles),
+            frozenset((d.categoria, cilindro_por_pantalla.get(d.id_pantalla)) for d in a.detalles)
+        )
+        for a in apartados
+    ]
+
+
+def indice_ocupacion(identidad=None):
+    """
+    Retorna el índice de ocupación construido sobre la versión actual de las hojas.
+
+    Las hojas que no están vigentes en caché se leen en una sola llamada batch; el índice solo
+    se reconstruye si cambió la versión de alguna de ellas.
+
+    Args:
+        identidad (str): ID del cliente que consulta. Si se indica, los apartados vigentes de los
+            demás clientes se agregan a las prereservas y su firma se agrega a la versión.
+
+    Returns:
+        IndiceOcupacion: Pantallas, reservas y prereservas indexadas.
+    """
+    # La versión y los datos del índice salen de la misma lectura de la caché, así que un índice
+    # (y el ETag del calendario) nunca queda guardado con una versión distinta a la de sus datos
+    hojas = instantanea_hojas(*HOJAS_OCUPACION)
+    with _indice_lock:
+        indice = _indice["valor"] if _indice["version"] == hojas.versiones else None
+    if indice is None:
+        indice = _construir_indice(hojas)
+    if identidad is None:
+        return indice
+
+    ajenos = [a for a in apartados_activos() if a.id_cliente != identidad]
+    if not ajenos:
+        return indice
+    return indice._replace(
+        version=indice.version + (tuple(sorted(a.id_apartado for a in ajenos)),),
+        prereservas=indice.prereservas + _apartados_a_pautas(ajenos, indice.cilindro_por_pantalla)
+    )
+
+
+def _construir_indice(hojas):
+    """
+    Construye el índice de ocupación desde una instantánea de las hojas y lo guarda para su versión.
+    """
+    pantallas = pantallas_tipadas(hojas)
+    cilindro_por_pantalla = {p.id_pantalla: p.cilindro for p in pantallas}
+    codigos_tarifa = construir_mapa_tarifas(tarifas_tipadas(hojas))
+    indice = IndiceOcupacion(
+        hojas.versiones,
+        pantallas,
+        cilindro_por_pantalla,
+        _a_pautas(reservas_tipadas(hojas), detalles_reserva_por_id(hojas), "id_reserva", codigos_tarifa, cilindro_por_pantalla),
+        _a_pautas(prereservas_tipadas(hojas), detalles_prereserva_por_id(hojas), "id_prereserva", codigos_tarifa, cilindro_por_pantalla)
+    )
+    with _indice_lock:
+        _indice["version"], _indice["valor"] = hojas.versiones, indice
+    return indice
+
+
+def segundos_ocupados_en_intervalo(pautas, fecha_inicio, fecha_fin):
+    """
+    Calcula los segundos ocupados por pantalla en un intervalo de fechas.
+
+    Args:
+        pautas (list): Lista de Pauta (reservas o prereservas).
+        fecha_inicio (int): Ordinal del día de inicio del intervalo.
+        fecha_fin (int): Ordinal del día de fin del intervalo.
+
+    Returns:
+        dict: {id_pantalla: segundos_ocupados}
+    """
+    ocupacion = {}
+    for p in pautas:
+        if not hay_cruce_de_fechas(p.inicio, p.fin, fecha_inicio, fecha_fin):
+            continue
+        for id_pantalla, segundos in p.segundos:
+            ocupacion[id_pantalla] = ocupacion.get(id_pantalla, 0) + segundos
+    return ocupacion
+
+
+def obtener_conflictos(pautas, fecha_inicio, fecha_fin):
+    """
+    Obtiene los conflictos de ocupación por pantalla en un intervalo de fechas.
+
+    Args:
+        pautas (list): Lista de Pauta (reservas o prereservas).
+        fecha_inicio (int): Ordinal del día de inicio del intervalo.
+        fecha_fin (int): Ordinal del día de fin del intervalo.
+
+    Returns:
+        dict: {id_pantalla: [(fecha_inicio, fecha_fin), ...]} con los conflictos encontrados.
+    """
+    conflictos = {}
+    for p in pautas:
+        if not hay_cruce_de_fechas(p.inicio, p.fin, fecha_inicio, fecha_fin):
+            continue
+        for id_pantalla in p.pantallas:
+            conflictos.setdefault(id_pantalla, []).append((ordinal_a_fecha(p.inicio), ordinal_a_fecha(p.fin)))
+    return conflictos
+
+
+def cilindros_restringidos(pautas, identidad, categoria_cliente, fecha_inicio, fecha_fin):
+    """
+    Obtiene los cilindros con una pauta de otro cliente de la misma categoría en el intervalo.
+
+    Args:
+        pautas (list): Lista de Pauta (reservas o prereservas).
+        identidad (str): ID del cliente que consulta.
+        categoria_cliente (str): Categoría de la pauta del cliente.
+        fecha_inicio (int): Ordinal del día de inicio del intervalo.
+        fecha_fin (int): Ordinal del día de fin del intervalo.
+
+    Returns:
+        set: Cilindros restringidos.
+    """
+    cilindros = set()
+    for p in pautas:
+        if p.id_cliente == identidad or p.categoria != categoria_cliente:
+            continue
+        if hay_cruce_de_fechas(p.inicio, p.fin, fecha_inicio, fecha_fin):
+            cilindros |= p.cilindros
+    return cilindros
+
+
+def estado_pantalla(segundos_disponibles, hay_reserva, hay_prereserva, restringido):
+    """
+    Determina el estado de una pantalla en un intervalo.
+
+    - reservado: una prereserva cruza el intervalo y no quedan segundos libres.
+    - ocupado: una reserva cruza el intervalo y no quedan segundos libres.
+    - restringido: quedan segundos, pero otra pauta de la misma categoría ocupa el cilindro.
+    - parcial / disponible: según los segundos libres.
+
+    Args:
+        segundos_disponibles (int): Segundos libres de la pantalla en el intervalo.
+        hay_reserva (bool): Si alguna reserva que incluye la pantalla cruza el intervalo.
+        hay_prereserva (bool): Si alguna prereserva que incluye la pantalla cruza el intervalo.
+        restringido (bool): Si el cilindro de la pantalla tiene conflicto de categoría.
+
+    Returns:
+        str: Estado de la pantalla.
+    """
+    if hay_prereserva and segundos_disponibles <= 0:
+        return "reservado"
+    if hay_reserva and segundos_disponibles <= 0:
+        return "ocupado"
+    if restringido:
+        return "restringido"
+    if hay_reserva or segundos_disponibles < SEGUNDOS_POR_PANTALLA:
+        return "parcial"
+    return "disponible"
+
+
+def _estado_pantalla(segundos_disponibles, conflictos_reserva, conflictos_prereserva, restringido, cilindro):
+    """
+    Determina el estado y el mensaje de una pantalla a partir de su ocupación y conflictos.
+
+    Returns:
+        tuple: (estado, mensaje)
+    """
+    estado = estado_pantalla(segundos_disponibles, bool(conflictos_reserva), bool(conflictos_prereserva), restringido)
+    if estado == "restringido":
+        mensaje = f"Conflicto de categoría con otra pauta en cilindro {cilindro}"
+    elif estado == "reservado":
+        mensaje = "Pauta activa periodo: " + ", ".join([f"{f[0]} a {f[1]}" for f in conflictos_prereserva])
+    elif conflictos_reserva:
+        mensaje = "Pauta activa periodo: " + ", ".join([f"{f[0]} a {f[1]}" for f in conflictos_reserva])
+    elif segundos_disponibles < SEGUNDOS_POR_PANTALLA:
+        mensaje = f"Disponible parcialmente ({segundos_disponibles} segundos libres)"
+    else:
+        mensaje = "Pantalla completamente disponible"
+    return estado, mensaje
+
+
+def calcular_disponibilidad(indice, identidad, categoria_cliente, inicio, fin, excluir_prereserva_id=None):
+    """
+    Calcula el estado de cada pantalla para un escenario (intervalo y categoría).
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación (ver indice_ocupacion).
+        identidad (str): ID del cliente que consulta.
+        categoria_cliente (str): Categoría de la pauta del cliente.
+        inicio (int): Ordinal del día de inicio del intervalo.
+        fin (int): Ordinal del día de fin del intervalo.
+        excluir_prereserva_id (str): Prereserva a ignorar (la propia, cuando se está editando).
+
+    Returns:
+        dict: {id_pantalla: {"estado", "mensaje", "cilindro", "identificador", "segundos_disponibles"}}
+    """
+    reservas = indice.reservas
+    prereservas = indice.prereservas
+    if excluir_prereserva_id:
+        prereservas = [p for p in prereservas if p.clave != excluir_prereserva_id]
+
+    ocupados_reserva = segundos_ocupados_en_intervalo(reservas, inicio, fin)
+    ocupados_prereserva = segundos_ocupados_en_intervalo(prereservas, inicio, fin)
+    conflictos_reserva = obtener_conflictos(reservas, inicio, fin)
+    conflictos_prereserva = obtener_conflictos(prereservas, inicio, fin)
+    restringidos = (
+        cilindros_restringidos(reservas, identidad, categoria_cliente, inicio, fin)
+        | cilindros_restringidos(prereservas, identidad, categoria_cliente, inicio, fin)
+    )
+
+    resultado = {}
+    for p in indice.pantallas:
+        ocupados = ocupados_reserva.get(p.id_pantalla, 0) + ocupados_prereserva.get(p.id_pantalla, 0)
+        segundos_disponibles = max(0, SEGUNDOS_POR_PANTALLA - ocupados)
+        estado, mensaje = _estado_pantalla(
+            segundos_disponibles,
+            conflictos_reserva.get(p.id_pantalla, []),
+            conflictos_prereserva.get(p.id_pantalla, []),
+            p.cilindro in restringidos,
+            p.cilindro
+        )
+        resultado[p.id_pantalla] = {
+            "estado": estado,
+            "mensaje": mensaje,
+            "cilindro": p.cilindro,
+            "identificador": p.identificador,
+            "segundos_disponibles": segundos_disponibles
+        }
+    return resultado
+
+
+def _rango_semanas(pauta, desde, semanas, dias=7):
+    """
+    Calcula qué ventanas semanales cruza una pauta.
+
+    La ventana w es el intervalo [desde + 7w, desde + 7w + dias] (extremos incluidos). Con dias=7
+    coincide con una consulta de disponibilidad de una semana.
+
+    Returns:
+        tuple or None: (primera, ultima) ventana cruzada, o None si no cruza ninguna.
+    """
+    if pauta.inicio is None or pauta.fin is None:
+        return None
+    primera = max(0, -((desde + dias - pauta.inicio) // 7))
+    ultima = min(semanas - 1, (pauta.fin - desde) // 7)
+    return (primera, ultima) if primera <= ultima else None
+
+
+def _sumar_rango(acumulado, rango, valor):
+    acumulado[rango[0]] += valor
+    acumulado[rango[1] + 1] -= valor
+
+
+def _prefijos(acumulado, semanas):
+    return list(accumulate(acumulado[:semanas]))
+
+
+def calcular_calendario(indice, identidad, categoria_cliente, desde, semanas=52, excluir_prereserva_id=None):
+    """
+    Calcula, para cada pantalla y cada una de las próximas semanas, los segundos libres y el estado.
+
+    Cada pauta se recorre una sola vez: sus segundos y conflictos se acumulan con arreglos de
+    diferencias sobre el rango de semanas que cruza, y luego una suma de prefijos da el valor de
+    cada semana. El resultado coincide con consultar /disponibilidad semana por semana.
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación (ver indice_ocupacion).
+        identidad (str): ID del cliente que consulta.
+        categoria_cliente (str): Categoría de la pauta del cliente.
+        desde (int): Ordinal del día de inicio de la primera semana.
+        semanas (int): Número de semanas del calendario.
+        excluir_prereserva_id (str): Prereserva a ignorar (la propia, cuando se está editando).
+
+    Returns:
+        dict: {
+            "semanas": ["YYYY-MM-DD", ...],
+            "pantallas": { id_pantalla: { "cilindro", "identificador",
+                                          "segundos_disponibles": [int, ...], "estados": [str, ...] } }
+        }
+    """
+    prereservas = indice.prereservas
+    if excluir_prereserva_id:
+        prereservas = [p for p in prereservas if p.clave != excluir_prereserva_id]
+
+    ocupados = {id_pantalla: [0] * (semanas + 1) for id_pantalla in indice.cilindro_por_pantalla}
+    con_reserva = {id_pantalla: [0] * (semanas + 1) for id_pantalla in indice.cilindro_por_pantalla}
+    con_prereserva = {id_pantalla: [0] * (semanas + 1) for id_pantalla in indice.cilindro_por_pantalla}
+    restringidos = {}
+
+    for pautas, conflictos in ((indice.reservas, con_reserva), (prereservas, con_prereserva)):
+        for p in pautas:
+            rango = _rango_semanas(p, desde, semanas)
+            if rango is None:
+                continue
+            for id_pantalla, segundos in p.segundos:
+                if id_pantalla in ocupados:
+                    _sumar_rango(ocupados[id_pantalla], rango, segundos)
+            for id_pantalla in p.pantallas:
+                if id_pantalla in conflictos:
+                    _sumar_rango(conflictos[id_pantalla], rango, 1)
+            if p.id_cliente != identidad and p.categoria == categoria_cliente:
+                for cilindro in p.cilindros:
+                    _sumar_rango(restringidos.setdefault(cilindro, [0] * (semanas + 1)), rango, 1)
+
+    restringidos = {cilindro: _prefijos(a, semanas) for cilindro, a in restringidos.items()}
+    sin_restriccion = [0] * semanas
+
+    resultado = {}
+    for p in indice.pantallas:
+        ocupado = _prefijos(ocupados[p.id_pantalla], semanas)
+        reserva = _prefijos(con_reserva[p.id_pantalla], semanas)
+        prereserva = _prefijos(con_prereserva[p.id_pantalla], semanas)
+        restringido = restringidos.get(p.cilindro, sin_restriccion)
+        libres = [max(0, SEGUNDOS_POR_PANTALLA - s) for s in ocupado]
+        resultado[p.id_pantalla] = {
+            "cilindro": p.cilindro,
+            "identificador": p.identificador,
+            "segundos_disponibles": libres,
+            "estados": [
+                estado_pantalla(libres[w], reserva[w] > 0, prereserva[w] > 0, restringido[w] > 0)
+                for w in range(semanas)
+            ]
+        }
+
+    return {
+        "semanas": [date.fromordinal(desde + 7 * w).isoformat() for w in range(semanas)],
+        "pantallas": resultado
+    }
+
+
+def calendario_ocupacion(identidad, categoria_cliente, desde, semanas=52, excluir_prereserva_id=None):
+    """
+    Retorna el calendario de ocupación, cacheado por cliente, parámetros y versión de los datos.
+
+    Returns:
+        tuple: (version, calendario), donde version identifica los datos con que se calculó.
+    """
+    indice = indice_ocupacion(identidad)
+    clave = (identidad, categoria_cliente, desde, semanas, excluir_prereserva_id, indice.version)
+    with _calendarios_lock:
+        if clave in _calendarios:
+            _calendarios.move_to_end(clave)
+            return indice.version, _calendarios[clave]
+
+    calendario = calcular_calendario(indice, identidad, categoria_cliente, desde, semanas, excluir_prereserva_id)
+    with _calendarios_lock:
+        _calendarios[clave] = calendario
+        while len(_calendarios) > MAX_CALENDARIOS_CACHE:
+            _calendarios.popitem(last=False)
+    return indice.version, calendario
+
+
+def resumen_semanal(indice, afectados):
+    """
+    Resume la ocupación de las pantallas y semanas (de lunes a lunes) que toca un cambio.
+
+    Las semanas usan la misma ventana que el calendario: [lunes, lunes + 7]. Los segundos
+    disponibles no dependen del cliente; los bloqueos de categoría incluyen los clientes que los
+    causan para que cada suscriptor descarte los propios.
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación (sin apartados).
+        afectados (list): [(inicio (int), fin (int), [id_pantalla, ...]), ...] periodos y pantallas
+            antes y después del cambio.
+
+    Returns:
+        dict: {
+            "semanas": [ "YYYY-MM-DD", ... ],
+            "pantallas": [ { "id_pantalla", "cilindro", "segundos_disponibles": [int por semana] } ],
+            "bloqueos": [ { "cilindro", "semana", "categoria", "clientes": [id_cliente, ...] } ]
+        }
+    """
+    semanas = set()
+    for inicio, fin, _ in afectados:
+        if inicio is None or fin is None:
+            continue
+        primera = inicio - 7 + (-date.fromordinal(inicio - 7).weekday()) % 7
+        semanas.update(range(primera, fin + 1, 7))
+    semanas = sorted(semanas)
+    pantallas = list(dict.fromkeys(
+        id_pantalla for _, _, ids in afectados for id_pantalla in ids
+        if id_pantalla in indice.cilindro_por_pantalla
+    ))
+    cilindros = {indice.cilindro_por_pantalla[i] for i in pantallas}
+
+    pautas = indice.reservas + indice.prereservas
+    libres = {id_pantalla: [] for id_pantalla in pantallas}
+    bloqueos = {}
+    for lunes in semanas:
+        ocupados = segundos_ocupados_en_intervalo(pautas, lunes, lunes + 7)
+        for id_pantalla in pantallas:
+            libres[id_pantalla].append(max(0, SEGUNDOS_POR_PANTALLA - ocupados.get(id_pantalla, 0)))
+        for p in pautas:
+            if not hay_cruce_de_fechas(p.inicio, p.fin, lunes, lunes + 7):
+                continue
+            for categoria, cilindro in p.categorias_cilindro:
+                if cilindro in cilindros:
+                    bloqueos.setdefault((cilindro, lunes, categoria), set()).add(p.id_cliente)
+
+    return {
+        "semanas": [date.fromordinal(lunes).isoformat() for lunes in semanas],
+        "pantallas": [
+            {
+                "id_pantalla": id_pantalla,
+                "cilindro": indice.cilindro_por_pantalla[id_pantalla],
+                "segundos_disponibles": libres[id_pantalla]
+            }
+            for id_pantalla in pantallas
+        ],
+        "bloqueos": [
+            {
+                "cilindro": cilindro,
+                "semana": date.fromordinal(lunes).isoformat(),
+                "categoria": categoria,
+                "clientes": sorted(clientes)
+            }
+            for (cilindro, lunes, categoria), clientes in sorted(bloqueos.items(), key=lambda b: (str(b[0][0]), b[0][1], str(b[0][2])))
+        ]
+    }
+
+
+def buscar_primeras_fechas(indice, identidad, categoria_cliente, segundos, duracion_semanas, desde,
+                           horizonte=52, pantallas=None, por_cilindro=None, max_resultados=5,
+                           excluir_prereserva_id=None):
+    """
+    Busca las primeras semanas de inicio en las que cabe una campaña.
+
+    Para cada inicio candidato (desde, desde + 7, ...) se suman, por pantalla, los segundos de todas
+    las pautas que cruzan cualquier parte del periodo [inicio, inicio + 7 * duracion_semanas], igual
+    que `validar_detalle_prereserva`. Un inicio es factible si cada pantalla queda en 60 segundos o
+    menos y ningún cilindro usado tiene una pauta de otro cliente de la misma categoría en el periodo.
+    Todas las ventanas se calculan en una sola pasada sobre las pautas (arreglos de diferencias).
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación (ver indice_ocupacion).
+        identidad (str): ID del cliente que consulta.
+        categoria_cliente (str): Categoría de la campaña.
+        segundos (int): Segundos por pantalla.
+        duracion_semanas (int): Duración de la campaña en semanas.
+        desde (int): Ordinal del día del primer inicio candidato.
+        horizonte (int): Número de inicios semanales a evaluar.
+        pantallas (list): IDs de pantallas exactas a reservar, o
+        por_cilindro (dict): {cilindro (str): cantidad de pantallas} a elegir en cada cilindro.
+        max_resultados (int): Máximo de inicios factibles a retornar.
+        excluir_prereserva_id (str): Prereserva propia a ignorar (cuando se está editando).
+
+    Returns:
+        list: [(inicio (int), [id_pantalla, ...]), ...] en orden cronológico.
+    """
+    dias = 7 * duracion_semanas
+    prereservas = indice.prereservas
+    if excluir_prereserva_id:
+        prereservas = [p for p in prereservas if p.clave != excluir_prereserva_id]
+
+    ocupados = {id_pantalla: [0] * (horizonte + 1) for id_pantalla in indice.cilindro_por_pantalla}
+    bloqueados = {}
+    for pautas in (indice.reservas, prereservas):
+        for p in pautas:
+            rango = _rango_semanas(p, desde, horizonte, dias)
+            if rango is None:
+                continue
+            for id_pantalla, segundos_pauta in p.segundos:
+                if id_pantalla in ocupados:
+                    _sumar_rango(ocupados[id_pantalla], rango, segundos_pauta)
+            if p.id_cliente == identidad:
+                continue
+            for categoria, cilindro in p.categorias_cilindro:
+                if categoria == categoria_cliente:
+                    _sumar_rango(bloqueados.setdefault(cilindro, [0] * (horizonte + 1)), rango, 1)
+
+    ocupados = {id_pantalla: _prefijos(a, horizonte) for id_pantalla, a in ocupados.items()}
+    bloqueados = {cilindro: _prefijos(a, horizonte) for cilindro, a in bloqueados.items()}
+    maximo = SEGUNDOS_POR_PANTALLA - segundos
+    sin_bloqueo = (0,) * horizonte
+
+    if pantallas is not None:
+        grupos = [([id_pantalla], 1) for id_pantalla in pantallas]
+    else:
+        pantallas_por_cilindro = {}
+        for id_pantalla, cilindro in indice.cilindro_por_pantalla.items():
+            pantallas_por_cilindro.setdefault(str(cilindro), []).append(id_pantalla)
+        grupos = [(pantallas_por_cilindro.get(str(c), []), cantidad) for c, cantidad in por_cilindro.items()]
+
+    resultados = []
+    for w in range(horizonte):
+        asignacion = []
+        for candidatas, cantidad in grupos:
+            libres = [
+                i for i in candidatas
+                if ocupados[i][w] <= maximo
+                and not bloqueados.get(indice.cilindro_por_pantalla[i], sin_bloqueo)[w]
+            ]
+            if len(libres) < cantidad:
+                break
+            # Se prefieren las pantallas con menos segundos ocupados
+            asignacion.extend(sorted(libres, key=lambda i: ocupados[i][w])[:cantidad])
+        else:
+            resultados.append((desde + 7 * w, asignacion))
+            if len(resultados) >= max_resultados:
+                break
+    return resultados
@@ -0,0 +1,224 @@
+"""
+Módulo optimizador de asignación de cupos para prisma-led-back.
+
+Dada una campaña (cupos de 20 segundos deseados, periodo, categoría y cilindros preferidos),
+propone qué pantallas usar y con qué tarifa, respetando las reglas de `validar_detalle_prereserva`:
+- Máximo 60 segundos por pantalla sumando todas las pautas del periodo.
+- Ningún cilindro con una pauta de otro cliente de la misma categoría en el periodo.
+
+Entre las asignaciones válidas se busca la que deja menos segundos sueltos en las pantallas usadas
+(llenar primero las pantallas que ya están parcialmente ocupadas), con menos pantallas y dentro de
+los cilindros preferidos. La búsqueda es una programación dinámica tipo mochila sobre el número de
+cupos; si se agota el presupuesto de tiempo, se completa con una asignación voraz.
+
+Futuro desarrollador:
+- Los pesos del costo (PENALIZACION_*) definen qué se prefiere; ajústalos si cambian las prioridades comerciales.
+"""
+
+import time
+from typing import NamedTuple
+from app.services.ocupacion import SEGUNDOS_POR_PANTALLA, hay_cruce_de_fechas, segundos_ocupados_en_intervalo
+
+# Cada cupo de pauta es de 20 segundos
+SEGUNDOS_POR_CUPO = 20
+
+# Costo adicional por usar una pantalla y por usarla fuera de los cilindros preferidos
+PENALIZACION_PANTALLA = 1
+PENALIZACION_NO_PREFERIDO = SEGUNDOS_POR_PANTALLA
+
+# Presupuesto de tiempo por defecto para la búsqueda exacta, en milisegundos
+PRESUPUESTO_MS = 200
+
+
+class Opcion(NamedTuple):
+    id_pantalla: str
+    cilindro: int
+    identificador: str
+    segundos_libres: int
+    cupos_posibles: tuple  # cantidades de cupos que se pueden asignar (según tarifas y espacio libre)
+    preferida: bool
+
+
+def _costo(opcion, cupos):
+    """
+    Costo de asignar `cupos` a una pantalla: segundos que quedan sueltos más penalizaciones.
+    """
+    sobrante = opcion.segundos_libres - cupos * SEGUNDOS_POR_CUPO
+    return sobrante + PENALIZACION_PANTALLA + (0 if opcion.preferida else PENALIZACION_NO_PREFERIDO)
+
+
+def cilindros_bloqueados(pautas, identidad, categoria_cliente, inicio, fin):
+    """
+    Obtiene los cilindros con un detalle de otro cliente de la misma categoría en el periodo
+    (misma regla que validar_detalle_prereserva).
+
+    Returns:
+        set: Cilindros bloqueados.
+    """
+    bloqueados = set()
+    for p in pautas:
+        if p.id_cliente == identidad or not hay_cruce_de_fechas(p.inicio, p.fin, inicio, fin):
+            continue
+        bloqueados.update(c for categoria, c in p.categorias_cilindro if categoria == categoria_cliente)
+    return bloqueados
+
+
+def opciones_de_pantalla(indice, duraciones, identidad, categoria_cliente, inicio, fin,
+                         cilindros_preferidos=None, excluir_prereserva_id=None):
+    """
+    Calcula las pantallas utilizables en el periodo y cuántos cupos admite cada una.
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación.
+        duraciones (set): Duraciones en segundos que tienen una tarifa.
+        identidad (str): ID del cliente.
+        categoria_cliente (str): Categoría de la campaña.
+        inicio (int): Ordinal del día de inicio del periodo.
+        fin (int): Ordinal del día de fin del periodo.
+        cilindros_preferidos (set): Cilindros preferidos (como texto), o None.
+        excluir_prereserva_id (str): Prereserva propia a ignorar (cuando se está editando).
+
+    Returns:
+        list: Lista de Opcion.
+    """
+    prereservas = indice.prereservas
+    if excluir_prereserva_id:
+        prereservas = [p for p in prereservas if p.clave != excluir_prereserva_id]
+
+    ocupados = segundos_ocupados_en_intervalo(indice.reservas, inicio, fin)
+    for id_pantalla, segundos in segundos_ocupados_en_intervalo(prereservas, inicio, fin).items():
+        ocupados[id_pantalla] = ocupados.get(id_pantalla, 0) + segundos
+    bloqueados = (
+        cilindros_bloqueados(indice.reservas, identidad, categoria_cliente, inicio, fin)
+        | cilindros_bloqueados(prereservas, identidad, categoria_cliente, inicio, fin)
+    )
+
+    opciones = []
+    for p in indice.pantallas:
+        if p.cilindro in bloqueados:
+            continue
+        libres = SEGUNDOS_POR_PANTALLA - ocupados.get(p.id_pantalla, 0)
+        cupos = tuple(
+            k for k in range(1, SEGUNDOS_POR_PANTALLA // SEGUNDOS_POR_CUPO + 1)
+            if k * SEGUNDOS_POR_CUPO <= libres and k * SEGUNDOS_POR_CUPO in duraciones
+        )
+        if cupos:
+            preferida = not cilindros_preferidos or str(p.cilindro) in cilindros_preferidos
+            opciones.append(Opcion(p.id_pantalla, p.cilindro, p.identificador, libres, cupos, preferida))
+    return opciones
+
+
+def _asignacion_voraz(opciones, cupos):
+    """
+    Asigna cupos llenando primero las pantallas preferidas con menos espacio libre.
+
+    Returns:
+        list: [(Opcion, cupos_asignados), ...]
+    """
+    asignacion, restantes = [], cupos
+    for opcion in sorted(opciones, key=lambda o: (not o.preferida, o.segundos_libres)):
+        if restantes <= 0:
+            break
+        posibles = [k for k in opcion.cupos_posibles if k <= restantes]
+        if posibles:
+            asignacion.append((opcion, max(posibles)))
+            restantes -= max(posibles)
+    return asignacion
+
+
+def _asignacion_exacta(opciones, cupos, limite):
+    """
+    Programación dinámica sobre el número de cupos: para cada total alcanzable guarda la asignación
+    de menor costo. Retorna None si se supera el instante `limite` (time.perf_counter).
+
+    Returns:
+        list or None: [(Opcion, cupos_asignados), ...] para el mayor total alcanzable <= cupos.
+    """
+    infinito = float("inf")
+    mejor = [0] + [infinito] * cupos
+    elecciones = []  # por cada pantalla, {total: cupos asignados a esa pantalla}
+    for opcion in opciones:
+        if time.perf_counter() > limite:
+            return None
+        nuevo = list(mejor)
+        eleccion = {}
+        for total in range(cupos + 1):
+            if mejor[total] == infinito:
+                continue
+            for k in opcion.cupos_posibles:
+                destino = total + k
+                if destino > cupos:
+                    break
+                costo = mejor[total] + _costo(opcion, k)
+                if costo < nuevo[destino]:
+                    nuevo[destino] = costo
+                    eleccion[destino] = k
+        mejor = nuevo
+        elecciones.append(eleccion)
+
+    total = max(t for t in range(cupos + 1) if mejor[t] < infinito)
+    asignacion = []
+    for opcion, eleccion in zip(reversed(opciones), reversed(elecciones)):
+        k = eleccion.get(total)
+        if k:
+            asignacion.append((opcion, k))
+            total -= k
+    return asignacion[::-1]
+
+
+def optimizar_asignacion(indice, tarifas, identidad, categoria_cliente, cupos, inicio, fin,
+                         cilindros_preferidos=None, excluir_prereserva_id=None, presupuesto_ms=PRESUPUESTO_MS):
+    """
+    Propone pantallas y tarifas para una campaña de `cupos` cupos de 20 segundos.
+
+    Args:
+        indice (IndiceOcupacion): Índice de ocupación.
+        tarifas (dict): Tarifas tipadas {codigo_tarifa: Tarifa}.
+        identidad (str): ID del cliente.
+        categoria_cliente (str): Categoría de la campaña.
+        cupos (int): Cupos deseados.
+        inicio (int): Ordinal del día de inicio del periodo.
+        fin (int): Ordinal del día de fin del periodo.
+        cilindros_preferidos (list): Cilindros preferidos, o None.
+        excluir_prereserva_id (str): Prereserva propia a ignorar.
+        presupuesto_ms (int): Tiempo máximo de la búsqueda exacta.
+
+    Returns:
+        dict: {
+            "completo": bool, "cupos_asignados": int, "metodo": "exacto" | "voraz",
+            "segundos_sobrantes": int,
+            "pantallas": [ { "id_pantalla", "cilindro", "identificador", "cod_tarifas", "segundos" } ]
+        }
+    """
+    codigo_por_duracion = {}
+    for codigo, t in tarifas.items():
+        codigo_por_duracion.setdefault(t.duracion_seg, codigo)
+    preferidos = {str(c) for c in cilindros_preferidos} if cilindros_preferidos else None
+
+    opciones = opciones_de_pantalla(
+        indice, set(codigo_por_duracion), identidad, categoria_cliente, inicio, fin,
+        preferidos, excluir_prereserva_id
+    )
+    limite = time.perf_counter() + presupuesto_ms / 1000
+    asignacion = _asignacion_exacta(opciones, cupos, limite)
+    metodo = "exacto"
+    if asignacion is None:
+        asignacion, metodo = _asignacion_voraz(opciones, cupos), "voraz"
+
+    asignados = sum(k for _, k in asignacion)
+    return {
+        "completo": asignados == cupos,
+        "cupos_asignados": asignados,
+        "metodo": metodo,
+        "segundos_sobrantes": sum(o.segundos_libres - k * SEGUNDOS_POR_CUPO for o, k in asignacion),
+        "pantallas": [
+            {
+                "id_pantalla": o.id_pantalla,
+                "cilindro": o.cilindro,
+                "identificador": o.identificador,
+                "cod_tarifas": codigo_por_duracion[k * SEGUNDOS_POR_CUPO],
+                "segundos": k * SEGUNDOS_POR_CUPO
+            }
+            for o, k in asignacion
+        ]
+    }
@@ -0,0 +1,174 @@
+"""
+Módulo de recordatorios de prereservas pendientes para prisma-led-back.
+
+El correo de confirmación le da al cliente PLAZO_VIDEO_DIAS días (contados desde la fecha de
+creación) para compartir el video de la campaña. Este módulo busca las prereservas 'pendiente'
+a las que les quedan RECORDATORIO_DIAS_ANTES días o menos, les envía un recordatorio y las marca
+en la columna 'recordatorio_enviado' de la hoja de prereservas.
+
+Se ejecuta desde la línea de comandos (ver app/comandos.py):
+
+    flask --app run recordatorios [--simular] [--limite N] [--hoy YYYY-MM-DD]
+
+Características clave:
+- Todos los recordatorios se renderizan en lote con la plantilla compilada (ver correos.py).
+- Se envían por una sola sesión SMTP (mail.connect()), con una pausa entre correos
+  (RECORDATORIO_PAUSA_SEGUNDOS). Si el servidor limita los correos por sesión, MAIL_MAX_EMAILS
+  hace que Flask-Mail reconecte automáticamente.
+- Las prereservas con recordatorio enviado se marcan con una sola transacción al final.
+
+Futuro desarrollador:
+- Si un correo falla, la prereserva no se marca y se reintenta en la siguiente ejecución. Las que
+  ya salieron se marcan aunque la sesión se corte a mitad del lote.
+- La columna 'recordatorio_enviado' se crea sola la primera vez que se marca una prereserva.
+"""
+
+import smtplib
+import time
+import traceback
+from datetime import date, datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from app.extensions import mail
+from app.services.correos import renderizar_recordatorios
+from app.services.transacciones import confirmar_transaccion, TransaccionInvalida
+from app.services.sheets_client import (
+    get_prereservas,
+    get_clientes,
+    asegurar_columna
+)
+
+COLUMNA_RECORDATORIO = "recordatorio_enviado"
+
+
+def fecha_limite_video(prereserva):
+    """
+    Fecha límite para compartir el video de una prereserva (fecha de creación + PLAZO_VIDEO_DIAS).
+
+    Args:
+        prereserva (dict): Registro de la hoja de prereservas.
+
+    Returns:
+        date or None: Fecha límite, o None si la fecha de creación no es válida.
+    """
+    try:
+        creada = datetime.strptime(str(prereserva.get("fecha_creacion", "")).strip(), "%Y-%m-%d").date()
+    except ValueError:
+        return None
+    return creada + timedelta(days=current_app.config["PLAZO_VIDEO_DIAS"])
+
+
+def prereservas_por_recordar(prereservas, hoy=None):
+    """
+    Selecciona las prereservas pendientes cuyo plazo vence en RECORDATORIO_DIAS_ANTES días o menos
+    (sin haber vencido) y que aún no tienen recordatorio.
+
+    Args:
+        prereservas (list): Registros de la hoja de prereservas.
+        hoy (date): Fecha de referencia (por defecto, hoy).
+
+    Returns:
+        list: [(registro, fecha_limite), ...]
+    """
+    hoy = hoy or date.today()
+    dias_antes = current_app.config["RECORDATORIO_DIAS_ANTES"]
+    seleccion = []
+    for p in prereservas:
+        if str(p.get("estado", "")).strip().lower() != "pendiente":
+            continue
+        if str(p.get(COLUMNA_RECORDATORIO, "")).strip().lower() == "sí":
+            continue
+        limite = fecha_limite_video(p)
+        if limite is not None and 0 <= (limite - hoy).days <= dias_antes:
+            seleccion.append((p, limite))
+    return seleccion
+
+
+def _marcar_recordatorios(ids_prereserva):
+    """
+    Marca 'recordatorio_enviado' en las prereservas indicadas con una sola transacción (ver
+    transacciones.py). Las prereservas eliminadas mientras se enviaban los correos se omiten.
+    """
+    asegurar_columna("prereservas", COLUMNA_RECORDATORIO)
+    existentes = {str(p["id_prereserva"]) for p in get_prereservas(fresco=True)}
+    marcar = [i for i in ids_prereserva if i in existentes]
+    if not marcar:
+        return 0
+    try:
+        confirmar_transaccion([
+            {"tipo": "actualizar", "hoja": "prereservas", "clave": i, "valores": {COLUMNA_RECORDATORIO: "sí"}}
+            for i in marcar
+        ])
+    except TransaccionInvalida as e:
+        # Una prereserva se eliminó entre la lectura y la escritura; se marcan en la próxima ejecución
+        print(f"[RECORDATORIOS] No se marcaron los recordatorios: {e}")
+        return 0
+    return len(marcar)
+
+
+def enviar_recordatorios(hoy=None, limite=None, simular=False):
+    """
+    Envía los recordatorios pendientes por una sola sesión SMTP y los marca en la hoja.
+
+    Args:
+        hoy (date): Fecha de referencia (por defecto, hoy).
+        limite (int): Máximo de recordatorios a enviar en esta ejecución.
+        simular (bool): Si es True solo selecciona y renderiza, sin enviar ni marcar.
+
+    Returns:
+        dict: { "candidatas", "enviados", "fallidos", "marcadas", "segundos" }
+    """
+    inicio = time.perf_counter()
+    seleccion = prereservas_por_recordar(get_prereservas(fresco=True), hoy)
+    if limite is not None:
+        seleccion = seleccion[:limite]
+
+    clientes = {str(c.get("id_cliente")): c for c in get_clientes()}
+    hoy = hoy or date.today()
+    destinatarios, lote = [], []
+    for p, fecha_limite in seleccion:
+        cliente = clientes.get(str(p.get("id_cliente")), {})
+        correo = str(cliente.get("correo_electronico", "")).strip()
+        if not correo:
+            print(f"[RECORDATORIOS] La prereserva {p['id_prereserva']} no tiene correo de cliente")
+            continue
+        destinatarios.append((str(p["id_prereserva"]), correo))
+        lote.append({
+            "razon_social": cliente.get("razon_social", ""),
+            "uxid": p.get("uxid"),
+            "fecha_inicio": p.get("fecha_inicio"),
+            "fecha_fin": p.get("fecha_fin"),
+            "fecha_limite": fecha_limite.isoformat(),
+            "dias_restantes": (fecha_limite - hoy).days
+        })
+    mensajes = renderizar_recordatorios(lote)
+
+    resumen = {"candidatas": len(seleccion), "enviados": 0, "fallidos": 0, "marcadas": 0}
+    if simular or not mensajes:
+        resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+        return resumen
+
+    pausa = current_app.config["RECORDATORIO_PAUSA_SEGUNDOS"]
+    enviados = set()
+    try:
+        with mail.connect() as conexion:
+            for (id_prereserva, correo), mensaje in zip(destinatarios, mensajes):
+                try:
+                    conexion.send(Message(subject=mensaje["asunto"], recipients=[correo], html=mensaje["html"]))
+                    enviados.add(id_prereserva)
+                except (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError, smtplib.SMTPSenderRefused) as e:
+                    print(f"[RECORDATORIOS] No se pudo enviar a {correo}: {e}")
+                    resumen["fallidos"] += 1
+                if pausa:
+                    time.sleep(pausa)
+    except (smtplib.SMTPException, OSError):
+        # Sesión perdida (error SMTP, conexión cortada o timeout): el resto se reintenta la próxima vez
+        traceback.print_exc()
+        resumen["fallidos"] += len(destinatarios) - len(enviados) - resumen["fallidos"]
+    finally:
+        # Los que alcanzaron a salir se marcan aunque el envío se interrumpa, para no repetirlos
+        resumen["enviados"] = len(enviados)
+        if enviados:
+            resumen["marcadas"] = _marcar_recordatorios(enviados)
+    resumen["segundos"] = round(time.perf_counter() - inicio, 2)
+    return resumen
@@ -0,0 +1,116 @@
+"""
+Módulo de refresco en segundo plano de la caché de hojas para prisma-led-back.
+
+Un hilo daemon recarga cada hoja cacheada antes de que venza su TTL, con un intervalo propio por
+grupo de hojas:
+- Hojas de referencia (tarifas, pantallas, categorías, ciudades): cada pocos minutos.
+- Hojas de reservas y prereservas: cada pocos segundos (solo se leen las filas nuevas, ver
+  `_sincronizar_deltas` en sheets_client).
+- Usuarios y clientes: en un punto intermedio.
+
+Mientras el hilo está activo, las peticiones se sirven siempre desde la última copia buena de la
+caché (stale-while-revalidate): ninguna petición espera a Google Sheets por una hoja vencida.
+Si una recarga falla, el error se reporta y se reintenta en el siguiente ciclo con la copia anterior.
+Después de cada ciclo se guardan en la instantánea en disco las hojas que cambiaron.
+
+Futuro desarrollador:
+- Para cambiar la frecuencia de un grupo de hojas ajusta las variables SHEETS_REFRESCO_* en Config.
+- El refresco se desactiva con SHEETS_REFRESCO=False (útil para pruebas o scripts).
+"""
+
+import threading
+import time
+import traceback
+from app.services.sheets_client import cargar_hojas, activar_revalidacion, antiguedad_hoja
+from app.services.instantanea import guardar_instantanea
+
+# Intervalo (clave de configuración) con el que se refresca cada hoja
+PROGRAMA_REFRESCO = {
+    "tarifas": "SHEETS_REFRESCO_REFERENCIA",
+    "pantallas": "SHEETS_REFRESCO_REFERENCIA",
+    "categorias": "SHEETS_REFRESCO_REFERENCIA",
+    "ciudades": "SHEETS_REFRESCO_REFERENCIA",
+    "usuarios": "SHEETS_REFRESCO_USUARIOS",
+    "clientes": "SHEETS_REFRESCO_USUARIOS",
+    "reservas": "SHEETS_REFRESCO_RESERVAS",
+    "prereservas": "SHEETS_REFRESCO_RESERVAS",
+    "detalle_reserva": "SHEETS_REFRESCO_RESERVAS",
+    "detalle_prereserva": "SHEETS_REFRESCO_RESERVAS",
+}
+
+_hilo_refresco = None
+_detener = threading.Event()
+
+
+def hojas_pendientes(proximas, ahora):
+    """
+    Retorna las hojas cuyo refresco ya está programado.
+
+    Args:
+        proximas (dict): {nombre_hoja: instante (time.monotonic) del próximo refresco}
+        ahora (float): Instante actual.
+
+    Returns:
+        list: Nombres de las hojas a refrescar.
+    """
+    return [nombre for nombre, instante in proximas.items() if instante <= ahora]
+
+
+def _ciclo_refresco(app):
+    """
+    Bucle del hilo de refresco: recarga en una sola llamada batch todas las hojas que tocan.
+    """
+    with app.app_context():
+        intervalos = {nombre: app.config[clave] for nombre, clave in PROGRAMA_REFRESCO.items()}
+        ruta_instantanea = app.config["SHEETS_SNAPSHOT_PATH"]
+        ahora = time.monotonic()
+        # Las hojas que no están en caché, o que vienen de una instantánea vieja, se refrescan de inmediato
+        proximas = {}
+        for nombre, intervalo in intervalos.items():
+            antiguedad = antiguedad_hoja(nombre)
+            proximas[nombre] = ahora if antiguedad is None or antiguedad >= intervalo else ahora + intervalo - antiguedad
+
+        while not _detener.is_set():
+            ahora = time.monotonic()
+            pendientes = hojas_pendientes(proximas, ahora)
+            if pendientes:
+                try:
+                    cargar_hojas(*pendientes, fresco=True)
+                except Exception:
+                    print(f"[REFRESCO] Falló la recarga de {', '.join(pendientes)}; se sirve la copia anterior")
+                    traceback.print_exc()
+                for nombre in pendientes:
+                    proximas[nombre] = ahora + intervalos[nombre]
+                try:
+                    guardar_instantanea(ruta_instantanea)
+                except Exception:
+                    traceback.print_exc()
+            _detener.wait(max(0.5, min(proximas.values()) - time.monotonic()))
+
+
+def iniciar_refresco(app):
+    """
+    Inicia el hilo de refresco en segundo plano (una sola vez por proceso).
+
+    Args:
+        app (Flask): Aplicación ya configurada.
+    """
+    global _hilo_refresco
+    if _hilo_refresco and _hilo_refresco.is_alive():
+        return
+    _detener.clear()
+    activar_revalidacion(True)
+    _hilo_refresco = threading.Thread(target=_ciclo_refresco, args=(app,), name="refresco-hojas", daemon=True)
+    _hilo_refresco.start()
+
+
+def detener_refresco():
+    """
+    Detiene el hilo de refresco; las lecturas vuelven a esperar a Google Sheets al vencer el TTL.
+    """
+    global _hilo_refresco
+    _detener.set()
+    activar_revalidacion(False)
+    if _hilo_refresco:
+        _hilo_refresco.join(timeout=5)
+        _hilo_refresco = None
@@ -3,22 +3,83 @@ Módulo para la conexión y operaciones con Google Sheets en prisma-led-back.
 
 Proporciona funciones para obtener y modificar datos de hojas como tarifas, pantallas, reservas,
 prereservas, usuarios, clientes, categorías y ciudades.
+
+Las hojas de referencia (tarifas, pantallas, categorías, ciudades) y las de usuarios/clientes se
+guardan en una caché en memoria con un tiempo de vida configurable. Cada lectura calcula una versión
+(hash del contenido) que los endpoints usan como ETag para responder 304 sin consultar Google;
+`instantanea_hojas` entrega los registros y sus versiones de una misma lectura, para que el ETag
+siempre corresponda al cuerpo.
+Las lecturas se hacen con values:batchGet, de modo que varias hojas se obtienen en una sola llamada.
+
+Las worksheets, sus sheetId y sus encabezados se guardan en un registro seguro para hilos; así las
+escrituras no pagan una consulta de metadatos adicional en cada llamada.
 """
 
+import hashlib
+import json
+import threading
+import time
+import traceback
 import gspread
+from gspread.utils import absolute_range_name, fill_gaps, numericise_all, rowcol_to_a1, to_records
 from google.oauth2.service_account import Credentials
-from flask import current_app
+from flask import current_app, g, has_request_context
 from app.services.retry_utils import retry_on_rate_limit
 
 # 🧠 Variable global que guarda la conexión a la hoja de cálculo
 _cached_spreadsheet = None
 
+# Registro de worksheets por título: {titulo: {"worksheet": Worksheet, "id": int, "encabezados": list}}
+# Se llena con una sola consulta de metadatos y solo se refresca si cambia la estructura.
+_registro_hojas = {}
+_registro_lock = threading.RLock()
+_registro_refrescado_en = 0
+
+# Caché de hojas leídas: {nombre_hoja: {"encabezados", "registros", "version", "cargado_en",
+# "completo_en", "suma_claves", "derivados", "vencida"}}
+_cache_hojas = {}
+_cache_lock = threading.Lock()
+
+# Lecturas de hojas en curso: {nombre_hoja: threading.Event}. Protegido por _cache_lock.
+# Los hilos que necesitan una hoja que ya se está leyendo esperan el evento en lugar de repetir la lectura.
+_en_vuelo = {}
+
+# Tiempo de vida (clave de configuración) de cada hoja cacheada. Las hojas que no aparecen
+# aquí se leen siempre desde Google Sheets.
+_TTL_POR_HOJA = {
+    "tarifas": "SHEETS_CACHE_TTL_REFERENCIA",
+    "pantallas": "SHEETS_CACHE_TTL_REFERENCIA",
+    "categorias": "SHEETS_CACHE_TTL_REFERENCIA",
+    "ciudades": "SHEETS_CACHE_TTL_REFERENCIA",
+    "usuarios": "SHEETS_CACHE_TTL_USUARIOS",
+    "clientes": "SHEETS_CACHE_TTL_USUARIOS",
+    "reservas": "SHEETS_CACHE_TTL_RESERVAS",
+    "prereservas": "SHEETS_CACHE_TTL_RESERVAS",
+    "detalle_reserva": "SHEETS_CACHE_TTL_RESERVAS",
+    "detalle_prereserva": "SHEETS_CACHE_TTL_RESERVAS",
+    # Hojas de archivo (ver mantenimiento.py): se leen junto con las vigentes en el historial
+    "reservas_archivo": "SHEETS_CACHE_TTL_RESERVAS",
+    "prereservas_archivo": "SHEETS_CACHE_TTL_RESERVAS",
+    "detalle_reserva_archivo": "SHEETS_CACHE_TTL_RESERVAS",
+    "detalle_prereserva_archivo": "SHEETS_CACHE_TTL_RESERVAS",
+}
+
+# True mientras un hilo de refresco en segundo plano mantiene la caché al día (stale-while-revalidate)
+_revalidacion_activa = False
+
+# Hojas que crecen casi siempre agregando filas al final: al vencer su caché solo se leen las
+# filas nuevas, salvo que se detecten borrados o ediciones en la columna clave (columna A).
+_HOJAS_INCREMENTALES = {
+    "reservas", "detalle_reserva", "detalle_prereserva", "usuarios",
+    "reservas_archivo", "prereservas_archivo", "detalle_reserva_archivo", "detalle_prereserva_archivo"
+}
+
 def connect_sheet():
     """
     Establece y retorna la conexión a la hoja de cálculo de Google Sheets.
 
     Utiliza credenciales y el ID de la hoja definidos en la configuración de la aplicación.
-    Reutiliza la instancia para mejorar el rendimiento.
+    Reutiliza la instancia para mejorar el rendimiento. Es seguro llamarla desde varios hilos.
 
     Returns:
         gspread.Spreadsheet: Instancia conectada a la hoja de cálculo.
@@ -28,120 +89,852 @@ def connect_sheet():
     if _cached_spreadsheet:
         return _cached_spreadsheet
 
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
+    with _registro_lock:
+        if _cached_spreadsheet:
+            return _cached_spreadsheet
+
+        scopes = [
+            "https://www.googleapis.com/auth/spreadsheets",
+            "https://www.googleapis.com/auth/drive"
+        ]
 
-    credentials_path = current_app.config["GOOGLE_CREDENTIALS_PATH"]
-    spreadsheet_id = current_app.config["SPREADSHEET_ID"]
+        credentials_path = current_app.config["GOOGLE_CREDENTIALS_PATH"]
+        spreadsheet_id = current_app.config["SPREADSHEET_ID"]
 
-    credentials = Credentials.from_service_account_file(credentials_path, scopes=scopes)
-    client = gspread.authorize(credentials)
-    _cached_spreadsheet = client.open_by_key(spreadsheet_id)
+        credentials = Credentials.from_service_account_file(credentials_path, scopes=scopes)
+        client = gspread.authorize(credentials)
+        _cached_spreadsheet = client.open_by_key(spreadsheet_id)
 
     return _cached_spreadsheet
 
+def refrescar_registro():
+    """
+    Vuelve a consultar los metadatos de la hoja de cálculo y reconstruye el registro de worksheets.
+
+    Se usa al arrancar y cuando se detecta un cambio de estructura (por ejemplo, una hoja nueva
+    o renombrada). Los encabezados ya conocidos se conservan.
+    """
+    global _registro_refrescado_en
+    worksheets = connect_sheet().worksheets()
+    with _registro_lock:
+        _registro_refrescado_en = time.time()
+        anterior = dict(_registro_hojas)
+        _registro_hojas.clear()
+        for ws in worksheets:
+            encabezados = anterior.get(ws.title, {}).get("encabezados")
+            _registro_hojas[ws.title] = {"worksheet": ws, "id": ws.id, "encabezados": encabezados}
+
+def _entrada_registro(nombre_hoja):
+    """
+    Retorna la entrada del registro para una hoja, refrescando el registro si no existe.
+
+    Raises:
+        gspread.exceptions.WorksheetNotFound: Si la hoja no existe en la hoja de cálculo.
+    """
+    with _registro_lock:
+        entrada = _registro_hojas.get(nombre_hoja)
+    if entrada is None:
+        refrescar_registro()
+        with _registro_lock:
+            entrada = _registro_hojas.get(nombre_hoja)
+    if entrada is None:
+        raise gspread.exceptions.WorksheetNotFound(nombre_hoja)
+    return entrada
+
+def hoja_existe(nombre_hoja):
+    """
+    Indica si existe una worksheet, para hojas opcionales que se crean solas (por ejemplo, las de
+    archivo). Si no está en el registro, lo refresca a lo sumo una vez por TTL de la hoja, de modo
+    que preguntar por una hoja que aún no existe no consulta metadatos en cada llamada.
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+
+    Returns:
+        bool: True si la hoja existe.
+    """
+    with _registro_lock:
+        if nombre_hoja in _registro_hojas:
+            return True
+        reciente = time.time() - _registro_refrescado_en < _ttl_hoja(nombre_hoja)
+    if not reciente:
+        refrescar_registro()
+    with _registro_lock:
+        return nombre_hoja in _registro_hojas
+
+def obtener_worksheet(nombre_hoja):
+    """
+    Retorna la worksheet con el título indicado desde el registro, sin consultar metadatos.
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+
+    Returns:
+        gspread.Worksheet: Worksheet solicitada.
+    """
+    return _entrada_registro(nombre_hoja)["worksheet"]
+
+def id_hoja(nombre_hoja):
+    """
+    Retorna el sheetId de una worksheet (necesario para las peticiones batchUpdate).
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+
+    Returns:
+        int: sheetId de la worksheet.
+    """
+    return _entrada_registro(nombre_hoja)["id"]
+
+def encabezados_hoja(nombre_hoja):
+    """
+    Retorna la fila de encabezados de una hoja.
+
+    Usa los encabezados registrados en la última lectura; si aún no se conocen, lee en una sola
+    llamada la primera fila de todas las hojas registradas.
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+
+    Returns:
+        list: Nombres de las columnas en orden.
+    """
+    encabezados = _entrada_registro(nombre_hoja)["encabezados"]
+    if encabezados is not None:
+        return encabezados
+
+    with _registro_lock:
+        titulos = [t for t, e in _registro_hojas.items() if e["encabezados"] is None]
+    respuesta = connect_sheet().values_batch_get([absolute_range_name(t, "1:1") for t in titulos])
+    for titulo, rango in zip(titulos, respuesta.get("valueRanges", [])):
+        _registrar_encabezados(titulo, (rango.get("values") or [[]])[0])
+    return _entrada_registro(nombre_hoja)["encabezados"]
+
+def _registrar_encabezados(nombre_hoja, encabezados):
+    """
+    Actualiza los encabezados conocidos de una hoja (si está en el registro).
+    """
+    with _registro_lock:
+        entrada = _registro_hojas.get(nombre_hoja)
+        if entrada is not None:
+            entrada["encabezados"] = list(encabezados)
+
+def invalidar_encabezados(nombre_hoja):
+    """
+    Marca como desconocidos los encabezados de una hoja (por ejemplo, tras agregar una columna).
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+    """
+    with _registro_lock:
+        entrada = _registro_hojas.get(nombre_hoja)
+        if entrada is not None:
+            entrada["encabezados"] = None
+
+def asegurar_columna(nombre_hoja, columna):
+    """
+    Asegura que exista una columna en el encabezado de una hoja y retorna su índice (1-based).
+    Si no existe, la crea al final.
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+        columna (str): Nombre de la columna.
+
+    Returns:
+        int: Índice de la columna.
+    """
+    encabezados = encabezados_hoja(nombre_hoja) or []
+    if columna in encabezados:
+        return encabezados.index(columna) + 1
+    indice = len(encabezados) + 1
+    obtener_worksheet(nombre_hoja).update_cell(1, indice, columna)
+    invalidar_encabezados(nombre_hoja)
+    return indice
+
+def asegurar_hoja(nombre_hoja, encabezados):
+    """
+    Asegura que exista una worksheet con todas las columnas indicadas; si no existe la crea con
+    esos encabezados, y si le faltan columnas las agrega al final.
+
+    Args:
+        nombre_hoja (str): Título de la worksheet.
+        encabezados (list): Columnas que debe tener.
+
+    Returns:
+        list: Encabezados de la hoja después de asegurarla.
+    """
+    try:
+        _entrada_registro(nombre_hoja)
+    except gspread.exceptions.WorksheetNotFound:
+        ws = connect_sheet().add_worksheet(title=nombre_hoja, rows=1, cols=len(encabezados))
+        ws.append_row(list(encabezados))
+        refrescar_registro()
+        _registrar_encabezados(nombre_hoja, encabezados)
+    for columna in encabezados:
+        asegurar_columna(nombre_hoja, columna)
+    return encabezados_hoja(nombre_hoja)
+
+def calcular_version(registros):
+    """
+    Calcula una versión estable (hash) del contenido de una hoja.
+
+    Args:
+        registros (list): Registros de la hoja.
+
+    Returns:
+        str: Hash hexadecimal del contenido.
+    """
+    contenido = json.dumps(registros, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(contenido.encode("utf-8")).hexdigest()
+
+def activar_revalidacion(activa=True):
+    """
+    Indica si hay un refresco en segundo plano activo. Mientras lo esté, las lecturas sirven la
+    última copia buena de las hojas vencidas en lugar de esperar a Google Sheets.
+
+    Args:
+        activa (bool): True al iniciar el hilo de refresco, False al detenerlo.
+    """
+    global _revalidacion_activa
+    _revalidacion_activa = activa
+
+def _ttl_hoja(nombre_hoja):
+    """
+    Retorna el tiempo de vida en segundos configurado para una hoja (0 si no se cachea).
+    """
+    clave = _TTL_POR_HOJA.get(nombre_hoja)
+    return current_app.config.get(clave, 0) if clave else 0
+
+def _a_registros(valores):
+    """
+    Convierte una matriz de valores (encabezado + filas) en registros, igual que get_all_records().
+
+    Rellena las filas cortas con cadenas vacías y convierte a número las celdas numéricas.
+
+    Args:
+        valores (list): Matriz de valores leída de la hoja, con el encabezado en la primera fila.
+
+    Returns:
+        tuple: (encabezados, registros)
+    """
+    if not valores:
+        return [], []
+    valores = fill_gaps(valores)
+    encabezados = valores[0]
+    filas = [numericise_all(fila, empty2zero=False, default_blank="") for fila in valores[1:]]
+    return encabezados, to_records(encabezados, filas)
+
+def _suma_claves(claves):
+    """
+    Calcula un checksum barato de la columna clave (columna A) de una hoja.
+
+    Args:
+        claves (list): Valores de la columna clave, sin el encabezado.
+
+    Returns:
+        str: Hash hexadecimal de las claves.
+    """
+    return hashlib.sha1("\x1f".join(str(c) for c in claves).encode("utf-8")).hexdigest()
+
+def _guardar_entrada(nombre_hoja, valores):
+    """
+    Construye la entrada de caché de una hoja a partir de sus valores y la guarda.
+
+    Returns:
+        dict: Entrada de caché creada.
+    """
+    encabezados, registros = _a_registros(valores)
+    _registrar_encabezados(nombre_hoja, encabezados)
+    ahora = time.time()
+    entrada = {
+        "encabezados": encabezados,
+        "registros": registros,
+        "version": calcular_version(registros),
+        "cargado_en": ahora,
+        "completo_en": ahora,
+        "suma_claves": _suma_claves(fila[0] if fila else "" for fila in valores[1:])
+    }
+    with _cache_lock:
+        _cache_hojas[nombre_hoja] = entrada
+    return entrada
+
+def _leer_hojas(nombres_hoja):
+    """
+    Lee varias hojas completas de Google Sheets en una sola llamada (values:batchGet).
+
+    Args:
+        nombres_hoja (list): Nombres de las hojas a leer.
+
+    Returns:
+        dict: {nombre_hoja: entrada_de_cache}
+    """
+    respuesta = connect_sheet().values_batch_get([absolute_range_name(n) for n in nombres_hoja])
+    rangos = respuesta.get("valueRanges", [])
+    return {
+        nombre: _guardar_entrada(nombre, rango.get("values", []))
+        for nombre, rango in zip(nombres_hoja, rangos)
+    }
+
+def _sincronizar_deltas(anteriores):
+    """
+    Sincroniza de forma incremental hojas que crecen por filas agregadas al final.
+
+    En una sola llamada lee, por cada hoja, la columna clave completa y las filas nuevas después
+    de las ya conocidas. Si la columna clave se acortó o su checksum sobre las filas conocidas
+    cambió (filas borradas o editadas), la hoja no se sincroniza y se reporta para recarga completa.
+
+    Args:
+        anteriores (dict): {nombre_hoja: entrada_de_cache_anterior}
+
+    Returns:
+        tuple: (dict {nombre_hoja: entrada_actualizada}, list de hojas que requieren recarga completa)
+    """
+    nombres = list(anteriores)
+    rangos = []
+    for nombre in nombres:
+        entrada = anteriores[nombre]
+        ultima = _letra_columna(max(len(entrada["encabezados"]), 1))
+        rangos.append(absolute_range_name(nombre, "A2:A"))
+        rangos.append(absolute_range_name(nombre, f"A{len(entrada['registros']) + 2}:{ultima}"))
+
+    valores = connect_sheet().values_batch_get(rangos).get("valueRanges", [])
+    actualizadas, completas = {}, []
+    for i, nombre in enumerate(nombres):
+        entrada = anteriores[nombre]
+        conocidas = len(entrada["registros"])
+        claves = [fila[0] if fila else "" for fila in valores[2 * i].get("values", [])]
+        nuevas = valores[2 * i + 1].get("values", [])
+
+        if len(claves) < conocidas or _suma_claves(claves[:conocidas]) != entrada["suma_claves"]:
+            completas.append(nombre)
+            continue
+
+        ahora = time.time()
+        if not nuevas:
+            with _cache_lock:
+                entrada["cargado_en"] = ahora
+                entrada.pop("vencida", None)
+            actualizadas[nombre] = entrada
+            continue
+
+        _, registros_nuevos = _a_registros([entrada["encabezados"]] + nuevas)
+        actualizada = dict(
+            entrada,
+            registros=entrada["registros"] + registros_nuevos,
+            version=calcular_version([entrada["version"], registros_nuevos]),
+            cargado_en=ahora,
+            suma_claves=_suma_claves(claves[:conocidas + len(nuevas)]),
+            derivados={},
+            vencida=False
+        )
+        with _cache_lock:
+            _cache_hojas[nombre] = actualizada
+        actualizadas[nombre] = actualizada
+    return actualizadas, completas
+
+def _obtener_hoja(nombre_hoja, fresco=False):
+    """
+    Retorna la entrada de caché de una hoja, leyéndola de Google Sheets si expiró.
+
+    Args:
+        nombre_hoja (str): Nombre de la hoja.
+        fresco (bool): Si es True revalida la hoja contra Google Sheets aunque la caché esté vigente.
+
+    Returns:
+        dict: {"encabezados": list, "registros": list, "version": str, "cargado_en": float, ...}
+    """
+    return _cargar_hojas((nombre_hoja,), fresco)[nombre_hoja]
+
+def _cargar_hojas(nombres_hoja, fresco=False):
+    """
+    Retorna las entradas de caché de varias hojas, leyendo en una sola llamada las que expiraron.
+
+    Las hojas que crecen por filas agregadas (ver _HOJAS_INCREMENTALES) se sincronizan de forma
+    incremental si su última recarga completa no supera SHEETS_DELTA_MAX_AGE.
+
+    Las lecturas concurrentes de una misma hoja se combinan (single-flight): solo un hilo consulta
+    Google Sheets y los demás esperan y comparten su resultado.
+
+    Mientras el refresco en segundo plano está activo (ver activar_revalidacion), una hoja vencida
+    se sigue sirviendo hasta SHEETS_CACHE_STALE_MAX segundos después de su TTL: el hilo de refresco
+    la recarga sin que la petición espere a Google Sheets.
+
+    Args:
+        nombres_hoja (tuple): Nombres de las hojas.
+        fresco (bool): Si es True revalida todas las hojas contra Google Sheets.
+
+    Returns:
+        dict: {nombre_hoja: {"encabezados": list, "registros": list, "version": str, "cargado_en": float, ...}}
+    """
+    ahora = time.time()
+    edad_maxima = current_app.config.get("SHEETS_DELTA_MAX_AGE", 0)
+    gracia = current_app.config.get("SHEETS_CACHE_STALE_MAX", 0) if _revalidacion_activa else 0
+    entradas, incrementales, completas = {}, {}, []
+    propias, en_espera = [], {}
+    with _cache_lock:
+        for nombre in nombres_hoja:
+            entrada = _cache_hojas.get(nombre)
+            ttl = _ttl_hoja(nombre)
+            if (entrada and not fresco and not entrada.get("vencida")
+                    and ahora - entrada["cargado_en"] < ttl + (gracia if ttl else 0)):
+                entradas[nombre] = entrada
+                continue
+            if nombre in _en_vuelo:
+                # Otro hilo ya está leyendo esta hoja: se espera su resultado. Una lectura fresca no
+                # se une, porque la lectura en curso pudo empezar antes de una escritura reciente.
+                if not fresco:
+                    en_espera[nombre] = _en_vuelo[nombre]
+                    continue
+            else:
+                _en_vuelo[nombre] = threading.Event()
+                propias.append(nombre)
+            if entrada and nombre in _HOJAS_INCREMENTALES and ahora - entrada["completo_en"] < edad_maxima:
+                incrementales[nombre] = entrada
+            else:
+                completas.append(nombre)
+
+    try:
+        if incrementales:
+            actualizadas, recargar = _sincronizar_deltas(incrementales)
+            entradas.update(actualizadas)
+            completas.extend(recargar)
+        if completas:
+            entradas.update(_leer_hojas(completas))
+    except Exception:
+        # Modo degradado: si Google Sheets no responde, una lectura no fresca usa la última copia
+        # buena (en memoria o cargada de la instantánea en disco) en lugar de fallar.
+        with _cache_lock:
+            respaldo = {n: _cache_hojas.get(n) for n in list(incrementales) + completas if n not in entradas}
+        if fresco or not all(respaldo.values()):
+            raise
+        print(f"[SHEETS] Google Sheets no disponible; se sirve la última copia de {', '.join(respaldo)}")
+        traceback.print_exc()
+        entradas.update(respaldo)
+    finally:
+        with _cache_lock:
+            for nombre in propias:
+                _en_vuelo.pop(nombre).set()
+
+    if en_espera:
+        for evento in en_espera.values():
+            evento.wait()
+        with _cache_lock:
+            compartidas = {nombre: _cache_hojas.get(nombre) for nombre in en_espera}
+        entradas.update({nombre: e for nombre, e in compartidas.items() if e})
+        # Si la lectura compartida falló (o la hoja se invalidó mientras tanto) se lee de nuevo
+        faltantes = tuple(nombre for nombre, e in compartidas.items() if not e)
+        if faltantes:
+            entradas.update(_cargar_hojas(faltantes))
+
+    if not fresco:
+        _marcar_desactualizadas(entradas, ahora, gracia)
+    return entradas
+
+def _marcar_desactualizadas(entradas, ahora, gracia):
+    """
+    Registra en flask.g la antigüedad de las hojas servidas después de su TTL (modo degradado),
+    para que la respuesta lo indique en sus encabezados (ver create_app).
+    """
+    if not has_request_context():
+        return
+    for nombre, entrada in entradas.items():
+        ttl = _ttl_hoja(nombre)
+        edad = ahora - entrada["cargado_en"]
+        # Una copia marcada como vencida (escrita o recortada en la instantánea) también es antigua
+        if entrada.get("vencida") or edad >= ttl + (gracia if ttl else 0):
+            g.antiguedad_datos = max(g.get("antiguedad_datos", 0), edad)
+
+def exportar_cache():
+    """
+    Retorna una copia de las entradas de caché para persistirlas (sin los datos derivados).
+
+    Returns:
+        dict: {nombre_hoja: entrada_de_cache}
+    """
+    with _cache_lock:
+        return {
+            nombre: {k: v for k, v in entrada.items() if k not in ("derivados", "vencida")}
+            for nombre, entrada in _cache_hojas.items()
+        }
+
+def importar_cache(entradas):
+    """
+    Carga en la caché entradas persistidas (por ejemplo, desde la instantánea en disco).
+    No reemplaza hojas que ya estén en memoria; las importadas conservan su fecha de carga
+    original, de modo que se revalidan en la primera oportunidad.
+
+    Args:
+        entradas (dict): {nombre_hoja: entrada_de_cache}
+    """
+    with _cache_lock:
+        for nombre, entrada in entradas.items():
+            _cache_hojas.setdefault(nombre, entrada)
+
+def antiguedad_hoja(nombre_hoja):
+    """
+    Retorna cuántos segundos tiene la copia en caché de una hoja (None si no está en caché).
+    """
+    with _cache_lock:
+        entrada = _cache_hojas.get(nombre_hoja)
+    return time.time() - entrada["cargado_en"] if entrada else None
+
+@retry_on_rate_limit()
+def cargar_hojas(*nombres_hoja, fresco=False):
+    """
+    Obtiene varias hojas a la vez; las que no están vigentes en caché se leen en una sola llamada.
+
+    Args:
+        *nombres_hoja (str): Nombres de las hojas.
+        fresco (bool): Si es True ignora la caché y lee todas las hojas de Google Sheets.
+
+    Returns:
+        dict: {nombre_hoja: list} con los registros de cada hoja.
+    """
+    entradas = _cargar_hojas(nombres_hoja, fresco)
+    return {nombre: entradas[nombre]["registros"] for nombre in nombres_hoja}
+
+class InstantaneaHojas:
+    """
+    Registros y versiones de varias hojas tomados de una misma lectura de la caché.
+
+    Sirve para que un ETag (o un dato guardado por versión) corresponda exactamente a los registros
+    con los que se construyó, aunque la caché se refresque mientras se atiende la petición. Tiene la
+    misma interfaz de lectura que ContextoDatos (ver contexto.py), así que los modelos tipados la
+    aceptan como `datos`.
+    """
+
+    def __init__(self, entradas, nombres_hoja):
+        self._entradas = entradas
+        self.versiones = tuple(entradas[nombre]["version"] for nombre in nombres_hoja)
+
+    def registros(self, nombre_hoja):
+        """
+        Retorna los registros de una hoja de la instantánea.
+        """
+        return self._entradas[nombre_hoja]["registros"]
+
+    def derivado(self, nombre_hoja, construir):
+        """
+        Retorna un dato derivado de una hoja de la instantánea (ver `derivado_hoja`); se comparte
+        con `derivado_hoja` mientras la entrada de caché siga siendo la misma.
+        """
+        return _derivado_entrada(self._entradas[nombre_hoja], construir)
+
 @retry_on_rate_limit()
-def get_tarifas():
+def instantanea_hojas(*nombres_hoja, fresco=False):
+    """
+    Obtiene varias hojas como en `cargar_hojas`, junto con la versión de cada una tomada de la
+    misma entrada de caché que sus registros.
+
+    Args:
+        *nombres_hoja (str): Nombres de las hojas.
+        fresco (bool): Si es True ignora la caché y lee todas las hojas de Google Sheets.
+
+    Returns:
+        InstantaneaHojas: Registros, derivados y versiones (en el orden de nombres_hoja).
+    """
+    return InstantaneaHojas(_cargar_hojas(nombres_hoja, fresco), nombres_hoja)
+
+@retry_on_rate_limit()
+def version_hoja(nombre_hoja):
+    """
+    Retorna la versión (hash del contenido) de una hoja, usando la caché si está vigente.
+
+    Args:
+        nombre_hoja (str): Nombre de la hoja.
+
+    Returns:
+        str: Versión actual de la hoja.
+    """
+    return _obtener_hoja(nombre_hoja)["version"]
+
+@retry_on_rate_limit()
+def derivado_hoja(nombre_hoja, construir, fresco=False):
+    """
+    Retorna un dato derivado de una hoja (por ejemplo, sus registros tipados o un índice),
+    calculado una sola vez por cada lectura de la hoja.
+
+    El resultado se guarda junto a la entrada de caché, así que se descarta automáticamente
+    cuando la hoja se vuelve a leer.
+
+    Args:
+        nombre_hoja (str): Nombre de la hoja.
+        construir (callable): Función que recibe los registros y retorna el dato derivado.
+            La misma función se usa como clave del derivado.
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
+    Returns:
+        object: Resultado de construir(registros).
+    """
+    return _derivado_entrada(_obtener_hoja(nombre_hoja, fresco), construir)
+
+def _derivado_entrada(entrada, construir):
+    """
+    Retorna el derivado de una entrada de caché, construyéndolo si aún no existe.
+    """
+    with _cache_lock:
+        derivados = entrada.setdefault("derivados", {})
+        if construir in derivados:
+            return derivados[construir]
+    valor = construir(entrada["registros"])
+    with _cache_lock:
+        return derivados.setdefault(construir, valor)
+
+def invalidar_cache(*nombres_hoja, solo_agregados=False):
+    """
+    Marca la caché de las hojas indicadas como vencida para que la próxima lectura vaya a Google Sheets.
+
+    Debe llamarse después de cualquier escritura sobre una hoja cacheada.
+
+    Args:
+        *nombres_hoja (str): Nombres de las hojas modificadas.
+        solo_agregados (bool): True si la escritura solo agregó filas al final. En ese caso las hojas
+            incrementales conservan su copia y la próxima lectura solo trae las filas nuevas.
+    """
+    with _cache_lock:
+        for nombre in nombres_hoja:
+            entrada = _cache_hojas.get(nombre)
+            if entrada and solo_agregados and nombre in _HOJAS_INCREMENTALES:
+                entrada["vencida"] = True
+            else:
+                _cache_hojas.pop(nombre, None)
+
+def _letra_columna(indice):
+    """
+    Convierte un índice de columna (1-based) en su letra A1 (1 -> 'A', 27 -> 'AA').
+    """
+    return rowcol_to_a1(1, indice).rstrip("0123456789")
+
+@retry_on_rate_limit()
+def leer_columnas(proyeccion, fila_desde=2, fila_hasta=None):
+    """
+    Lee solo las columnas indicadas de una o varias hojas en una sola llamada (values:batchGet).
+
+    Las columnas se resuelven por nombre usando los encabezados del registro y se leen con
+    UNFORMATTED_VALUE, por lo que los números llegan como números y no como texto formateado.
+    Útil cuando solo se necesitan una o dos columnas de hojas anchas como 'usuarios' o 'clientes'.
+
+    Args:
+        proyeccion (dict): {nombre_hoja: [columna, ...]}
+        fila_desde (int): Primera fila a leer (2 = primera fila de datos).
+        fila_hasta (int): Última fila a leer (None = hasta el final de la hoja).
+
+    Returns:
+        dict: {nombre_hoja: {columna: [valores]}}. Todas las columnas de una hoja tienen el mismo
+            largo; el valor en la posición i corresponde a la fila fila_desde + i.
+
+    Raises:
+        KeyError: Si alguna columna no existe en la hoja.
+    """
+    rangos, claves = [], []
+    for hoja, columnas in proyeccion.items():
+        encabezados = encabezados_hoja(hoja)
+        for columna in columnas:
+            if columna not in encabezados:
+                raise KeyError(f"La columna '{columna}' no existe en la hoja '{hoja}'")
+            letra = _letra_columna(encabezados.index(columna) + 1)
+            rangos.append(absolute_range_name(hoja, f"{letra}{fila_desde}:{letra}{fila_hasta or ''}"))
+            claves.append((hoja, columna))
+
+    respuesta = connect_sheet().values_batch_get(
+        rangos, params={"valueRenderOption": "UNFORMATTED_VALUE", "majorDimension": "COLUMNS"}
+    )
+    resultado = {hoja: {} for hoja in proyeccion}
+    for (hoja, columna), rango in zip(claves, respuesta.get("valueRanges", [])):
+        resultado[hoja][columna] = (rango.get("values") or [[]])[0]
+
+    # La API omite las celdas vacías al final de cada columna; se rellenan para alinear filas
+    for columnas in resultado.values():
+        largo = max((len(v) for v in columnas.values()), default=0)
+        for valores in columnas.values():
+            valores.extend([""] * (largo - len(valores)))
+    return resultado
+
+@retry_on_rate_limit()
+def leer_filas(nombre_hoja, filas):
+    """
+    Lee filas específicas de una hoja en una sola llamada y las retorna como registros.
+
+    Las filas consecutivas se agrupan en un mismo rango A1.
+
+    Args:
+        nombre_hoja (str): Nombre de la hoja.
+        filas (list): Números de fila (1-based, la fila 1 es el encabezado).
+
+    Returns:
+        list: Registros (diccionarios) en el orden de las filas solicitadas.
+    """
+    filas = sorted(set(filas))
+    if not filas:
+        return []
+
+    tramos = []
+    for fila in filas:
+        if tramos and fila == tramos[-1][1] + 1:
+            tramos[-1][1] = fila
+        else:
+            tramos.append([fila, fila])
+
+    respuesta = connect_sheet().values_batch_get(
+        [absolute_range_name(nombre_hoja, f"{desde}:{hasta}") for desde, hasta in tramos]
+    )
+    valores = []
+    for (desde, hasta), rango in zip(tramos, respuesta.get("valueRanges", [])):
+        leidas = rango.get("values", [])
+        valores.extend(leidas + [[]] * (hasta - desde + 1 - len(leidas)))
+
+    _, registros = _a_registros([encabezados_hoja(nombre_hoja)] + valores)
+    return registros
+
+def filtrar_filas(nombre_hoja, columna, valor):
+    """
+    Retorna los registros de una hoja cuya columna coincide con un valor, sin descargar la hoja completa.
+
+    Lee primero solo la columna de filtro y después únicamente las filas que coinciden. Son dos
+    llamadas a Google Sheets sin caché: úsela solo con hojas que no están en la caché; las hojas en
+    caché se filtran en memoria.
+
+    Args:
+        nombre_hoja (str): Nombre de la hoja.
+        columna (str): Columna por la que se filtra.
+        valor (str): Valor buscado (se compara como texto, sin espacios a los lados).
+
+    Returns:
+        list: Registros que coinciden.
+    """
+    valores = leer_columnas({nombre_hoja: [columna]})[nombre_hoja][columna]
+    filas = [i + 2 for i, v in enumerate(valores) if str(v).strip() == str(valor)]
+    return leer_filas(nombre_hoja, filas)
+
+@retry_on_rate_limit()
+def get_tarifas(fresco=False):
     """
     Obtiene todos los registros de la hoja 'tarifas'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de tarifas.
     """
-    tarifas = connect_sheet().worksheet("tarifas").get_all_records()
-    return tarifas
+    return _obtener_hoja("tarifas", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_pantallas():
+def get_pantallas(fresco=False):
     """
     Obtiene todos los registros de la hoja 'pantallas'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de pantallas.
     """
-    return connect_sheet().worksheet("pantallas").get_all_records()
+    return _obtener_hoja("pantallas", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_reservas():
+def get_reservas(fresco=False):
     """
     Obtiene todos los registros de la hoja 'reservas'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de reservas.
     """
-    return connect_sheet().worksheet("reservas").get_all_records()
+    return _obtener_hoja("reservas", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_prereservas():
+def get_prereservas(fresco=False):
     """
     Obtiene todos los registros de la hoja 'prereservas'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de prereservas.
     """
-    return connect_sheet().worksheet("prereservas").get_all_records()
+    return _obtener_hoja("prereservas", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_detalle_reserva():
+def get_detalle_reserva(fresco=False):
     """
     Obtiene todos los registros de la hoja 'detalle_reserva'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los detalles de reservas.
     """
-    return connect_sheet().worksheet("detalle_reserva").get_all_records()
+    return _obtener_hoja("detalle_reserva", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_detalle_prereserva():
+def get_detalle_prereserva(fresco=False):
     """
     Obtiene todos los registros de la hoja 'detalle_prereserva'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los detalles de prereservas.
     """
-    return connect_sheet().worksheet("detalle_prereserva").get_all_records()
+    return _obtener_hoja("detalle_prereserva", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_usuarios():
+def get_usuarios(fresco=False):
     """
     Obtiene todos los registros de la hoja 'usuarios'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de usuarios.
     """
-    return connect_sheet().worksheet("usuarios").get_all_records()
+    return _obtener_hoja("usuarios", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_clientes():
+def get_clientes(fresco=False):
     """
     Obtiene todos los registros de la hoja 'clientes'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de clientes.
     """
-    return connect_sheet().worksheet("clientes").get_all_records()
+    return _obtener_hoja("clientes", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_categorias():
+def get_categorias(fresco=False):
     """
     Obtiene todos los registros de la hoja 'categorias'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de categorías.
     """
-    return connect_sheet().worksheet("categorias").get_all_records()
+    return _obtener_hoja("categorias", fresco)["registros"]
 
 @retry_on_rate_limit()
-def get_ciudades():
+def get_ciudades(fresco=False):
     """
     Obtiene todos los registros de la hoja 'ciudades'.
 
+    Args:
+        fresco (bool): Si es True ignora la caché y lee la hoja de Google Sheets.
+
     Returns:
         list: Lista de diccionarios con los datos de ciudades.
     """
-    return connect_sheet().worksheet("ciudades").get_all_records()
+    return _obtener_hoja("ciudades", fresco)["registros"]
 
 @retry_on_rate_limit()
 def add_ciudad(nombre_ciudad):
@@ -154,11 +947,12 @@ def add_ciudad(nombre_ciudad):
     Returns:
         bool: True si fue agregada, False si ya existía.
     """
-    ws = connect_sheet().worksheet("ciudades")
-    ciudades = [c["nombre_ciudad"].strip().lower() for c in ws.get_all_records()]
+    nombres = leer_columnas({"ciudades": ["nombre_ciudad"]})["ciudades"]["nombre_ciudad"]
+    ciudades = [str(c).strip().lower() for c in nombres]
 
     if nombre_ciudad.strip().lower() in ciudades:
         return False
 
-    ws.append_row([nombre_ciudad.strip()])
+    obtener_worksheet("ciudades").append_row([nombre_ciudad.strip()])
+    invalidar_cache("ciudades")
     return True
@@ -0,0 +1,434 @@
+"""
+Módulo de escrituras atómicas con diario local (write-ahead journal) para prisma-led-back.
+
+Las operaciones que tocan varias hojas (por ejemplo, crear una prereserva con su detalle) se
+describen como una lista de operaciones y se confirman con `confirmar_transaccion`:
+1. La transacción se anota en el diario (SQLite local) como pendiente.
+2. Todas las operaciones se envían en una sola petición spreadsheets.batchUpdate, que Google
+   Sheets aplica completa o no aplica.
+3. La anotación se borra del diario y se invalida la caché de las hojas escritas.
+
+Si el proceso muere o pierde la conexión entre 1 y 3, la transacción queda pendiente en el
+diario. Al arrancar (`recuperar_transacciones`) se resuelve contra el estado actual de las hojas:
+- Se completa (replay) lo que falte: filas a agregar que no existen, filas a borrar que siguen, celdas.
+- Si ya no puede completarse (la fila a actualizar ya no existe), se compensa borrando las filas
+  que la transacción alcanzó a agregar.
+
+Operaciones (diccionarios serializables en JSON):
+- {"tipo": "agregar", "hoja": str, "filas": [[...], ...]}  La primera columna es la clave de la fila.
+- {"tipo": "actualizar", "hoja": str, "clave": str, "valores": {columna: valor}}
+- {"tipo": "borrar", "hoja": str, "columna": str, "valores": [...]}  Borra las filas cuya columna
+  tiene alguno de los valores.
+
+Características clave:
+- Las filas se ubican por clave, no por número de fila: los números se resuelven bajo
+  transaccion_lock, justo antes de enviar, con una lectura fresca (un solo batchGet) de la columna
+  clave y de las columnas por las que se borra. Nunca se usan copias en caché ni las del contexto
+  de la petición, que otro proceso (otro worker, el comando de mantenimiento) pudo desplazar.
+  Si la transacción solo agrega filas no se lee nada.
+- Los sheetId salen del registro de worksheets (id_hoja), sin consultar metadatos.
+
+Futuro desarrollador:
+- El diario se configura con TRANSACCIONES_DIARIO_PATH (relativa a la carpeta instance de la
+  aplicación); una ruta vacía lo desactiva (las escrituras siguen siendo atómicas, pero no se
+  recuperan tras una caída).
+- Cada anotación queda reservada (columnas duenio y reservada_hasta) durante PLAZO_RESERVA
+  segundos para el proceso que la escribe. Al arrancar, cada worker reserva una anotación vencida
+  con un UPDATE condicional antes de recuperarla, así que dos procesos que comparten el archivo
+  (workers, o el proceso padre y el hijo del recargador de `python run.py`) nunca recuperan la
+  misma a la vez, ni una que otro worker sigue aplicando.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import time
+import traceback
+import uuid
+import gspread
+from flask import current_app
+from app.extensions import transaccion_lock
+from app.services.retry_utils import retry_on_rate_limit
+from app.services.sheets_client import (
+    connect_sheet,
+    encabezados_hoja,
+    id_hoja,
+    invalidar_cache,
+    leer_columnas
+)
+
+# Segundos que una anotación queda reservada para el proceso que la escribe o la recupera
+PLAZO_RESERVA = 300
+
+
+class TransaccionInvalida(Exception):
+    """
+    La transacción no puede aplicarse sobre el estado actual de las hojas (por ejemplo, la fila a
+    actualizar ya no existe).
+    """
+
+
+def _conectar(ruta):
+    """
+    Abre el archivo SQLite del diario y crea la tabla si no existe.
+    """
+    carpeta = os.path.dirname(ruta)
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    conexion = sqlite3.connect(ruta, timeout=5)
+    conexion.execute("PRAGMA journal_mode=WAL")
+    conexion.execute(
+        "CREATE TABLE IF NOT EXISTS transacciones (id TEXT PRIMARY KEY, creada_en REAL, operaciones TEXT,"
+        " duenio TEXT, reservada_hasta REAL)"
+    )
+    # Diarios creados antes de las reservas: las anotaciones existentes quedan reservadas un plazo
+    columnas = [fila[1] for fila in conexion.execute("PRAGMA table_info(transacciones)")]
+    if "reservada_hasta" not in columnas:
+        with conexion:
+            conexion.execute("ALTER TABLE transacciones ADD COLUMN duenio TEXT")
+            conexion.execute("ALTER TABLE transacciones ADD COLUMN reservada_hasta REAL")
+            conexion.execute("UPDATE transacciones SET reservada_hasta = creada_en + ?", (PLAZO_RESERVA,))
+    return conexion
+
+
+def _proceso():
+    """
+    Identifica al proceso actual en las reservas del diario (equipo y pid).
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _anotar(ruta, id_transaccion, operaciones):
+    if not ruta:
+        return
+    conexion = _conectar(ruta)
+    ahora = time.time()
+    try:
+        with conexion:
+            conexion.execute(
+                "INSERT INTO transacciones VALUES (?, ?, ?, ?, ?)",
+                (id_transaccion, ahora, json.dumps(operaciones, ensure_ascii=False, default=str),
+                 _proceso(), ahora + PLAZO_RESERVA)
+            )
+    finally:
+        conexion.close()
+
+
+def _reservar(ruta, id_transaccion, propia=False):
+    """
+    Reserva una anotación para el proceso actual durante PLAZO_RESERVA segundos.
+
+    El UPDATE es condicional, así que solo un proceso obtiene una anotación vencida aunque varios
+    la intenten reservar a la vez.
+
+    Args:
+        ruta (str): Ruta del diario.
+        id_transaccion (str): ID de la anotación.
+        propia (bool): True si el proceso actual ya la tiene reservada y solo extiende el plazo.
+
+    Returns:
+        bool: True si el proceso actual quedó con la reserva.
+    """
+    if not ruta:
+        return True
+    conexion = _conectar(ruta)
+    ahora = time.time()
+    try:
+        with conexion:
+            if propia:
+                cursor = conexion.execute(
+                    "UPDATE transacciones SET reservada_hasta = ? WHERE id = ? AND duenio = ?",
+                    (ahora + PLAZO_RESERVA, id_transaccion, _proceso())
+                )
+            else:
+                cursor = conexion.execute(
+                    "UPDATE transacciones SET duenio = ?, reservada_hasta = ? WHERE id = ? AND reservada_hasta < ?",
+                    (_proceso(), ahora + PLAZO_RESERVA, id_transaccion, ahora)
+                )
+        return cursor.rowcount == 1
+    finally:
+        conexion.close()
+
+
+def _liberar(ruta, id_transaccion):
+    """
+    Deja una anotación disponible para que otro proceso (o el próximo arranque) la recupere.
+    """
+    conexion = _conectar(ruta)
+    try:
+        with conexion:
+            conexion.execute(
+                "UPDATE transacciones SET duenio = NULL, reservada_hasta = 0 WHERE id = ? AND duenio = ?",
+                (id_transaccion, _proceso())
+            )
+    finally:
+        conexion.close()
+
+
+def _cerrar_anotacion(ruta, id_transaccion):
+    if not ruta:
+        return
+    conexion = _conectar(ruta)
+    try:
+        with conexion:
+            conexion.execute("DELETE FROM transacciones WHERE id = ?", (id_transaccion,))
+    finally:
+        conexion.close()
+
+
+def _celda(valor):
+    if isinstance(valor, bool):
+        return {"userEnteredValue": {"boolValue": valor}}
+    if isinstance(valor, (int, float)):
+        return {"userEnteredValue": {"numberValue": valor}}
+    return {"userEnteredValue": {"stringValue": "" if valor is None else str(valor)}}
+
+
+def _tramos_descendentes(filas):
+    """
+    Agrupa filas (0-based) consecutivas en tramos [inicio, fin), del último al primero para que
+    cada borrado no mueva los siguientes.
+    """
+    tramos = []
+    for fila in sorted(set(filas)):
+        if tramos and fila == tramos[-1][1]:
+            tramos[-1][1] = fila + 1
+        else:
+            tramos.append([fila, fila + 1])
+    return list(reversed(tramos))
+
+
+def _columnas_a_leer(operaciones, idempotente):
+    """
+    Columnas cuyo contenido actual se necesita para resolver las operaciones: la clave (primera
+    columna) de cada hoja que se actualiza o borra (o de todas, al recuperar) y las columnas por las
+    que se borra.
+
+    Returns:
+        dict: {nombre_hoja: [columna, ...]} (la clave siempre primero).
+    """
+    proyeccion = {}
+    for op in operaciones:
+        if op["tipo"] == "agregar" and not idempotente:
+            continue
+        columnas = proyeccion.setdefault(op["hoja"], [encabezados_hoja(op["hoja"])[0]])
+        if op["tipo"] == "borrar" and op["columna"] not in columnas:
+            columnas.append(op["columna"])
+    return proyeccion
+
+
+def _peticiones(operaciones, hojas, idempotente):
+    """
+    Traduce las operaciones a peticiones batchUpdate sobre el estado actual de las hojas.
+
+    Args:
+        operaciones (list): Operaciones de la transacción.
+        hojas (dict): {nombre_hoja: {columna: [valores]}} leídos justo antes con leer_columnas
+            (solo las columnas de _columnas_a_leer; el valor i corresponde a la fila i + 2).
+        idempotente (bool): True al recuperar: omite las filas a agregar que ya existen y, si la
+            transacción ya no puede completarse, la compensa en lugar de fallar.
+
+    Returns:
+        list: Peticiones, en orden: actualizaciones, borrados (de abajo hacia arriba) y agregados.
+
+    Raises:
+        TransaccionInvalida: Si una fila a actualizar no existe (y no se está recuperando).
+    """
+    def claves(nombre):
+        return [str(v) for v in hojas[nombre][encabezados_hoja(nombre)[0]]]
+
+    # Una transacción nunca borra las filas que ella misma agrega (al recuperarla ya pueden existir)
+    propias = {}
+    for op in operaciones:
+        if op["tipo"] == "agregar":
+            propias.setdefault(op["hoja"], set()).update(str(f[0]) for f in op["filas"])
+
+    actualizar, borrar, agregar = [], {}, []
+    for op in operaciones:
+        nombre = op["hoja"]
+        if op["tipo"] == "actualizar":
+            if str(op["clave"]) not in claves(nombre):
+                if not idempotente:
+                    raise TransaccionInvalida(f"No existe la fila {op['clave']} en '{nombre}'")
+                return _compensacion(operaciones, hojas)
+            fila = claves(nombre).index(str(op["clave"])) + 1
+            encabezados = encabezados_hoja(nombre)
+            columnas = sorted((encabezados.index(c), v) for c, v in op["valores"].items())
+            # Un updateCells por cada grupo de columnas contiguas
+            grupos = []
+            for indice, valor in columnas:
+                if grupos and indice == grupos[-1][0] + len(grupos[-1][1]):
+                    grupos[-1][1].append(valor)
+                else:
+                    grupos.append((indice, [valor]))
+            actualizar.extend(
+                {"updateCells": {
+                    "start": {"sheetId": id_hoja(nombre), "rowIndex": fila, "columnIndex": indice},
+                    "rows": [{"values": [_celda(v) for v in valores]}],
+                    "fields": "userEnteredValue"
+                }}
+                for indice, valores in grupos
+            )
+        elif op["tipo"] == "borrar":
+            buscados = {str(v) for v in op["valores"]}
+            nuevas = propias.get(nombre, set())
+            borrar.setdefault(nombre, set()).update(
+                i + 1 for i, (valor, clave) in enumerate(zip(hojas[nombre][op["columna"]], claves(nombre)))
+                if str(valor) in buscados and clave not in nuevas
+            )
+        elif op["tipo"] == "agregar":
+            existentes = set(claves(nombre)) if idempotente else set()
+            filas = [f for f in op["filas"] if str(f[0]) not in existentes]
+            if filas:
+                agregar.append({"appendCells": {
+                    "sheetId": id_hoja(nombre),
+                    "rows": [{"values": [_celda(v) for v in f]} for f in filas],
+                    "fields": "userEnteredValue"
+                }})
+
+    borrados = [
+        {"deleteDimension": {"range": {"sheetId": id_hoja(nombre), "dimension": "ROWS", "startIndex": desde, "endIndex": hasta}}}
+        for nombre, filas in borrar.items()
+        for desde, hasta in _tramos_descendentes(filas)
+    ]
+    return actualizar + borrados + agregar
+
+
+def _compensacion(operaciones, hojas):
+    """
+    Peticiones que deshacen una transacción que ya no puede completarse: borran las filas que
+    alcanzó a agregar.
+    """
+    borrar = {}
+    for op in operaciones:
+        if op["tipo"] == "agregar":
+            agregadas = {str(f[0]) for f in op["filas"]}
+            claves = hojas[op["hoja"]][encabezados_hoja(op["hoja"])[0]]
+            borrar.setdefault(op["hoja"], set()).update(
+                i + 1 for i, clave in enumerate(claves) if str(clave) in agregadas
+            )
+    print(f"[TRANSACCIONES] Transacción no aplicable; se compensan {sum(len(f) for f in borrar.values())} filas agregadas")
+    return [
+        {"deleteDimension": {"range": {"sheetId": id_hoja(nombre), "dimension": "ROWS", "startIndex": desde, "endIndex": hasta}}}
+        for nombre, filas in borrar.items()
+        for desde, hasta in _tramos_descendentes(filas)
+    ]
+
+
+@retry_on_rate_limit()
+def _enviar(peticiones):
+    connect_sheet().batch_update({"requests": peticiones})
+
+
+def _aplicar(operaciones, idempotente=False, datos=None):
+    """
+    Resuelve las operaciones contra el estado actual (debe llamarse con transaccion_lock tomado),
+    las envía en un solo batchUpdate e invalida la caché de las hojas escritas.
+
+    Las filas siempre se ubican con una lectura fresca de las columnas necesarias. Si se indica el
+    contexto de la petición (`datos`), las escrituras se registran en él antes de enviar, así que
+    la caché se invalida al cerrar la petición aunque el envío falle.
+    """
+    proyeccion = _columnas_a_leer(operaciones, idempotente)
+    hojas = leer_columnas(proyeccion) if proyeccion else {}
+    peticiones = _peticiones(operaciones, hojas, idempotente)
+
+    solo_agregados = {}
+    for op in operaciones:
+        solo_agregados[op["hoja"]] = solo_agregados.get(op["hoja"], True) and op["tipo"] == "agregar"
+    if datos is not None:
+        for nombre, solo in solo_agregados.items():
+            datos.registrar_escritura(nombre, solo_agregados=solo)
+
+    if peticiones:
+        _enviar(peticiones)
+
+    if datos is not None:
+        datos.confirmar()
+        return
+    agregados = [n for n, solo in solo_agregados.items() if solo]
+    modificadas = [n for n, solo in solo_agregados.items() if not solo]
+    if agregados:
+        invalidar_cache(*agregados, solo_agregados=not idempotente)
+    if modificadas:
+        invalidar_cache(*modificadas)
+
+
+def confirmar_transaccion(operaciones, datos=None):
+    """
+    Aplica atómicamente una transacción de varias hojas, anotándola antes en el diario local.
+
+    Args:
+        operaciones (list): Operaciones (ver la documentación del módulo).
+        datos (ContextoDatos): Contexto de la petición (ver contexto.py). Si se indica, las
+            escrituras se registran en él y la caché se invalida al confirmarlo.
+
+    Raises:
+        TransaccionInvalida: Si la transacción no puede aplicarse sobre el estado actual.
+        Exception: Si Google Sheets rechaza la escritura o no responde. Si no se sabe si la
+            escritura se aplicó, se intenta completar de inmediato; si tampoco es posible, la
+            anotación queda en el diario para recuperarla al arrancar.
+    """
+    ruta = current_app.config.get("TRANSACCIONES_DIARIO_PATH", "")
+    id_transaccion = uuid.uuid4().hex
+    with transaccion_lock:
+        _anotar(ruta, id_transaccion, operaciones)
+        try:
+            _aplicar(operaciones, datos=datos)
+        except (TransaccionInvalida, gspread.exceptions.APIError):
+            # Google Sheets respondió: el batchUpdate no se aplicó
+            _cerrar_anotacion(ruta, id_transaccion)
+            raise
+        except Exception:
+            # Resultado incierto (conexión perdida, timeout): se completa sobre el estado actual
+            print(f"[TRANSACCIONES] Resultado incierto de {id_transaccion}; se intenta completar")
+            traceback.print_exc()
+            _reservar(ruta, id_transaccion, propia=True)
+            _aplicar(operaciones, idempotente=True)
+            if datos is not None:
+                datos.confirmar()
+        _cerrar_anotacion(ruta, id_transaccion)
+
+
+def recuperar_transacciones():
+    """
+    Completa o compensa las transacciones que quedaron pendientes en el diario (se llama al arrancar).
+
+    Solo se recuperan las anotaciones cuya reserva venció, y cada una se reserva antes de
+    recuperarla: si otro proceso la reservó primero, se omite.
+
+    Returns:
+        int: Número de transacciones recuperadas.
+    """
+    ruta = current_app.config.get("TRANSACCIONES_DIARIO_PATH", "")
+    if not ruta or not os.path.exists(ruta):
+        return 0
+    conexion = _conectar(ruta)
+    try:
+        pendientes = conexion.execute(
+            "SELECT id, operaciones FROM transacciones WHERE reservada_hasta < ? ORDER BY creada_en",
+            (time.time(),)
+        ).fetchall()
+    finally:
+        conexion.close()
+
+    recuperadas = reservadas = 0
+    for id_transaccion, operaciones in pendientes:
+        if not _reservar(ruta, id_transaccion):
+            # Otro proceso la está recuperando
+            continue
+        reservadas += 1
+        with transaccion_lock:
+            try:
+                _aplicar(json.loads(operaciones), idempotente=True)
+            except Exception:
+                print(f"[TRANSACCIONES] No se pudo recuperar {id_transaccion}; se reintenta en el próximo arranque")
+                traceback.print_exc()
+                _liberar(ruta, id_transaccion)
+                continue
+            _cerrar_anotacion(ruta, id_transaccion)
+            recuperadas += 1
+    if reservadas:
+        print(f"[TRANSACCIONES] Recuperadas {recuperadas} de {reservadas} transacciones pendientes")
+    return recuperadas
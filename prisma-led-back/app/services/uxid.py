@@ -1,6 +1,6 @@
 # uxid.py
 import threading
-from app.services.sheets_client import connect_sheet
+from app.services.sheets_client import obtener_worksheet, asegurar_columna, leer_columnas
 
 # Lock por tabla (concurrencia intra-proceso)
 _TABLE_LOCKS = {}
@@ -15,14 +15,9 @@ def _get_lock(table: str) -> threading.Lock:
 def _ensure_column_and_get_index(ws, column_name: str) -> int:
     """
     Asegura que exista la columna `column_name` en el encabezado y devuelve su índice (1-based).
-    Si no existe, la crea al final.
+    Si no existe, la crea al final. Usa los encabezados del registro de hojas.
     """
-    header = ws.row_values(1) or []
-    if column_name in header:
-        return header.index(column_name) + 1
-    idx = len(header) + 1
-    ws.update_cell(1, idx, column_name)
-    return idx
+    return asegurar_columna(ws.title, column_name)
 
 def _to_ints(values):
     """Convierte a enteros solo las celdas que son dígitos puros."""
@@ -35,15 +30,20 @@ def _to_ints(values):
             nums.append(int(s))
     return nums
 
-def generate_next_uxid(table_name: str, column_name: str = "uxid") -> int:
+def generate_next_uxid(table_name: str, column_name: str = "uxid", registros=None) -> int:
     """
     Devuelve el siguiente UXID para `table_name`:
       - Si no hay UXIDs numéricos => 1
       - Si ya existen => max(existentes) + 1
+    Si se pasan los `registros` ya leídos de la hoja (p. ej. desde el contexto de la petición),
+    no se vuelve a leer la columna.
     """
     with _get_lock(table_name):
-        ws = connect_sheet().worksheet(table_name)
-        col_idx = _ensure_column_and_get_index(ws, column_name)
-        existing_vals = ws.col_values(col_idx)[1:]  # sin header
+        ws = obtener_worksheet(table_name)
+        _ensure_column_and_get_index(ws, column_name)
+        if registros is not None:
+            existing_vals = [r.get(column_name) for r in registros]
+        else:
+            existing_vals = leer_columnas({table_name: [column_name]})[table_name][column_name]  # sin header
         nums = _to_ints(existing_vals)
         return (max(nums) + 1) if nums else 1
@@ -5,6 +5,7 @@ Este módulo centraliza las funciones de validación para:
 - Cruce de fechas entre reservas y prereservas.
 - Construcción de diccionarios de tarifas y pantallas para lógica de ocupación.
 - Validación de detalles de prereserva, asegurando que no se excedan los límites de segundos por pantalla y que no existan conflictos de categoría en cilindros.
+- Los apartados temporales vigentes de otros clientes (ver apartados.py) cuentan como pautas ocupadas.
 
 Características clave:
 - Permite validar reglas de ocupación y restricción de categoría antes de crear o modificar prereservas.
@@ -17,15 +18,22 @@ Futuro desarrollador:
 - El manejo de errores y mensajes está pensado para facilitar la internacionalización y la experiencia de usuario.
 """
 
-from app.services.sheets_client import (
-    get_pantallas,
-    get_tarifas,
-    get_reservas,
-    get_detalle_reserva,
-    get_prereservas,
-    get_detalle_prereserva
+from app.services.sheets_client import cargar_hojas
+from app.services.apartados import apartados_activos
+from app.services.modelos import (
+    fecha_a_ordinal,
+    normalizar_id,
+    se_cruzan,
+    pantallas_tipadas,
+    tarifas_tipadas,
+    reservas_tipadas,
+    prereservas_tipadas,
+    detalles_reserva_por_id,
+    detalles_prereserva_por_id
 )
-from datetime import datetime
+
+# Hojas que determinan la ocupación de las pantallas
+HOJAS_OCUPACION = ("reservas", "detalle_reserva", "prereservas", "detalle_prereserva")
 
 
 def hay_cruce(f1_inicio, f1_fin, f2_inicio, f2_fin):
@@ -41,11 +49,10 @@ def hay_cruce(f1_inicio, f1_fin, f2_inicio, f2_fin):
     Returns:
         bool: True si los intervalos se cruzan, False en caso contrario.
     """
-    i1 = datetime.strptime(f1_inicio, "%Y-%m-%d")
-    f1 = datetime.strptime(f1_fin, "%Y-%m-%d")
-    i2 = datetime.strptime(f2_inicio, "%Y-%m-%d")
-    f2 = datetime.strptime(f2_fin, "%Y-%m-%d")
-    return i1 <= f2 and i2 <= f1
+    return se_cruzan(
+        fecha_a_ordinal(f1_inicio), fecha_a_ordinal(f1_fin),
+        fecha_a_ordinal(f2_inicio), fecha_a_ordinal(f2_fin)
+    )
 
 
 def construir_tarifas_dict():
@@ -55,8 +62,7 @@ def construir_tarifas_dict():
     Returns:
         dict: Diccionario {codigo_tarifa: duracion_seg}
     """
-    tarifas = get_tarifas()
-    return {t["codigo_tarifa"]: int(t["duracion_seg"]) for t in tarifas}
+    return {codigo: t.duracion_seg for codigo, t in tarifas_tipadas().items()}
 
 
 def construir_pantallas_dict():
@@ -66,11 +72,10 @@ def construir_pantallas_dict():
     Returns:
         dict: Diccionario {id_pantalla: cilindro}
     """
-    pantallas = get_pantallas()
-    return {p["id_pantalla"]: int(p["cilindro"]) for p in pantallas}
+    return {p.id_pantalla: p.cilindro for p in pantallas_tipadas()}
 
 
-def validar_detalle_prereserva(id_prereserva, pantallas_nuevas, categoria, id_cliente):
+def validar_detalle_prereserva(id_prereserva, pantallas_nuevas, categoria, id_cliente, datos=None):
     """
     Valida si una prereserva puede ser realizada según las reglas de ocupación y restricción de categoría.
 
@@ -84,70 +89,123 @@ def validar_detalle_prereserva(id_prereserva, pantallas_nuevas, categoria, id_cl
         pantallas_nuevas (list): Lista de pantallas y tarifas a reservar.
         categoria (str): Categoría de la pauta.
         id_cliente (str): ID del cliente que realiza la prereserva.
+        datos (ContextoDatos): Contexto de la petición (ver contexto.py); si se indica, la validación
+            usa las mismas copias de las hojas que el handler (las ya leídas no se vuelven a leer).
 
     Returns:
         tuple: (bool, str or None). True y None si es válida, False y mensaje de error si no lo es.
     """
-    tarifas_dict = construir_tarifas_dict()
-    pantallas_dict = construir_pantallas_dict()
-
-    reservas = get_reservas()
-    detalle_reserva = get_detalle_reserva()
-    prereservas = get_prereservas()
-    detalle_prereserva = get_detalle_prereserva()
+    # Las hojas de ocupación se revalidan antes de escribir (solo se leen las filas nuevas si no hubo cambios)
+    if datos is not None:
+        datos.cargar(*HOJAS_OCUPACION)
+    else:
+        cargar_hojas(*HOJAS_OCUPACION, fresco=True)
 
     # Obtener fechas de la prereserva actual
-    pr = next((p for p in prereservas if p["id_prereserva"] == id_prereserva), None)
+    id_prereserva = normalizar_id(id_prereserva)
+    pr = next((p for p in prereservas_tipadas(datos) if p.id_prereserva == id_prereserva), None)
     if not pr:
         return False, "Pre-reserva no encontrada"
 
-    fecha_inicio = pr["fecha_inicio"]
-    fecha_fin = pr["fecha_fin"]
+    return validar_pantallas_en_periodo(pr.inicio, pr.fin, pantallas_nuevas, categoria, id_cliente, id_prereserva, datos)
+
+
+def validar_pantallas_en_periodo(inicio, fin, pantallas_nuevas, categoria, id_cliente, excluir_prereserva_id=None, datos=None):
+    """
+    Valida las reglas de ocupación y de categoría para pautar pantallas en un periodo, con los datos en caché
+    (o con las copias del contexto de la petición, si se indica `datos`).
+
+    Args:
+        Los mismos de `violaciones_en_periodo`.
+
+    Returns:
+        tuple: (bool, str or None). True y None si es válida, False y el mensaje de la primera violación si no lo es.
+    """
+    violaciones = violaciones_en_periodo(inicio, fin, pantallas_nuevas, categoria, id_cliente, excluir_prereserva_id, datos)
+    if violaciones:
+        return False, violaciones[0]["mensaje"]
+    return True, None
+
+
+def violaciones_en_periodo(inicio, fin, pantallas_nuevas, categoria, id_cliente, excluir_prereserva_id=None, datos=None):
+    """
+    Calcula todas las violaciones de las reglas de ocupación y de categoría para pautar pantallas en un
+    periodo, con los datos en caché. Primero las de límite de segundos (en el orden de las pantallas)
+    y luego los conflictos de categoría (un solo aviso por cilindro).
+
+    Args:
+        inicio (int): Ordinal del día de inicio del periodo.
+        fin (int): Ordinal del día de fin del periodo.
+        pantallas_nuevas (list): Lista de pantallas y tarifas a reservar.
+        categoria (str): Categoría de la pauta.
+        id_cliente (str): ID del cliente que pauta.
+        excluir_prereserva_id (str): Prereserva que no se suma (la que se está actualizando).
+        datos (ContextoDatos): Contexto de la petición; si se indica, las hojas de ocupación se toman
+            de sus copias en lugar de la caché global.
+
+    Returns:
+        list: [{ "tipo": "limite_segundos", "id_pantalla", "segundos_ocupados", "segundos_solicitados", "mensaje" }
+               o { "tipo": "conflicto_categoria", "cilindro", "mensaje" }, ...]; vacía si es válida.
+    """
+    tarifas_dict = construir_tarifas_dict()
+    pantallas_dict = construir_pantallas_dict()
+    detalle_reserva = detalles_reserva_por_id(datos)
+    detalle_prereserva = detalles_prereserva_por_id(datos)
+    excluida = normalizar_id(excluir_prereserva_id) or None
+
+    # Reservas, prereservas (distintas a la actual) y apartados de otros clientes que se cruzan con el periodo
+    cruzadas = [
+        (r.id_cliente, detalle_reserva.get(r.id_reserva, []))
+        for r in reservas_tipadas(datos) if se_cruzan(r.inicio, r.fin, inicio, fin)
+    ] + [
+        (p.id_cliente, detalle_prereserva.get(p.id_prereserva, []))
+        for p in prereservas_tipadas(datos)
+        if p.id_prereserva != excluida  # ← evita sumar la misma prereserva que se está actualizando
+        and se_cruzan(p.inicio, p.fin, inicio, fin)
+    ] + [
+        (a.id_cliente, a.detalles)
+        for a in apartados_activos()
+        if a.id_cliente != id_cliente and se_cruzan(a.inicio, a.fin, inicio, fin)
+    ]
 
     # Construir mapas pantalla -> segundos ya ocupados
     ocupacion = {}
-    for r in reservas:
-        if not hay_cruce(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
-            continue
-        detalles = [d for d in detalle_reserva if d["id_reserva"] == r["id_reserva"]]
+    for _, detalles in cruzadas:
         for d in detalles:
-            seg = tarifas_dict.get(d["codigo_tarifa"], 0)
-            ocupacion[d["id_pantalla"]] = ocupacion.get(d["id_pantalla"], 0) + seg
+            ocupacion[d.id_pantalla] = ocupacion.get(d.id_pantalla, 0) + tarifas_dict.get(d.codigo_tarifa, 0)
 
-    for p in prereservas:
-        if p["id_prereserva"] == id_prereserva:
-            continue  # ← evita sumar la misma prereserva que se está actualizando
-        if not hay_cruce(p["fecha_inicio"], p["fecha_fin"], fecha_inicio, fecha_fin):
-            continue
-        detalles = [d for d in detalle_prereserva if d["id_prereserva"] == p["id_prereserva"]]
-        for d in detalles:
-            seg = tarifas_dict.get(d["codigo_tarifa"], 0)
-            ocupacion[d["id_pantalla"]] = ocupacion.get(d["id_pantalla"], 0) + seg
+    violaciones = []
 
     # Validar que no supere 60s por pantalla
     for p in pantallas_nuevas:
         segundos_nuevos = tarifas_dict.get(p["cod_tarifas"], 0)
-        total = ocupacion.get(p["id_pantalla"], 0) + segundos_nuevos
-        if total > 60:
-            return False, f"La pantalla {p['id_pantalla']} excede el límite de 60 segundos"
+        ocupados = ocupacion.get(normalizar_id(p["id_pantalla"]), 0)
+        if ocupados + segundos_nuevos > 60:
+            violaciones.append({
+                "tipo": "limite_segundos",
+                "id_pantalla": p["id_pantalla"],
+                "segundos_ocupados": ocupados,
+                "segundos_solicitados": segundos_nuevos,
+                "mensaje": f"La pantalla {p['id_pantalla']} excede el límite de 60 segundos"
+            })
 
     # Validar conflicto de categoría (restringido)
-    for r in reservas + prereservas:
-        if r.get("id_cliente") == id_cliente:
-            continue
-        if not hay_cruce(r["fecha_inicio"], r["fecha_fin"], fecha_inicio, fecha_fin):
+    cilindros_nuevos = {pantallas_dict.get(normalizar_id(p["id_pantalla"])) for p in pantallas_nuevas}
+    en_conflicto = []
+    for cliente_existente, detalles in cruzadas:
+        if cliente_existente == id_cliente:
             continue
-        detalles = detalle_reserva if "id_reserva" in r else detalle_prereserva
-        key = "id_reserva" if "id_reserva" in r else "id_prereserva"
-        r_id = r[key]
-        pantallas_reserva = [d for d in detalles if d[key] == r_id]
-
-        for d in pantallas_reserva:
-            if d["categoria"] != categoria:
+        for d in detalles:
+            if d.categoria != categoria:
                 continue
-            cilindro_existente = pantallas_dict.get(d["id_pantalla"])
-            cilindros_nuevos = {pantallas_dict.get(p["id_pantalla"]) for p in pantallas_nuevas}
-            if cilindro_existente in cilindros_nuevos:
-                return False, f"Conflicto de categoría en cilindro {cilindro_existente}"
-
-    return True, None
+            cilindro_existente = pantallas_dict.get(d.id_pantalla)
+            if cilindro_existente in cilindros_nuevos and cilindro_existente not in en_conflicto:
+                en_conflicto.append(cilindro_existente)
+    for cilindro in en_conflicto:
+        violaciones.append({
+            "tipo": "conflicto_categoria",
+            "cilindro": cilindro,
+            "mensaje": f"Conflicto de categoría en cilindro {cilindro}"
+        })
+
+    return violaciones
@@ -0,0 +1,71 @@
+"""
+Microbenchmark del renderizado de correos de confirmación de prereserva.
+
+Mide el tiempo por mensaje de las plantillas compiladas (ver app/services/correos.py), uno a uno
+y en lote, con cotizaciones sintéticas. No consulta Google Sheets ni envía correos.
+
+Uso (desde prisma-led-back):
+    python -m app.tests.bench_correos [mensajes] [pantallas_por_mensaje]
+"""
+
+import random
+import sys
+import time
+from app.services.correos import cargar_plantillas, renderizar_confirmacion, renderizar_confirmaciones
+
+
+def cotizacion_sintetica(rnd, n_pantallas):
+    pantallas = []
+    for i in range(n_pantallas):
+        segundos = rnd.choice((20, 40, 60))
+        base = rnd.randrange(1, 30) * 1_000_000
+        ahorro = base * rnd.choice((0, 0.035, 0.10))
+        pantallas.append({
+            "id_pantalla": i + 1, "cilindro": i // 2 + 1, "identificador": "AB"[i % 2],
+            "segundos": segundos, "cupos": segundos // 20, "precio_semana": 1_000_000,
+            "precio_semana_temporada": 2_000_000 * (segundos // 20),
+            "base": base, "ahorro": ahorro, "precio": base - ahorro
+        })
+    subtotal = sum(p["precio"] for p in pantallas)
+    iva = round(subtotal * 0.19)
+    return {
+        "semanas": rnd.randint(1, 52), "semanas_temporada": rnd.randint(0, 4), "pantallas": pantallas,
+        "base_total": sum(p["base"] for p in pantallas), "ahorro": sum(p["ahorro"] for p in pantallas),
+        "subtotal": subtotal, "iva": iva, "total": subtotal + iva
+    }
+
+
+def main(mensajes=500, n_pantallas=6):
+    rnd = random.Random(0)
+    lote = [
+        (
+            {
+                "correo": f"cliente{i}@ejemplo.com", "razon_social": f"Cliente {i} S.A.S.", "nit": f"900{i:06d}-1",
+                "fecha_inicio": "2030-01-07", "fecha_fin": "2030-03-04", "categoria": "Bebidas", "uxid": i
+            },
+            cotizacion_sintetica(rnd, n_pantallas)
+        )
+        for i in range(mensajes)
+    ]
+
+    inicio = time.perf_counter()
+    cargar_plantillas()
+    print(f"Compilación de plantillas: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+    inicio = time.perf_counter()
+    for datos, cotizacion in lote:
+        renderizar_confirmacion(datos, cotizacion)
+    uno_a_uno = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    renderizados = renderizar_confirmaciones(lote)
+    en_lote = time.perf_counter() - inicio
+
+    tamano = sum(len(r["html"]) for r in renderizados) / len(renderizados)
+    print(f"{mensajes} mensajes, {n_pantallas} pantallas por mensaje, {tamano / 1024:.1f} KB por mensaje")
+    print(f"Uno a uno: {uno_a_uno * 1e6 / mensajes:.0f} µs por mensaje")
+    print(f"En lote:   {en_lote * 1e6 / mensajes:.0f} µs por mensaje")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -4,9 +4,13 @@ Archivo principal para ejecutar la aplicación Flask de prisma-led-back.
 Este archivo importa la función create_app, instancia la aplicación y la ejecuta en modo debug.
 """
 
+import os
 from app import create_app
 
-app = create_app()
+# En modo debug el recargador ejecuta este archivo dos veces: en un proceso padre que solo vigila
+# los cambios y en el hijo que atiende las peticiones (WERKZEUG_RUN_MAIN). Solo el hijo arranca el
+# servidor (instantánea, recuperación del diario, calentamiento y refresco).
+app = create_app(arrancar_servidor=__name__ != "__main__" or os.getenv("WERKZEUG_RUN_MAIN") == "true")
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -48,20 +48,15 @@ export const AppDataProvider = ({ children }) => {
       }
 
       try {
-        const [tarifasRes, pantallasRes, categoriasRes, clienteRes,ciudadesRes] = await Promise.all([
-          api.get('/tarifas'),
-          api.get('/pantallas'),
-          api.get('/categorias'),
-          api.get('/cliente'),
-          api.get('/ciudades'),
-        ]);
+        // Un solo request con todos los datos de referencia (pantallas en el orden de la hoja)
+        const { data } = await api.get('/bootstrap');
         console.log('Datos cargados:');
         setDatos({
-          tarifas: tarifasRes.data || [],
-          pantallas: pantallasRes.data || [],
-          categorias: categoriasRes.data || [],
-          cliente: clienteRes.data || null,
-          ciudades: ciudadesRes.data || []
+          tarifas: data.tarifas || [],
+          pantallas: data.pantallas || [],
+          categorias: data.categorias || [],
+          cliente: data.cliente || null,
+          ciudades: data.ciudades || []
         });
       } catch (error) {
         console.error('Error al cargar datos globales:', error);